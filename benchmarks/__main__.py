@@ -0,0 +1,87 @@
+""" Runs log api benchmarks
+
+From the directory holding this component package:
+
+    python -m <package>.benchmarks --size 100MB --files 4
+
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+from .generator import LogGenerator, parse_size
+from .scenarios import build_scenarios, run_scenario
+
+
+def _format(value, scale=1, digits=3):
+    if value is None:
+        return "-"
+    return "{:.{}f}".format(value * scale, digits)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log api benchmarks")
+    parser.add_argument("--size", default="10MB",
+                        help="size of each generated log file, i.e. 1MB, "
+                             "2GB")
+    parser.add_argument("--files", type=int, default=4,
+                        help="number of generated log files")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--components", type=int, default=50)
+    parser.add_argument("--traceback-rate", type=float, default=0.02)
+    parser.add_argument("--old-time-format-rate", type=float, default=0.1)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--scenario", action="append",
+                        help="scenario to run, all when not given")
+    parser.add_argument("--dir",
+                        help="directory to generate files into and keep "
+                             "them, a temporary one is used otherwise")
+    parser.add_argument("--json", action="store_true",
+                        help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    directory = args.dir or tempfile.mkdtemp(prefix="log_api_bench")
+    os.makedirs(directory, exist_ok=True)
+    try:
+        generator = LogGenerator(
+            seed=args.seed, components=args.components,
+            traceback_rate=args.traceback_rate,
+            old_time_format_rate=args.old_time_format_rate)
+        names = ["main"] + ["service{}".format(i)
+                            for i in range(args.files - 1)]
+        files = [os.path.join(directory, "{}.log".format(name))
+                 for name in names]
+        size = parse_size(args.size)
+        if not all(os.path.isfile(filename) for filename in files):
+            files = generator.write_files(directory, names, size)
+
+        results = []
+        for scenario in build_scenarios(files, generator.components[0]):
+            if args.scenario and scenario.name not in args.scenario:
+                continue
+            results.append(run_scenario(scenario, args.iterations))
+
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return
+        print("{:<20} {:>12} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "scenario", "entries/s", "MB/s", "p50 ms", "p90 ms", "p99 ms",
+            "rss MB"))
+        for result in results:
+            print("{:<20} {:>12} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+                result["scenario"],
+                _format(result["entries_per_sec"], digits=0),
+                _format(result["mb_per_sec"], digits=1),
+                _format(result["p50"], 1000),
+                _format(result["p90"], 1000),
+                _format(result["p99"], 1000),
+                _format(result["peak_rss"], 1 / 1024 ** 2, 1)))
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+# relative weight of each level among generated entries
+DEFAULT_LEVEL_MIX = {
+    "DEBUG": 50,
+    "INFO": 35,
+    "WARNING": 10,
+    "ERROR": 4,
+    "CRITICAL": 1
+}
+
+_WORDS = (
+    "block", "signal", "service", "processed", "received", "publishing",
+    "subscriber", "connection", "retry", "timeout", "attribute", "value",
+    "started", "stopped", "configured", "notifying", "queue", "batch"
+)
+
+_EXCEPTIONS = (
+    ("socket.gaierror", "[Errno -2] Name or service not known"),
+    ("KeyError", "'missing_attribute'"),
+    ("ValueError", "invalid literal for int() with base 10: 'abc'"),
+    ("TimeoutError", "timed out")
+)
+
+# size of buffers written to disk at a time
+_WRITE_SIZE = 1024 * 1024
+
+
+class LogGenerator(object):
+    """ Generates realistic nio log files deterministically
+
+    Same seed and settings always produce the same files, so that
+    benchmark runs are comparable.
+    """
+
+    def __init__(self, seed=0, level_mix=None, components=50,
+                 traceback_rate=0.02, old_time_format_rate=0.0,
+                 start=datetime(2020, 1, 1), interval=0.005):
+        """ Create a generator
+
+        Args:
+            seed (int): random seed
+            level_mix (dict): level name to relative weight of entries
+                generated at that level
+            components (int): number of distinct components logging
+            traceback_rate (float): rate of ERROR and CRITICAL entries
+                followed by a multi-line traceback
+            old_time_format_rate (float): rate of entries timestamped
+                using old nio time format
+            start (datetime): time of first entry
+            interval (float): average seconds between entries
+        """
+        self._seed = seed
+        level_mix = level_mix or DEFAULT_LEVEL_MIX
+        self._levels = list(level_mix)
+        self._weights = list(level_mix.values())
+        self._components = \
+            ["main.BlockManager", "main.ServiceManager"] + \
+            ["service{}.Block{}".format(i % 10, i)
+             for i in range(max(0, components - 2))]
+        self._traceback_rate = traceback_rate
+        self._old_time_format_rate = old_time_format_rate
+        self._start = start
+        self._interval = interval
+
+    @property
+    def components(self):
+        return list(self._components)
+
+    def rows(self, size, seed=None):
+        """ Yields generated rows until they add up to a size
+
+        Args:
+            size (int): number of bytes to generate
+            seed (int): overrides generator seed, allowing files generated
+                by the same generator to differ
+        """
+        rand = random.Random(self._seed if seed is None else seed)
+        moment = self._start
+        generated = 0
+        while generated < size:
+            moment += timedelta(
+                seconds=rand.expovariate(1 / self._interval))
+            rows = self._entry(rand, moment)
+            for row in rows:
+                generated += len(row)
+                yield row
+
+    def write(self, filename, size, seed=None):
+        """ Writes a generated log file
+
+        Args:
+            filename (str): path to file written
+            size (int): approximate file size in bytes
+            seed (int): overrides generator seed
+
+        Returns:
+            number of bytes written
+        """
+        written = 0
+        buffer = []
+        buffered = 0
+        with open(filename, "w", encoding="utf-8") as f:
+            for row in self.rows(size, seed):
+                buffer.append(row)
+                buffered += len(row)
+                if buffered >= _WRITE_SIZE:
+                    f.write("".join(buffer))
+                    written += buffered
+                    buffer = []
+                    buffered = 0
+            f.write("".join(buffer))
+        return written + buffered
+
+    def write_files(self, directory, names, size):
+        """ Writes a generated log file per name
+
+        Args:
+            directory (str): directory where files are written
+            names (list): file names without extension
+            size (int): approximate size in bytes of each file
+
+        Returns:
+            list of paths to files written
+        """
+        files = []
+        for index, name in enumerate(names):
+            filename = os.path.join(directory, "{}.log".format(name))
+            self.write(filename, size, self._seed + index)
+            files.append(filename)
+        return files
+
+    def _entry(self, rand, moment):
+        level = rand.choices(self._levels, self._weights)[0]
+        if rand.random() < self._old_time_format_rate:
+            nio_time = moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+        else:
+            nio_time = moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        component = rand.choice(self._components)
+        msg = " ".join(rand.choice(_WORDS)
+                       for _ in range(rand.randint(3, 20)))
+        rows = ["[{}] NIO [{}] [{}] {}\n".format(
+            nio_time, level, component, msg)]
+        if level in ("ERROR", "CRITICAL") and \
+                rand.random() < self._traceback_rate:
+            rows.extend(self._traceback(rand))
+        return rows
+
+    @staticmethod
+    def _traceback(rand):
+        rows = ["Traceback (most recent call last):\n"]
+        for _ in range(rand.randint(2, 8)):
+            rows.append(
+                '  File "/usr/local/lib/python3.5/site-packages/nio/{}.py", '
+                'line {}, in {}\n'.format(
+                    rand.choice(_WORDS), rand.randint(1, 500),
+                    rand.choice(_WORDS)))
+            rows.append("    result = {}(*args, **kwargs)\n".format(
+                rand.choice(_WORDS)))
+        exception, detail = rand.choice(_EXCEPTIONS)
+        rows.append("{}: {}\n".format(exception, detail))
+        return rows
+
+
+def parse_size(value):
+    """ Parses a size such as '512KB', '10MB' or '2GB' into bytes
+    """
+    units = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+    value = value.strip().upper()
+    for unit, multiplier in units.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * multiplier)
+    return int(value)
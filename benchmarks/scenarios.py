@@ -0,0 +1,126 @@
+import logging
+import math
+import os
+import resource
+import sys
+import time
+
+from ..log_entries import LogEntries
+from ..manager import LogManager
+
+
+class Scenario(object):
+    """ A benchmarked operation
+
+    Attributes:
+        name (str): scenario name
+        run (callable): runs operation once, returns number of entries
+            produced
+        bytes_per_run (int): bytes the operation reads, when known
+    """
+
+    def __init__(self, name, run, bytes_per_run=None):
+        self.name = name
+        self.run = run
+        self.bytes_per_run = bytes_per_run
+
+
+def build_scenarios(files, component):
+    """ Creates scenarios over generated log files
+
+    Args:
+        files (list): paths to generated log files
+        component (str): component to filter entries by
+
+    Returns:
+        list of Scenario
+    """
+    first = files[0]
+    first_size = os.path.getsize(first)
+    total_size = sum(os.path.getsize(filename) for filename in files)
+    loggers = ["benchmark.logger{}".format(i) for i in range(200)]
+    for name in loggers:
+        logging.getLogger(name)
+
+    def set_log_level():
+        for name in loggers:
+            LogManager.set_log_level(name, logging.INFO)
+        return len(loggers)
+
+    return [
+        Scenario("read_tail",
+                 lambda: len(LogEntries.read(first, 100, None, None))),
+        Scenario("read_tail_filtered",
+                 lambda: len(LogEntries.read(first, 100, "ERROR",
+                                             component))),
+        Scenario("read_full",
+                 lambda: len(LogEntries.read(first, -1, None, None)),
+                 first_size),
+        Scenario("read_full_filtered",
+                 lambda: len(LogEntries.read(first, -1, "WARNING", None)),
+                 first_size),
+        Scenario("read_all_tail",
+                 lambda: len(LogEntries.read_all(files, 100, None, None))),
+        Scenario("read_all_full",
+                 lambda: len(LogEntries.read_all(files, -1, None, None)),
+                 total_size),
+        Scenario("get_logger_names",
+                 lambda: len(LogManager.get_logger_names(True))),
+        Scenario("set_log_level", set_log_level)
+    ]
+
+
+def percentile(values, rate):
+    """ Nearest rank percentile of sorted values
+    """
+    if not values:
+        return None
+    return values[max(0, math.ceil(rate * len(values)) - 1)]
+
+
+def peak_rss():
+    """ Peak resident set size of current process in bytes
+
+    Peak is process wide, run a single scenario to measure it in isolation
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS, in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_scenario(scenario, iterations, warmup=1):
+    """ Runs a scenario and measures it
+
+    Args:
+        scenario (Scenario): scenario to run
+        iterations (int): measured runs
+        warmup (int): runs discarded before measuring
+
+    Returns:
+        dict with scenario measurements, latencies in seconds
+    """
+    for _ in range(warmup):
+        scenario.run()
+    latencies = []
+    entries = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        entries += scenario.run()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    elapsed = sum(latencies)
+    result = {
+        "scenario": scenario.name,
+        "iterations": iterations,
+        "entries_per_sec": entries / elapsed if elapsed else None,
+        "mb_per_sec": None,
+        "p50": percentile(latencies, 0.5),
+        "p90": percentile(latencies, 0.9),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+        "peak_rss": peak_rss()
+    }
+    if scenario.bytes_per_run and elapsed:
+        result["mb_per_sec"] = \
+            scenario.bytes_per_run * iterations / elapsed / 1024 ** 2
+    return result
@@ -0,0 +1,55 @@
+import threading
+
+from nio.util.logging import get_nio_logger
+
+
+class ServiceCapture(object):
+    """ Installs memory capture into service processes as they start
+
+    Services are asked every interval to install their memory handler, which
+    they only do once per process, so that a service captures its records
+    from shortly after it starts rather than from its first memory query.
+    Services not running are asked again on next interval.
+    """
+
+    def __init__(self, log_manager, interval):
+        """ Create a service capture
+
+        Args:
+            log_manager (LogManager): manager requests are sent through
+            interval (float): seconds between installation rounds
+        """
+        self.logger = get_nio_logger("LogCapture")
+        self._log_manager = log_manager
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="LogCapture",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def install(self):
+        """ Asks every running service to install its memory handler
+        """
+        for service_id in self._log_manager.get_services():
+            if self._stopped.is_set():
+                return
+            self._log_manager.install_service_memory_handler(service_id)
+
+    def _run(self):
+        while True:
+            try:
+                self.install()
+            except Exception:
+                self.logger.exception("Installing memory capture failed")
+            if self._stopped.wait(self._interval):
+                return
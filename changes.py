@@ -0,0 +1,278 @@
+import ctypes
+import errno
+import os
+import struct
+import sys
+import threading
+import time
+
+from nio.util.logging import get_nio_logger
+
+from .log_entries import LogEntries
+
+# inotify event flags, see inotify(7)
+_IN_MODIFY = 0x2
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_WATCH_MASK = _IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | \
+    _IN_DELETE
+
+
+class _Inotify(object):
+    """ Names of directory entries changed, as notified by Linux inotify
+    """
+
+    # wd, mask, cookie and name length, followed by name
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        """ Starts watching a directory
+
+        Raises:
+            OSError: if inotify is not available or directory cannot be
+                watched
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        if libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, os.strerror(error), directory)
+        # False once directory is no longer watched, i.e. it was removed
+        self.watching = True
+
+    def read_changed(self):
+        """ Drains pending events
+
+        Returns:
+            set of entry names changed, None when events were lost and
+            every entry has to be checked
+        """
+        names = set()
+        lost = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return None if lost else names
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & _IN_IGNORED:
+                    self.watching = False
+                if mask & (_IN_Q_OVERFLOW | _IN_IGNORED):
+                    lost = True
+                elif name:
+                    names.add(os.fsdecode(name))
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _FileState(object):
+
+    def __init__(self, inode, size, version):
+        self.inode = inode
+        self.size = size
+        self.version = version
+        self.appeared = version
+        self.rotated = 0
+        self.removed = False
+        # newest entry level along with (inode, size) it was read at
+        self.level = None
+        self.level_key = None
+
+
+class LogChanges(object):
+    """ Keeps track of log files growing, being rotated or appearing
+
+    Log files state is versioned, tokens handed out tell the version a
+    client has seen, so that only files changed since then are reported.
+    State is refreshed when changes are requested, from inotify events on
+    Linux, or by checking every file at most once per poll interval
+    elsewhere.
+    """
+
+    def __init__(self, logs_dir, poll_interval=1.0):
+        """ Create a tracker and take the initial state of log files
+
+        Args:
+            logs_dir (str): directory holding log files
+            poll_interval (float): when inotify is not available, seconds
+                during which file state is not checked again
+        """
+        self.logger = get_nio_logger("LogChanges")
+        self._logs_dir = logs_dir
+        self._poll_interval = poll_interval
+        # tokens issued by another tracker, such as one before a restart,
+        # are told apart by their epoch
+        self._epoch = os.urandom(4).hex()
+        self._version = 0
+        self._files = {}
+        self._last_scan = None
+        self._lock = threading.Lock()
+        try:
+            self._inotify = _Inotify(logs_dir)
+        except (OSError, AttributeError) as e:
+            self.logger.info(
+                "Polling {} for changes: {}".format(logs_dir, e))
+            self._inotify = None
+        self._scan()
+
+    def changes(self, since=None, levels=True):
+        """ Provides log files changed since a token
+
+        Args:
+            since (str): token from a previous call, all files are reported
+                as appeared when None or not valid
+            levels (bool): find out level of newest entry of files changed,
+                None is provided otherwise
+
+        Returns:
+            dict with new 'token', 'reset' telling whether since token was
+            discarded, and 'files', a dict of log name to its 'change', one
+            of 'appeared', 'rotated', 'grew' or 'removed', its 'size' and
+            the 'level' of its newest entry
+        """
+        with self._lock:
+            self._refresh()
+            version = self._parse_token(since)
+            files = {}
+            for name, state in self._files.items():
+                if version is None:
+                    if state.removed:
+                        continue
+                    change = "appeared"
+                elif state.version <= version:
+                    continue
+                elif state.removed:
+                    change = "removed"
+                elif state.appeared > version:
+                    change = "appeared"
+                elif state.rotated > version:
+                    change = "rotated"
+                else:
+                    change = "grew"
+                files[name[:-len(".log")]] = {
+                    "change": change,
+                    "size": state.size,
+                    "level": self._get_level(name, state)
+                    if levels and not state.removed else None
+                }
+            return {
+                "token": "{}.{}".format(self._epoch, self._version),
+                "reset": version is None,
+                "files": files
+            }
+
+    def close(self):
+        with self._lock:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+
+    def _parse_token(self, token):
+        """ Finds out version a token stands for, None if not valid
+        """
+        if not token:
+            return None
+        epoch, _, version = token.partition(".")
+        if epoch != self._epoch or not version.isdigit() or \
+                int(version) > self._version:
+            return None
+        return int(version)
+
+    def _refresh(self):
+        if self._inotify is not None:
+            names = self._inotify.read_changed()
+            if not self._inotify.watching:
+                self.logger.warning("{} is no longer watched, polling it".
+                                    format(self._logs_dir))
+                self._inotify.close()
+                self._inotify = None
+            if names is None:
+                self._scan()
+            else:
+                self._check(name for name in names if name.endswith(".log"))
+        elif time.monotonic() - self._last_scan >= self._poll_interval:
+            self._scan()
+
+    def _scan(self):
+        """ Checks every log file in logs directory
+        """
+        self._last_scan = time.monotonic()
+        stats = {}
+        try:
+            with os.scandir(self._logs_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".log") and entry.is_file():
+                        try:
+                            stats[entry.name] = entry.stat()
+                        except OSError:
+                            continue
+        except FileNotFoundError:
+            pass
+        version = self._version + 1
+        for name in set(self._files) | set(stats):
+            self._update(name, stats.get(name), version)
+
+    def _check(self, names):
+        """ Checks log files with given names
+        """
+        version = self._version + 1
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self._logs_dir, name))
+            except OSError:
+                stat = None
+            self._update(name, stat, version)
+
+    def _update(self, name, stat, version):
+        state = self._files.get(name)
+        if stat is None:
+            if state is None or state.removed:
+                return
+            state.removed = True
+            state.size = 0
+        elif state is None:
+            state = self._files[name] = \
+                _FileState(stat.st_ino, stat.st_size, version)
+        elif state.removed:
+            # file was renamed away and created again, seen in separate
+            # refreshes, which is a rotation to clients that knew it before
+            state.removed = False
+            state.rotated = version
+        elif stat.st_ino != state.inode or stat.st_size < state.size:
+            # file was replaced, or truncated, since last seen
+            state.rotated = version
+        elif stat.st_size == state.size:
+            return
+        if stat is not None:
+            state.inode = stat.st_ino
+            state.size = stat.st_size
+        state.version = self._version = version
+
+    def _get_level(self, name, state):
+        key = (state.inode, state.size)
+        if state.level_key != key:
+            try:
+                entries = LogEntries.read(
+                    os.path.join(self._logs_dir, name), 1, None, None)
+            except OSError:
+                entries = []
+            state.level = entries[-1]["level"] if entries else None
+            state.level_key = key
+        return state.level
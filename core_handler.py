@@ -1,8 +1,13 @@
 import json
+import time
 from nio.modules.security.access import ensure_access
 from nio.util.logging import get_nio_logger
 from nio.modules.web import RESTHandler
 
+from .metrics import collecting, registry
+from .profiling import profile_call
+from .read_pool import ReadUnavailable
+
 
 class CoreLogHandler(RESTHandler):
 
@@ -22,6 +27,22 @@ class CoreLogHandler(RESTHandler):
         To retrieve log names and levels use:
             http://[host]:[port]/log?level
 
+        To retrieve query cache counters use:
+            http://[host]:[port]/log/cache
+
+        To retrieve request metrics histograms use, entries requests are
+        measured for a while after each retrieval:
+            http://[host]:[port]/log/metrics
+
+        To retrieve the whole text of a truncated entry, passing its
+        'truncated' field values, use:
+            http://[host]:[port]/log/range?file=main.log&offset=1024&
+                size=4194304
+
+        To find out which logs grew, were rotated or appeared since a
+        previous call, passing the token it returned, use:
+            http://[host]:[port]/log/changes?since=<token>
+
         To retrieve log entries use:
             - reads last 100 entries from all instance logs
                 http://[host]:[port]/log/entries
@@ -35,6 +56,45 @@ class CoreLogHandler(RESTHandler):
                 http://[host]:[port]/log/entries?id=service1_id
             - reads last 100 entries for component 'main.BlockManager'
                 http://[host]:[port]/log/entries?component=main.BlockManager
+            - reads last 100 main entries from records captured in memory
+                http://[host]:[port]/log/entries?name=main&source=memory
+            - reads all main entries scanning at most 10MB, when truncated
+              the X-Log-Truncated header is set and the X-Log-Resume header
+              value can be passed as 'resume' to continue reading
+                http://[host]:[port]/log/entries?name=main&count=-1&
+                    max_bytes=10485760
+            - reads time and level of last 100 entries from all instance logs
+                http://[host]:[port]/log/entries?fields=time,level
+            - reads last 100 entries with messages of at most 80 characters
+                http://[host]:[port]/log/entries?msg_max_len=80
+            - reads last 100 entries folding consecutive identical entries
+              into groups with 'count', 'first_time' and 'last_time'
+                http://[host]:[port]/log/entries?collapse=true
+            - same as above, folding identical entries within 60 seconds
+                http://[host]:[port]/log/entries?collapse=true&
+                    collapse_window=60
+            - reads a sample of 200 entries spread over main, the estimated
+              number of entries is set in the X-Log-Estimated-Count header
+                http://[host]:[port]/log/entries?name=main&sample=200
+            - reads a sample of 1% of main ERROR entries
+                http://[host]:[port]/log/entries?name=main&level=ERROR&
+                    sample=0.01
+            - reads last 100 ERROR entries across this instance and its
+              configured peers, each entry tagged with its 'instance',
+              instances failing to respond are listed in the
+              X-Log-Failed-Instances header
+                http://[host]:[port]/log/entries?level=ERROR&federate=true
+            - reads last 100 entries along with the X-Log-Metrics and
+              Server-Timing headers describing how they were read
+                http://[host]:[port]/log/entries?metrics=true
+
+        Any request can be profiled, which requires instance "write" access,
+        top functions by CPU time and top allocation sites are either
+        returned along with the result, as {"result": ..., "profile": ...}:
+                http://[host]:[port]/log/entries?profile=true
+        or stored in logs 'profiles' directory, the stored file name is set
+        in the X-Log-Profile header:
+                http://[host]:[port]/log/entries?profile=store
 
         """
 
@@ -44,6 +104,31 @@ class CoreLogHandler(RESTHandler):
         self.logger.info("CoreLogHandler.on_get")
         params = request.get_params()
 
+        if "profile" in params and params["profile"].upper() != 'FALSE':
+            # Ensure instance "write" access since profiles expose internals
+            ensure_access("instance", "write")
+            body, report = profile_call(self._get, params, response)
+            if params["profile"].upper() == 'STORE':
+                response.set_header('X-Log-Profile',
+                                    self._log_manager.store_profile(report))
+            else:
+                # range bodies are raw text, other routes serve JSON
+                if params.get("identifier") != "range":
+                    body = json.loads(body)
+                body = json.dumps({"result": body, "profile": report})
+                response.set_header('Content-Type', 'application/json')
+        else:
+            body = self._get(params, response)
+        response.set_body(body)
+
+    def _get(self, params, response):
+        """ Serves a GET request
+
+        Returns:
+            response body
+        """
+        metrics = None
+
         # What route?
         if "identifier" in params and params["identifier"] == "entries":
             name = params.get("name", None)
@@ -51,17 +136,111 @@ class CoreLogHandler(RESTHandler):
             count = int(params.get("count", 100))
             level = params.get("level", None)
             component = params.get("component", None)
-            result = self._log_manager.get_log_entries(
-                name, id, count, level, component
-            )
+            # optional arguments are only passed along when provided
+            options = {}
+            if "source" in params:
+                options["source"] = params["source"]
+            if "max_bytes" in params:
+                options["max_bytes"] = int(params["max_bytes"])
+            if "max_time" in params:
+                options["max_time"] = float(params["max_time"])
+            if "max_entries" in params:
+                options["max_entries"] = int(params["max_entries"])
+            if "resume" in params:
+                options["resume"] = json.loads(params["resume"])
+            if "fields" in params:
+                options["fields"] = params["fields"].split(",")
+            if "msg_max_len" in params:
+                options["msg_max_len"] = int(params["msg_max_len"])
+            if "collapse" in params and \
+                    params["collapse"].upper() != 'FALSE':
+                options["collapse"] = True
+                if "collapse_window" in params:
+                    options["collapse_window"] = \
+                        float(params["collapse_window"])
+            if "sample" in params:
+                sample = float(params["sample"])
+                options["sample"] = sample if sample < 1 else int(sample)
+            federate = "federate" in params and \
+                params["federate"].upper() != 'FALSE'
+            metrics_headers = "metrics" in params and \
+                params["metrics"].upper() != 'FALSE'
+            metrics = registry.start_request(force=metrics_headers)
+            try:
+                with collecting(metrics):
+                    if federate:
+                        result = \
+                            self._log_manager.get_federated_log_entries(
+                                params, name, id, count, level, component,
+                                **options
+                            )
+                    else:
+                        result = self._log_manager.get_log_entries(
+                            name, id, count, level, component, **options
+                        )
+            except ReadUnavailable as e:
+                # fail fast rather than holding web server threads
+                self.logger.warning("Log entries unavailable: {}".format(e))
+                response.set_status(503)
+                response.set_header('Retry-After', str(e.retry_after))
+                response.set_header('Content-Type', 'application/json')
+                if metrics is not None:
+                    # rejected requests are measured too
+                    self._record(metrics, metrics_headers, response)
+                return json.dumps({"error": str(e)})
+            if getattr(result, "estimated_count", None) is not None:
+                response.set_header('X-Log-Estimated-Count',
+                                    str(result.estimated_count))
+            if getattr(result, "truncated", False):
+                response.set_header('X-Log-Truncated', 'true')
+                if result.resume is not None:
+                    response.set_header('X-Log-Resume',
+                                        json.dumps(result.resume))
+            if getattr(result, "failed_instances", None):
+                response.set_header('X-Log-Failed-Instances',
+                                    ",".join(result.failed_instances))
+        elif "identifier" in params and params["identifier"] == "cache":
+            result = self._log_manager.get_cache_stats()
+        elif "identifier" in params and params["identifier"] == "metrics":
+            result = registry.scrape()
+        elif "identifier" in params and params["identifier"] == "range":
+            response.set_header('Content-Type', 'text/plain; charset=utf-8')
+            return self._log_manager.get_log_range(
+                params.get("file", ""), int(params.get("offset", 0)),
+                int(params.get("size", 0)))
+        elif "identifier" in params and params["identifier"] == "changes":
+            result = self._log_manager.get_log_changes(params.get("since"))
         else:
             add_level = False
             if "level" in params:
                 add_level = params['level'].upper() != 'FALSE'
             result = self._log_manager.get_logger_names(add_level)
 
+        if metrics is None:
+            body = json.dumps(result)
+        else:
+            started = time.perf_counter()
+            body = json.dumps(result)
+            metrics.add_time("serialize", time.perf_counter() - started)
+            metrics.add(entries_returned=len(result))
+            self._record(metrics, metrics_headers, response)
+
         response.set_header('Content-Type', 'application/json')
-        response.set_body(json.dumps(result))
+        return body
+
+    @staticmethod
+    def _record(metrics, headers, response):
+        """ Records metrics of an entries request
+
+        Args:
+            metrics (RequestMetrics): request metrics
+            headers (bool): describe request in response headers
+            response (Response): response served
+        """
+        registry.record("entries", metrics)
+        if headers:
+            for header, value in metrics.headers():
+                response.set_header(header, value)
 
     def on_post(self, request, response, *args, **kwargs):
 
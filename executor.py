@@ -1,10 +1,13 @@
 import logging
 
+from .memory_buffer import install_memory_handler
+from .shared_ring import install_shared_ring_handler
+
 
 class LogExecutor(object):
 
-    """ Proxy executing log functionality such as obtain logger names and
-    changing log level """
+    """ Proxy executing log functionality such as obtain logger names,
+    changing log level and retrieving recent log entries """
 
     @staticmethod
     def get_logger_names(add_level=False):
@@ -47,3 +50,47 @@ class LogExecutor(object):
             # if no logger_name specified, set it to all
             for key in logging.getLogger().manager.loggerDict.keys():
                 logging.getLogger(key).setLevel(level)
+
+    @staticmethod
+    def install_memory_handler(capacity):
+        """ Captures log records of current process in memory
+
+        Args:
+            capacity (int): records kept for each level
+
+        """
+        install_memory_handler(capacity)
+
+    @staticmethod
+    def get_log_entries(num_entries, level, component, capacity):
+        """ Retrieves recent log entries captured within current process
+
+        A memory handler is installed shortly after the service starts, or
+        here when not installed yet, thus entries logged before that are
+        only available in the log file.
+
+        Args:
+            num_entries (int): number of entries to read
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            capacity (int): records kept for each level when installing the
+                memory handler
+
+        Returns:
+            list of entries, or None if not enough history is held in memory
+
+        """
+        handler = install_memory_handler(capacity)
+        return handler.buffer.get(num_entries, level, component)
+
+    @staticmethod
+    def attach_shared_ring(filename, slots, slot_size):
+        """ Writes log records of current process into a shared ring file
+
+        Args:
+            filename (str): path to ring file
+            slots (int): number of records held
+            slot_size (int): size in bytes of each record
+
+        """
+        install_shared_ring_handler(filename, slots, slot_size)
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import os
+import tarfile
+
+from nio.modules.security.access import ensure_access
+from nio.util.logging import get_nio_logger
+from nio.modules.web import RESTHandler
+
+# size of blocks streamed when exporting raw files
+_BLOCK_SIZE = 1024 * 1024
+# entries serialized at a time when exporting entries
+_BATCH_SIZE = 1000
+
+
+class ExportLogHandler(RESTHandler):
+
+    """ Handles log export requests
+    """
+
+    def __init__(self, route, log_manager):
+        super().__init__(route)
+        self._log_manager = log_manager
+        self.logger = get_nio_logger("ExportLogHandler")
+
+    def on_get(self, request, response, *args, **kwargs):
+        """ API endpoint to export logs
+
+        Without filters, log files including rotated ones are streamed as
+        they are, no parsing involved, with filters entries are read oldest
+        first and streamed as they are parsed.
+
+        To export logs use:
+            - all instance log files as a tar archive
+                http://[host]:[port]/log/export
+            - main log files, as they are
+                http://[host]:[port]/log/export?name=main
+            - main log files as a tar archive
+                http://[host]:[port]/log/export?name=main&format=tar
+            - service 'service1' entries at ERROR level as NDJSON
+                http://[host]:[port]/log/export?name=service1&level=ERROR
+            - all instance entries for component 'main.BlockManager' as CSV
+                http://[host]:[port]/log/export?component=main.BlockManager&
+                    format=csv
+
+        """
+
+        # Ensure instance "read" access in order to export logs
+        ensure_access("instance", "read")
+
+        params = request.get_params()
+        self.logger.info("ExportLogHandler.on_get, params: {0}".format(params))
+
+        name = params.get("name", None)
+        files = self._log_manager.get_export_files(name, params.get("id"))
+        level = params.get("level", None)
+        component = params.get("component", None)
+        fields = params["fields"].split(",") if "fields" in params else None
+
+        if level or component or fields:
+            export_format = params.get("format", "ndjson")
+            entries = self._log_manager.iter_export_entries(
+                files, level, component, fields)
+            if export_format == "csv":
+                body = self._stream_csv(entries, fields)
+                response.set_header('Content-Type', 'text/csv')
+            elif export_format == "ndjson":
+                body = self._stream_ndjson(entries)
+                response.set_header('Content-Type', 'application/x-ndjson')
+            else:
+                raise ValueError(
+                    "Invalid export format: {}".format(export_format))
+            filename = "{}.{}".format(name or "logs", export_format)
+        else:
+            export_format = params.get(
+                "format", "raw" if name else "tar")
+            if export_format == "raw":
+                body = self._stream_raw(files)
+                response.set_header('Content-Type', 'text/plain')
+                filename = "{}.log".format(name or "logs")
+            elif export_format == "tar":
+                body = self._stream_tar(files)
+                response.set_header('Content-Type', 'application/x-tar')
+                filename = "{}.tar".format(name or "logs")
+            else:
+                raise ValueError(
+                    "Invalid export format: {}".format(export_format))
+
+        response.set_header('Content-Disposition',
+                            'attachment; filename="{}"'.format(filename))
+        response.set_body(body)
+
+    @staticmethod
+    def _stream_raw(files):
+        for _, file_path in files:
+            with open(file_path, "rb") as f:
+                while True:
+                    block = f.read(_BLOCK_SIZE)
+                    if not block:
+                        break
+                    yield block
+
+    @staticmethod
+    def _stream_tar(files):
+        """ Streams files as a tar archive without buffering whole files
+        """
+        for filename, file_path in files:
+            with open(file_path, "rb") as f:
+                # files might grow while exported, size is fixed up front
+                stat = os.fstat(f.fileno())
+                size = stat.st_size
+                info = tarfile.TarInfo(filename)
+                info.size = size
+                info.mtime = stat.st_mtime
+                info.mode = 0o644
+                yield info.tobuf(format=tarfile.GNU_FORMAT)
+                remaining = size
+                while remaining > 0:
+                    block = f.read(min(_BLOCK_SIZE, remaining))
+                    if not block:
+                        # file was truncated, pad up to the declared size
+                        block = bytes(min(_BLOCK_SIZE, remaining))
+                    remaining -= len(block)
+                    yield block
+                padding = -size % tarfile.BLOCKSIZE
+                if padding:
+                    yield bytes(padding)
+        # end of archive
+        yield bytes(tarfile.BLOCKSIZE * 2)
+
+    @staticmethod
+    def _stream_ndjson(entries):
+        batch = []
+        for entry in entries:
+            batch.append(json.dumps(entry))
+            if len(batch) == _BATCH_SIZE:
+                yield ("\n".join(batch) + "\n").encode()
+                batch = []
+        if batch:
+            yield ("\n".join(batch) + "\n").encode()
+
+    @staticmethod
+    def _stream_csv(entries, fields):
+        fields = fields or ["time", "level", "component", "msg"]
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(fields)
+        count = 0
+        for entry in entries:
+            writer.writerow([entry.get(field, "") for field in fields])
+            count += 1
+            if count % _BATCH_SIZE == 0:
+                yield output.getvalue().encode()
+                output.seek(0)
+                output.truncate()
+        yield output.getvalue().encode()
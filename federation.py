@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from urllib.parse import urlencode, urlsplit
+
+from nio.util.logging import get_nio_logger
+
+
+class PeerError(RuntimeError):
+    """ Raised when a peer instance fails to serve a query
+    """
+    pass
+
+
+class PeerConnectionPool(object):
+    """ Keep-alive connections to a peer instance
+
+    Connections are reused across queries, a connection found closed by the
+    peer when reused is replaced by a new one.
+    """
+
+    def __init__(self, url, timeout, max_idle=4):
+        """ Create a pool
+
+        Args:
+            url (str): peer instance base url, i.e. http://host:port
+            timeout (float): seconds allowed for each socket operation
+            max_idle (int): maximum number of idle connections kept
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError("Invalid peer url: {}".format(url))
+        self.name = parts.netloc
+        self._connection_class = \
+            HTTPSConnection if parts.scheme == "https" else HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base_path = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self, path, headers=None):
+        """ Sends a GET request to peer
+
+        Args:
+            path (str): path and query relative to peer base url
+            headers (dict): request headers
+
+        Returns:
+            tuple with response status, headers and body
+        """
+        while True:
+            connection, reused = self._acquire()
+            try:
+                connection.request("GET", self._base_path + path,
+                                   headers=headers or {})
+                response = connection.getresponse()
+                body = response.read()
+            except (RemoteDisconnected, ConnectionResetError,
+                    BrokenPipeError):
+                connection.close()
+                if reused:
+                    # peer closed idle connection, retry on a new one
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return response.status, response.msg, body
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connection_class(
+            self._host, self._port, timeout=self._timeout), False
+
+    def _release(self, connection):
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+
+class Federation(object):
+    """ Fans out log queries to peer instances
+    """
+
+    def __init__(self, peers, timeout, headers=None, queries=1):
+        """ Create a federation
+
+        Args:
+            peers (list): peer instance base urls
+            timeout (float): seconds each peer is allowed to take
+            headers (dict): headers sent along every peer request
+            queries (int): number of queries whose peer calls run at once,
+                calls of further queries wait for a worker and count that
+                wait against their timeout
+        """
+        self.logger = get_nio_logger("LogFederation")
+        self._pools = [PeerConnectionPool(url, timeout) for url in peers]
+        self._timeout = timeout
+        self._headers = headers or {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self._pools) * max(1, queries),
+            thread_name_prefix="LogPeer")
+
+    def query(self, path, params, local):
+        """ Runs a query on every peer while the local query runs
+
+        Args:
+            path (str): peer route queried, i.e. /log/entries
+            params (dict): query parameters
+            local (callable): runs the query locally
+
+        Returns:
+            tuple with local query result, list of (peer name, entries,
+            truncated) tuples for peers that responded, and list of names
+            of peers that failed or did not respond in time
+        """
+        url = "{}?{}".format(path, urlencode(params))
+        futures = {self._executor.submit(self._fetch, pool, url): pool
+                   for pool in self._pools}
+        deadline = time.monotonic() + self._timeout
+        local_result = local()
+        done, _ = wait(futures,
+                       timeout=max(0, deadline - time.monotonic()))
+
+        responses = []
+        failed = []
+        for future, pool in futures.items():
+            if future not in done:
+                self.logger.warning(
+                    "Peer {} did not respond within {} seconds".format(
+                        pool.name, self._timeout))
+                failed.append(pool.name)
+                continue
+            try:
+                entries, truncated = future.result()
+            except Exception as e:
+                self.logger.warning("Peer {} query failed: {}".format(
+                    pool.name, e))
+                failed.append(pool.name)
+                continue
+            responses.append((pool.name, entries, truncated))
+        return local_result, responses, failed
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for pool in self._pools:
+            pool.close()
+
+    def _fetch(self, pool, url):
+        status, headers, body = pool.get(url, self._headers)
+        if status != 200:
+            raise PeerError("Unexpected status {}".format(status))
+        entries = json.loads(body.decode("utf-8"))
+        if not isinstance(entries, list):
+            raise PeerError("Unexpected response")
+        return entries, headers.get("X-Log-Truncated") == "true"
@@ -1,10 +1,124 @@
 import heapq
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
 import logging
-from datetime import datetime
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
 
 from nio.util.logging import get_nio_logger
 
+from . import metrics as request_metrics
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as _json_loads
+
+
+# size of blocks read when reading files backwards
+_BLOCK_SIZE = 64 * 1024
+# files smaller than this are not worth parsing in parallel
+_PARALLEL_MIN_SIZE = 64 * 1024 * 1024
+# seconds between checks for cancellation while chunks are parsed
+_CANCEL_CHECK_INTERVAL = 0.1
+# bytes scanned around each sampled file region
+_SAMPLE_WINDOW = 16 * 1024
+# regions probed to estimate number of entries when sampling at a rate
+_SAMPLE_PROBES = 32
+# maximum number of entries in a sample
+_SAMPLE_MAX = 10000
+# bytes at the start of a file used to detect its format
+_SNIFF_SIZE = 512
+# bytes of a row kept, the rest of it is dropped
+_MAX_ROW_SIZE = 64 * 1024
+# continuation rows kept per entry, such as traceback rows
+_MAX_EXTENDED_ROWS = 1000
+# text replacing dropped content
+_TRUNCATED_ROW = "[... {} bytes truncated]\n"
+_TRUNCATED_ROWS = "[... {} rows, {} bytes truncated]\n"
+# fields added to entries folded into groups
+_GROUP_FIELDS = ["count", "first_time", "last_time"]
+
+
+def _parse_time(value):
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ")
+    except ValueError:
+        try:
+            # timestamps using old nio_time format
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+        except ValueError:
+            return None
+
+
+def _decode(row):
+    # undecodable bytes are preserved so that row sizes remain accurate
+    return row.decode("utf-8", "surrogateescape")
+
+
+class _TruncatedRow(str):
+    """ Row text along with the size in file of the row it was cut from
+    """
+    __slots__ = ("size",)
+
+    def __new__(cls, row, size):
+        truncated = super().__new__(
+            cls, _decode(row) + _TRUNCATED_ROW.format(size - len(row)))
+        truncated.size = size
+        return truncated
+
+
+def _cut_row(row, size, max_size):
+    """ Decodes a row, cut to max_size bytes when larger
+
+    Args:
+        row (bytes): row, or its first bytes when already cut
+        size (int): size of whole row in file
+        max_size (int): bytes kept, all if None
+    """
+    if max_size is not None and len(row) > max_size:
+        row = row[:max_size]
+    if len(row) == size:
+        return _decode(row)
+    return _TruncatedRow(row, size)
+
+
+def _read_row(f, max_size):
+    """ Reads next row of a file, keeping at most max_size bytes of it
+
+    Returns:
+        tuple with decoded row, None at end of file, and its size in file
+    """
+    if max_size is None:
+        row = f.readline()
+        return (_decode(row) if row else None), len(row)
+    row = f.readline(max_size)
+    size = len(row)
+    if size == max_size and not row.endswith(b"\n"):
+        # skip rest of row without holding it
+        while True:
+            rest = f.readline(_BLOCK_SIZE)
+            size += len(rest)
+            if not rest or rest.endswith(b"\n"):
+                break
+    if not row:
+        return None, 0
+    return _cut_row(row, size, max_size), size
+
+
+class ReadCancelled(Exception):
+    """ Raised when a read is cancelled before completing
+    """
+    pass
+
 
 class LogEntry(dict):
     """ Provides comparison operators to the dictionary elements
@@ -13,92 +127,255 @@ class LogEntry(dict):
         return self["time"] < other["time"]
 
 
-class _LogEntries(object):
-    def __init__(self):
-        self.logger = get_nio_logger("LogEntries")
+class LogEntryList(list):
+    """ List of entries along with details about how they were read
+
+    Attributes:
+        truncated (bool): True when reading stopped because the read budget
+            ran out
+        resume (dict): file path to byte offset where reading stopped, an
+            offset of 0 means the start of the file was reached
+        estimated_count (int): when entries are a sample, estimated number
+            of entries matching the query
+        failed_instances (list): when entries come from several instances,
+            names of instances that failed to respond
+    """
+    truncated = False
+    resume = None
+    estimated_count = None
+    failed_instances = None
 
-    def read(self, filename, num_entries, level, component):
-        """ Read entries from a nio log file
+
+class EntryCollapser(object):
+    """ Folds identical entries into counted groups
+
+    Entries are expected newest first, as they are read. An entry is
+    identical to another one when their level, component and message match.
+    Groups keep the time of their newest entry, along with 'count',
+    'first_time' and 'last_time' fields, and are provided once they are
+    closed, that is once no older entry can be folded into them.
+    """
+
+    def __init__(self, window=None):
+        """ Create a collapser
 
         Args:
-            filename (str): path to file with log entries
-            num_entries (int): number of entries to read, if -1 read all
-            level (str): filter entries with this level if not None
-            component (str): filter entries with this component if not None
+            window (float): when None, only consecutive identical entries are
+                folded, otherwise identical entries are folded as long as
+                they are within these many seconds of the oldest entry in
+                their group
+        """
+        self._window = window
+        # groups by key, only kept when folding within a window
+        self._groups = {}
+        # groups not closed yet, newest first
+        self._open = deque()
+        self._last = None
+        self._last_time = None
+
+    def fold(self, entry, position=None):
+        """ Folds an entry into its group, or starts a new group with it
+
+        Args:
+            entry (LogEntry): entry read, including its whole message
+            position: value kept along the group, replaced by the one of
+                every entry folded into it
 
         Returns:
-             list of entries where items are in dict format
+            True if entry was folded into an existing group
         """
-        self.logger.debug("Reading {} log file".format(filename))
-
-        entries_read = 0
-        entries = deque()
-        if level:
-            level = logging._nameToLevel[level]
+        key = (entry.get("level"), entry.get("component"), entry.get("msg"))
+        entry_time = entry.get("time")
+        if self._window is None:
+            group = self._last \
+                if self._last is not None and self._last[0] == key else None
         else:
-            # when no level is specified, assume lowest level and above desired,
-            # thus allowing all entries based on level
-            level = logging.DEBUG
+            entry_time = _parse_time(entry_time)
+            group = self._groups.get(key)
+            if group is not None and self._is_expired(group, entry_time):
+                group = None
+        self._last_time = entry_time
 
-        extended = []
-        for row in self._get_file_contents(filename):
-            entry = self._parse_row(row)
-            if entry is None:
-                continue
-            # time == None if not first row of message
-            if entry["time"] is not None:
-                if entry["level"] is not None:
-                    if not self._is_level_allowed(
-                            level, logging._nameToLevel[entry["level"]]):
-                        continue
-                else:
-                    continue
-                # filter by component?
-                if component and entry["component"] != component:
-                    continue
-                # any extended rows buffered belong under this first row
-                entry["msg"] += "".join(reversed(extended))
-                extended = []
-                entries_read += 1
-                entries.appendleft(entry)
-                # number of entries specified?
-                if num_entries != -1 and entries_read == num_entries:
-                    break
-            else:
-                # rows are being read bottom to top, so extended rows are
-                # buffered here until another first row is read
-                extended.append(row)
-        return list(entries)
+        if group is None:
+            entry["count"] = 1
+            entry["first_time"] = entry["last_time"] = entry.get("time")
+            self._last = [key, entry, entry_time, position]
+            if self._window is not None:
+                self._groups[key] = self._last
+            self._open.append(self._last)
+            return False
 
-    def read_all(self, files, num_entries, level, component):
-        """ Reads and merge log entries from given files
+        group[1]["count"] += 1
+        group[1]["first_time"] = entry.get("time")
+        group[2] = entry_time
+        group[3] = position
+        self._last = group
+        return True
 
-        When merging, this method takes advantage of the fact that
-        incoming lists are already sorted.
+    def closed(self, flush=False):
+        """ Yields groups closed, newest first
 
         Args:
-            files (list): list of absolute path to files
-            num_entries (int): number of entries to read, if -1 read all
-            level (str): filter entries with this level if not None
-            component (str): filter entries with this component if not None
+            flush (bool): all groups are closed, such as when no entries
+                are left
+
+        Yields:
+            tuple with group entry and position of its last entry folded
+        """
+        while self._open and (flush or self._is_closed(self._open[0])):
+            group = self._open.popleft()
+            if self._groups.get(group[0]) is group:
+                del self._groups[group[0]]
+            yield group[1], group[3]
+
+    def _is_closed(self, group):
+        if self._window is None:
+            return group is not self._last
+        return self._is_expired(group, self._last_time)
+
+    def _is_expired(self, group, entry_time):
+        """ Finds out if an entry is too old to be folded into a group
+        """
+        return entry_time is not None and group[2] is not None and \
+            (group[2] - entry_time).total_seconds() > self._window
+
+
+class ReadBudget(object):
+    """ Limits on the work a read is allowed to do
+
+    A budget is shared among all files involved in a read and keeps track
+    of the work done so far.
+    """
+
+    def __init__(self, max_bytes=None, max_time=None, max_entries=None):
+        """ Create a budget
+
+        Args:
+            max_bytes (int): bytes allowed to be scanned if not None
+            max_time (float): seconds allowed for reading if not None
+            max_entries (int): entries allowed to be read if not None
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.deadline = \
+            time.monotonic() + max_time if max_time is not None else None
+        self.bytes_read = 0
+        self.entries_read = 0
+
+    def exhausted(self):
+        """ Finds out if any of the limits was reached
+        """
+        return \
+            (self.max_bytes is not None and
+             self.bytes_read >= self.max_bytes) or \
+            (self.max_entries is not None and
+             self.entries_read >= self.max_entries) or \
+            (self.deadline is not None and time.monotonic() >= self.deadline)
+
+
+class _ExtendedRows(object):
+    """ Continuation rows of an entry, bounded in number
+
+    Rows beyond the limit are dropped and only counted, keeping those
+    closest to the first row of the entry. Rows read backwards are added
+    last to first.
+    """
+
+    def __init__(self, limit, backwards=False):
+        """ Create a buffer
+
+        Args:
+            limit (int): rows kept, all if None
+            backwards (bool): rows are added last to first
+        """
+        self._limit = limit
+        self._backwards = backwards
+        self._rows = deque(maxlen=limit) if backwards else []
+        self.dropped_rows = self.dropped_bytes = 0
+        # True when any row kept was cut
+        self.cut = False
+
+    def __bool__(self):
+        return bool(self._rows) or bool(self.dropped_rows)
+
+    def append(self, row):
+        if self._limit is not None and len(self._rows) >= self._limit:
+            self.dropped_rows += 1
+            if not self._backwards:
+                self.dropped_bytes += _LogEntries._get_row_size(row)
+                return
+            # oldest row added is furthest from first row
+            self.dropped_bytes += _LogEntries._get_row_size(self._rows[0])
+        if type(row) is _TruncatedRow:
+            self.cut = True
+        self._rows.append(row)
+
+    def clear(self):
+        self._rows.clear()
+        self.dropped_rows = self.dropped_bytes = 0
+        self.cut = False
+
+    @property
+    def truncated(self):
+        return self.cut or bool(self.dropped_rows)
+
+    def rows(self):
+        """ Provides rows kept in file order, followed by a marker when rows
+        were dropped
+        """
+        rows = list(reversed(self._rows)) if self._backwards \
+            else list(self._rows)
+        if self.dropped_rows:
+            rows.append(_TRUNCATED_ROWS.format(self.dropped_rows,
+                                               self.dropped_bytes))
+        return rows
+
+
+class LogRowParser(object):
+    """ Parses rows of a log file format into entries
+
+    Parsed entries carry 'time', 'level', 'component' and 'msg' fields,
+    rows not starting an entry, such as traceback rows, are parsed into
+    entries with a None time and extend the message of the entry preceding
+    them.
+    """
+    name = None
+
+    def sniff(self, head):
+        """ Finds out if a file is written in this parser format
+
+        Args:
+            head (bytes): first bytes of file
 
         Returns:
-             list of entries where items are in dict format
+            True if file format is recognized
         """
-        entries_read = []
-        for filename in files:
-            try:
-                entries_read.append(
-                    LogEntries.read(filename, num_entries, level, component)
-                )
-            except IOError:
-                self.logger.error("Failed to read {} log file".format(filename))
+        raise NotImplementedError()
 
-        # merge entries
-        result = self._merge_entries(entries_read)
-        return result[-num_entries:] if num_entries else result
+    def parse(self, row):
+        """ Parses a file row
 
-    def _parse_row(self, row):
+        Args:
+            row (str): row including its line ending
+
+        Returns:
+            LogEntry
+        """
+        raise NotImplementedError()
+
+
+class NioRowParser(LogRowParser):
+    """ Parses rows in nio text format, '[time] NIO [LEVEL] [component] msg'
+    """
+    name = "nio"
+
+    def __init__(self):
+        self.logger = get_nio_logger("LogEntries")
+
+    def sniff(self, head):
+        return head.startswith(b"[")
+
+    def parse(self, row):
         continued = False
         closing_bracket1 = row.find("]")
         if closing_bracket1 == -1:
@@ -156,10 +433,1382 @@ class _LogEntries(object):
                 "msg": msg
             })
 
+
+class JsonRowParser(LogRowParser):
+    """ Parses rows holding one JSON record each
+
+    Entry fields are taken from the usual record keys, i.e. 'time' or
+    'timestamp', 'level' or 'levelname', 'component' or 'name', and 'msg' or
+    'message', any other record key is kept as an entry field.
+    """
+    name = "json"
+
+    _TIME_KEYS = ("time", "timestamp", "@timestamp", "asctime", "created")
+    _LEVEL_KEYS = ("level", "levelname", "severity")
+    _COMPONENT_KEYS = ("component", "name", "logger")
+    _MSG_KEYS = ("msg", "message")
+    # complete string or number values of a record, and a string value cut
+    # before its closing quote
+    _FIELD = re.compile(
+        r'"([^"\\]+)"\s*:\s*("(?:[^"\\]|\\.)*"|-?[0-9][0-9.eE+-]*)')
+    _OPEN_STRING = re.compile(r'"(?:msg|message)"\s*:\s*"')
+
+    def sniff(self, head):
+        return head.lstrip().startswith(b"{")
+
+    def parse(self, row):
+        if type(row) is _TruncatedRow:
+            record = self._parse_truncated(row)
+        else:
+            try:
+                record = _json_loads(row)
+            except ValueError:
+                record = None
+        if not isinstance(record, dict):
+            # row written outside of a record, such as a traceback row
+            return LogEntry(time=None, level=None, component=None, msg=row)
+
+        entry = LogEntry(record)
+        time_value = self._pop(entry, self._TIME_KEYS)
+        level = self._pop(entry, self._LEVEL_KEYS)
+        component = self._pop(entry, self._COMPONENT_KEYS)
+        msg = self._pop(entry, self._MSG_KEYS)
+
+        entry["time"] = self._format_time(time_value)
+        if entry["time"] is None:
+            # record cannot be placed in time, keep it along previous entry
+            return LogEntry(time=None, level=None, component=None, msg=row)
+        level = str(level).upper() if level is not None else None
+        entry["level"] = level if level in logging._nameToLevel else None
+        entry["component"] = str(component) if component is not None \
+            else None
+        # messages end with a line ending, just like text format ones
+        entry["msg"] = (msg if isinstance(msg, str) else
+                        "" if msg is None else str(msg)) + "\n"
+        return entry
+
+    def _parse_truncated(self, row):
+        """ Pulls record fields out of the first bytes of a cut record
+
+        Values complete within the bytes kept are taken, first occurrence
+        of a key wins, a message cut before its end is kept up to the cut
+        followed by the truncation marker.
+
+        Returns:
+            dict with record fields, None if row is not a record
+        """
+        cut = row.rfind("[... ")
+        text, marker = row[:cut], row[cut:]
+        if not text.lstrip().startswith("{"):
+            return None
+        record = {}
+        for match in self._FIELD.finditer(text):
+            if match.group(1) in record:
+                continue
+            try:
+                record[match.group(1)] = _json_loads(match.group(2))
+            except ValueError:
+                continue
+        msg = self._pop(record, self._MSG_KEYS)
+        if msg is None:
+            opening = self._OPEN_STRING.search(text)
+            msg = self._decode_partial(text[opening.end():]) \
+                if opening is not None else ""
+        # marker ends with the line ending messages get
+        record["msg"] = "{}{}".format(msg, marker[:-1])
+        return record
+
+    @staticmethod
+    def _decode_partial(value):
+        """ Decodes a JSON string cut before its closing quote
+        """
+        # a cut escape sequence takes up to 6 characters, i.e. \uXXXX
+        for end in range(len(value), max(len(value) - 6, -1), -1):
+            try:
+                return _json_loads('"' + value[:end] + '"')
+            except ValueError:
+                continue
+        return value
+
     @staticmethod
-    def _get_file_contents(filename):
-        with open(filename, "r") as f:
-            return reversed(f.readlines())
+    def _pop(record, keys):
+        value = None
+        for key in keys:
+            if key in record:
+                found = record.pop(key)
+                if value is None:
+                    value = found
+        return value
+
+    @staticmethod
+    def _format_time(value):
+        """ Converts a record time into nio time format
+        """
+        if isinstance(value, str):
+            if _parse_time(value) is not None:
+                return value
+            try:
+                moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                moment = datetime.fromtimestamp(
+                    value, timezone.utc).replace(tzinfo=None)
+            except (OverflowError, OSError, ValueError):
+                return None
+        else:
+            return None
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+_default_parser = NioRowParser()
+# parsers sniffed in order, the first one recognizing a file format is used
+_parsers = [JsonRowParser(), _default_parser]
+
+
+def register_parser(parser):
+    """ Registers a log row parser
+
+    Parsers registered are sniffed before built-in ones.
+
+    Args:
+        parser (LogRowParser): parser to register
+    """
+    _parsers.insert(0, parser)
+
+
+def detect_parser(head):
+    """ Finds out parser for a file from its first bytes
+
+    Args:
+        head (bytes): first bytes of file
+
+    Returns:
+        LogRowParser recognizing file format, nio text format parser if
+            none does
+    """
+    for parser in _parsers:
+        if parser.sniff(head):
+            return parser
+    return _default_parser
+
+
+def _item_time(item):
+    return item[0]["time"]
+
+
+class EntryStream(object):
+    """ Entries read lazily from log files, merged by time
+
+    Rows are read and parsed as entries are consumed, keeping memory bounded
+    by a block per file. Files stay open until the stream is exhausted or
+    closed, streams can be used as context managers.
+
+    Attributes:
+        positions (dict): file path to byte offset reading resumes from
+            right after entries consumed so far, when reading newest first
+            an offset of 0 means the start of the file was reached, when
+            reading first to last the last entry of a file is read again
+            until a later entry shows no more rows can be added to it
+        truncated (bool): True when reading stopped because the read budget
+            ran out
+    """
+
+    def __init__(self, reader, files, level, component, newest_first,
+                 filters, positions, cancel, budget, fields, msg_max_len,
+                 collapse, collapse_window, follow=False, follow_delay=None):
+        self._reader = reader
+        # when no level is specified, assume lowest level and above desired,
+        # thus allowing all entries based on level
+        self._level = logging._nameToLevel[level] if level \
+            else logging.DEBUG
+        self._component = component
+        self._newest_first = newest_first
+        self._filters = filters
+        self._cancel = cancel
+        self._budget = budget
+        self._fields = fields
+        self._msg_max_len = msg_max_len
+        self._collapser = \
+            EntryCollapser(collapse_window) if collapse else None
+        self._follow = follow
+        self._follow_delay = follow_delay
+        # time is needed to merge entries even when it is not requested
+        self._read_fields = fields
+        if fields is not None and "time" not in fields and len(files) > 1:
+            self._read_fields = list(fields) + ["time"]
+        self.positions = dict(positions or {})
+        self.truncated = False
+
+        self._metrics = request_metrics.current()
+        self._rows_parsed = self._rows_filtered = 0
+        self._parse_time = 0.0
+        self._closed = False
+        self._entries = self._merge(files)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        metrics = self._metrics
+        if metrics is not None:
+            started = time.perf_counter()
+            read_time = metrics.phases["read"]
+        entry = next(self._entries, None)
+        if metrics is not None:
+            # time spent parsing is what is left after reading rows
+            self._parse_time += time.perf_counter() - started - \
+                (metrics.phases["read"] - read_time)
+        if entry is None:
+            self.close()
+            raise StopIteration
+        return entry
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """ Stops reading, releasing files open
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._entries.close()
+        if self._metrics is not None:
+            self._metrics.add(rows_parsed=self._rows_parsed,
+                              rows_filtered=self._rows_filtered)
+            self._metrics.add_time("parse", self._parse_time)
+
+    def _merge(self, files):
+        read = self._read_backward if self._newest_first \
+            else self._read_forward
+        readers = [read(filename) for filename in files]
+        merged = readers[0] if len(readers) == 1 else heapq.merge(
+            *readers, key=_item_time, reverse=self._newest_first)
+        for entry, filename, position in merged:
+            if self.truncated:
+                # entries of other files were read ahead, they are read
+                # again when resuming
+                break
+            self.positions[filename] = position
+            if self._collapser is not None:
+                self._collapser.fold(entry, dict(self.positions))
+                for group, positions in self._collapser.closed():
+                    # reading resumes after the last entry in group
+                    self.positions = positions
+                    yield self._emit_group(group)
+                continue
+            if self._budget is not None:
+                self._budget.entries_read += 1
+            if self._read_fields is not self._fields:
+                entry = self._reader._project(entry, self._fields)
+            yield entry
+        if self._collapser is not None:
+            positions = self.positions
+            groups = list(self._collapser.closed(flush=True))
+            for index, (group, group_positions) in enumerate(groups):
+                self.positions = positions \
+                    if index == len(groups) - 1 else group_positions
+                yield self._emit_group(group)
+
+    def _emit_group(self, group):
+        """ Limits fields and message length of a closed group
+        """
+        if self._budget is not None:
+            self._budget.entries_read += 1
+        fields = self._fields
+        if fields is not None:
+            fields = list(fields) + _GROUP_FIELDS
+        return self._reader._complete_entry(group, (), fields,
+                                            self._msg_max_len)
+
+    def _read_backward(self, filename):
+        """ Yields entries of a file along with offset of their first row
+        """
+        reader = self._reader
+        parser = reader._get_parser(filename)
+        end = self.positions.get(filename)
+        if end is None:
+            end = reader._get_file_size(filename)
+        # offset of the row being read, and offset of last row after which
+        # no extended rows are pending, reading can resume from there
+        position = resume = end
+        extended = _ExtendedRows(reader.max_extended_rows, backwards=True)
+        for row in reader._get_file_contents(filename, end,
+                                             reader.max_row_size):
+            if not self._keep_reading(filename):
+                break
+            size = reader._get_row_size(row)
+            position -= size
+            if self._budget is not None:
+                self._budget.bytes_read += size
+            entry = parser.parse(row)
+            self._rows_parsed += 1
+            # time == None if not first row of message
+            if entry["time"] is None:
+                # rows are being read bottom to top, so extended rows are
+                # buffered here until another first row is read
+                extended.append(row)
+                continue
+            # any extended rows buffered belong under this first row
+            if self._is_allowed(entry):
+                if extended.truncated or type(row) is _TruncatedRow:
+                    reader._mark_truncated(entry, filename, position, resume)
+                entry = self._complete(entry, extended.rows())
+            else:
+                entry = None
+            extended.clear()
+            resume = position
+            if entry is not None:
+                yield entry, filename, position
+        self.positions[filename] = resume
+
+    def _read_forward(self, filename):
+        """ Yields entries of a file along with offset following them
+
+        Rows are read up to the last newline, a row without one is still
+        being written.
+        """
+        reader = self._reader
+        parser = reader._get_parser(filename)
+        start = self.positions.get(filename, 0)
+        end = reader._get_rows_end(filename, start,
+                                   reader._get_file_size(filename))
+        # offset of the row being read, and offset of first row of entry
+        # being read, reading can resume from there
+        position = resume = start
+        # entry being read, None when it was filtered out
+        current = None
+        extended = _ExtendedRows(reader.max_extended_rows)
+        for row in reader._get_file_range(filename, start, end,
+                                          reader.max_row_size):
+            if not self._keep_reading(filename):
+                break
+            size = reader._get_row_size(row)
+            if self._budget is not None:
+                self._budget.bytes_read += size
+            entry = parser.parse(row)
+            self._rows_parsed += 1
+            if entry["time"] is None:
+                if current is not None:
+                    extended.append(row)
+                position += size
+                continue
+            if current is not None:
+                current = self._complete_forward(current, extended, filename,
+                                                 resume, position)
+                if current is not None:
+                    yield current, filename, position
+            current = entry if self._is_allowed(entry) else None
+            extended.clear()
+            if type(row) is _TruncatedRow:
+                # first row was cut
+                extended.cut = True
+            resume = position
+            position += size
+        else:
+            if current is None:
+                # entry filtered out, rows added to it do not matter
+                resume = position
+            elif not self._follow or self._is_settled(filename):
+                if self._follow:
+                    # no rows were added for a while, entry is complete
+                    resume = position
+                # otherwise rows may still be added to last entry, it is read
+                # again when resuming
+                current = self._complete_forward(current, extended, filename,
+                                                 resume, position)
+                if current is not None:
+                    yield current, filename, resume
+        self.positions[filename] = resume
+
+    def _is_settled(self, filename):
+        """ Finds out if a file was not written to for the follow delay
+        """
+        if self._follow_delay is None:
+            return False
+        try:
+            modified = os.path.getmtime(filename)
+        except OSError:
+            return False
+        return time.time() - modified >= self._follow_delay
+
+    def _complete_forward(self, entry, extended, filename, start, end):
+        if extended.truncated:
+            self._reader._mark_truncated(entry, filename, start, end)
+        return self._complete(entry, extended.rows())
+
+    def _keep_reading(self, filename):
+        if self._cancel is not None and self._cancel.is_set():
+            raise ReadCancelled(
+                "Reading {} log file was cancelled".format(filename))
+        if self._budget is not None and self._budget.exhausted():
+            self.truncated = True
+            return False
+        return True
+
+    def _is_allowed(self, entry):
+        if self._reader._is_entry_allowed(entry, self._level,
+                                          self._component):
+            return True
+        self._rows_filtered += 1
+        return False
+
+    def _complete(self, entry, extended):
+        """ Completes an entry, None when filters leave it out
+        """
+        reader = self._reader
+        if self._filters:
+            # filters are given whole messages
+            entry = reader._complete_entry(entry, extended, None, None)
+            if not all(keep(entry) for keep in self._filters):
+                self._rows_filtered += 1
+                return None
+            extended = ()
+        if self._collapser is not None:
+            # identical entries are told apart by their whole message, they
+            # are limited once folded into groups
+            return reader._complete_entry(entry, extended, None, None)
+        return reader._complete_entry(entry, extended, self._read_fields,
+                                      self._msg_max_len)
+
+
+class _LogEntries(object):
+    def __init__(self):
+        self.logger = get_nio_logger("LogEntries")
+        # bounds on memory held per entry, None means no bound, entries
+        # exceeding them are cut and carry a 'truncated' field telling
+        # where they are found in their file
+        self.max_row_size = _MAX_ROW_SIZE
+        self.max_extended_rows = _MAX_EXTENDED_ROWS
+        # processes parsing chunks of large files, kept between reads
+        self._process_pool = None
+        self._process_pool_workers = None
+        self._process_pool_lock = threading.Lock()
+
+    def read(self, filename, num_entries, level, component, cancel=None,
+             budget=None, end=None, workers=None, fields=None,
+             msg_max_len=None, collapse=False, collapse_window=None):
+        """ Read entries from a nio log file
+
+        Args:
+            filename (str): path to file with log entries
+            num_entries (int): number of entries to read, if -1 read all
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            cancel (threading.Event): when set, reading is abandoned
+            budget (ReadBudget): limits reading when not None, in which case
+                result carries truncation and resume details
+            end (int): byte offset to read backwards from, file end if None
+            workers (int): when all entries of a large file are requested,
+                file is split into chunks parsed by this many processes
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None, extended
+                rows are only joined up to this length
+            collapse (bool): fold identical entries into counted groups as
+                they are read, each group counts as one entry read
+            collapse_window (float): when collapsing, fold identical entries
+                within these many seconds instead of consecutive ones only
+
+        Returns:
+             LogEntryList of entries where items are in dict format
+
+        Raises:
+            ReadCancelled: if cancel event is set while reading
+        """
+        self.logger.debug("Reading {} log file".format(filename))
+
+        if workers and workers > 1 and num_entries == -1 and \
+                budget is None and end is None and not collapse and \
+                self._get_file_size(filename) >= _PARALLEL_MIN_SIZE:
+            return self.read_parallel(filename, level, component, workers,
+                                      fields, msg_max_len, cancel)
+
+        stream = self.iter_entries(
+            [filename], level, component, cancel=cancel, budget=budget,
+            positions={filename: end} if end is not None else None,
+            fields=fields, msg_max_len=msg_max_len, collapse=collapse,
+            collapse_window=collapse_window)
+        entries = deque()
+        with stream:
+            for entry in stream:
+                entries.appendleft(entry)
+                # number of entries specified?
+                if len(entries) == num_entries:
+                    break
+        result = LogEntryList(entries)
+        if budget is not None:
+            result.truncated = stream.truncated
+            result.resume = dict(stream.positions)
+        return result
+
+    def read_all(self, files, num_entries, level, component, cancel=None,
+                 budget=None, ends=None, workers=None, fields=None,
+                 msg_max_len=None, collapse=False, collapse_window=None):
+        """ Reads and merge log entries from given files
+
+        When merging, this method takes advantage of the fact that
+        incoming lists are already sorted.
+
+        Args:
+            files (list): list of absolute path to files
+            num_entries (int): number of entries to read, if -1 read all
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            cancel (threading.Event): when set, reading is abandoned
+            budget (ReadBudget): limits reading among all files when not
+                None, in which case result carries truncation and resume
+                details
+            ends (dict): file path to byte offset to read backwards from,
+                files not included are read from their end
+            workers (int): processes parsing chunks of large files when all
+                entries are requested
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+            collapse (bool): fold identical entries of each file into
+                counted groups
+            collapse_window (float): when collapsing, fold identical entries
+                within these many seconds instead of consecutive ones only
+
+        Returns:
+             LogEntryList of entries where items are in dict format
+
+        Raises:
+            ReadCancelled: if cancel event is set while reading
+        """
+        # time is needed to merge entries even when it is not requested
+        read_fields = fields
+        if fields is not None and "time" not in fields:
+            read_fields = list(fields) + ["time"]
+
+        entries_read = []
+        truncated = False
+        resume = {}
+        for filename in files:
+            try:
+                entries = LogEntries.read(
+                    filename, num_entries, level, component, cancel=cancel,
+                    budget=budget, end=(ends or {}).get(filename),
+                    workers=workers, fields=read_fields,
+                    msg_max_len=msg_max_len, collapse=collapse,
+                    collapse_window=collapse_window)
+            except IOError:
+                self.logger.error("Failed to read {} log file".format(filename))
+                continue
+            entries_read.append(entries)
+            if getattr(entries, "truncated", False):
+                truncated = True
+            if getattr(entries, "resume", None):
+                resume.update(entries.resume)
+
+        # merge entries
+        metrics = request_metrics.current()
+        if metrics is not None:
+            started = time.perf_counter()
+        result = LogEntryList(self._merge_entries(entries_read))
+        if metrics is not None:
+            metrics.add_time("merge", time.perf_counter() - started)
+        if budget is not None:
+            result.truncated = truncated
+            result.resume = resume
+        # when truncated, all entries read are kept so that no entries are
+        # skipped when resuming, budget keeps their number bounded
+        if num_entries and num_entries != -1 and not truncated:
+            result[:] = result[-num_entries:]
+        if read_fields is not fields:
+            if collapse:
+                fields = list(fields) + _GROUP_FIELDS
+            result[:] = [self._project(entry, fields) for entry in result]
+        return result
+
+    def sample(self, filename, sample, level, component, fields=None,
+               msg_max_len=None):
+        """ Reads a sample of entries evenly spread over a nio log file
+
+        Instead of scanning the whole file, evenly spaced regions are read
+        by seeking to them, one entry is taken from each region, and the
+        density of matching entries found in regions is used to estimate
+        their total.
+
+        Args:
+            filename (str): path to file with log entries
+            sample (int or float): number of entries to sample, or when
+                lower than 1, rate of entries to sample
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+
+        Returns:
+             LogEntryList of sampled entries, sorted oldest first, with
+             estimated count of entries matching the query
+        """
+        size = self._get_file_size(filename)
+        if level:
+            level_number = logging._nameToLevel[level]
+        else:
+            level_number = logging.DEBUG
+
+        probed_count = None
+        if sample < 1:
+            # find out how many entries there are to apply rate
+            _, probed_count = self._sample_regions(
+                filename, size, _SAMPLE_PROBES, level_number, component,
+                fields, msg_max_len)
+            sample = math.ceil(sample * probed_count)
+        sample = min(int(sample), _SAMPLE_MAX)
+        if sample <= 0:
+            entries = LogEntryList()
+            entries.estimated_count = probed_count or 0
+            return entries
+
+        if size <= sample * _SAMPLE_WINDOW:
+            # regions would cover the whole file, read it all instead
+            entries = self.read(filename, -1, level, component,
+                                fields=fields, msg_max_len=msg_max_len)
+            estimated_count = len(entries)
+            if len(entries) > sample:
+                entries = [entries[i * len(entries) // sample]
+                           for i in range(sample)]
+        else:
+            entries, estimated_count = self._sample_regions(
+                filename, size, sample, level_number, component, fields,
+                msg_max_len)
+            if probed_count is not None and sample < _SAMPLE_PROBES:
+                # probing scanned more regions, its estimation is better
+                estimated_count = probed_count
+
+        result = LogEntryList(entries)
+        result.estimated_count = estimated_count
+        return result
+
+    def sample_all(self, files, sample, level, component, fields=None,
+                   msg_max_len=None):
+        """ Samples entries from given files and merges them
+
+        When sampling a number of entries, it is split among files based on
+        their size.
+
+        Args:
+            files (list): list of absolute path to files
+            sample (int or float): number of entries to sample, or when
+                lower than 1, rate of entries to sample
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+
+        Returns:
+             LogEntryList of sampled entries, sorted oldest first, with
+             estimated count of entries matching the query
+        """
+        # time is needed to merge entries even when it is not requested
+        read_fields = fields
+        if fields is not None and "time" not in fields:
+            read_fields = list(fields) + ["time"]
+
+        sizes = {}
+        for filename in files:
+            try:
+                sizes[filename] = self._get_file_size(filename)
+            except OSError:
+                self.logger.error("Failed to read {} log file".format(filename))
+        total_size = sum(sizes.values())
+
+        entries_read = []
+        estimated_count = 0
+        for filename, size in sizes.items():
+            if not size:
+                continue
+            file_sample = sample
+            if sample >= 1:
+                file_sample = math.ceil(sample * size / total_size)
+            try:
+                entries = self.sample(filename, file_sample, level, component,
+                                      read_fields, msg_max_len)
+            except IOError:
+                self.logger.error("Failed to read {} log file".format(filename))
+                continue
+            entries_read.append(entries)
+            estimated_count += entries.estimated_count
+
+        result = LogEntryList(self._merge_entries(entries_read))
+        if read_fields is not fields:
+            result[:] = [self._project(entry, fields) for entry in result]
+        result.estimated_count = estimated_count
+        return result
+
+    def _sample_regions(self, filename, size, regions, level, component,
+                        fields, msg_max_len):
+        """ Samples an entry from each of evenly spaced file regions
+
+        Args:
+            level (int): level number to filter entries with
+
+        Returns:
+            tuple with list of entries sampled and estimated count of entries
+            matching the query
+        """
+        entries = []
+        matched = 0
+        scanned = 0
+        metrics = request_metrics.current()
+        started = time.perf_counter()
+        with open(filename, "rb") as f:
+            head = f.read(_SNIFF_SIZE)
+            read_time = time.perf_counter() - started
+            parser = detect_parser(head)
+            for region in range(regions):
+                start = size * region // regions
+                entry, region_matched, region_scanned, region_read_time = \
+                    self._sample_region(f, parser, start, level, component,
+                                        fields, msg_max_len)
+                if entry is not None:
+                    entries.append(entry)
+                matched += region_matched
+                scanned += region_scanned
+                read_time += region_read_time
+        if metrics is not None:
+            metrics.add(files_opened=1, bytes_read=len(head) + scanned)
+            metrics.add_time("read", read_time)
+            metrics.add_time("parse",
+                             time.perf_counter() - started - read_time)
+        estimated_count = round(matched * size / scanned) if scanned else 0
+        return entries, estimated_count
+
+    def _sample_region(self, f, parser, start, level, component, fields,
+                       msg_max_len):
+        """ Reads first matching entry in a file region
+
+        Returns:
+            tuple with entry (None if there was no matching entry in region),
+            number of matching entries in region, bytes scanned in region
+            and seconds spent reading
+        """
+        read_time = 0.0
+
+        def read_row():
+            nonlocal read_time
+            started = time.perf_counter()
+            row = _read_row(f, self.max_row_size)
+            read_time += time.perf_counter() - started
+            return row
+
+        started = time.perf_counter()
+        f.seek(start)
+        if start:
+            # move to start of next row
+            _read_row(f, 0)
+        read_time += time.perf_counter() - started
+        position = region_start = f.tell()
+        region_end = start + _SAMPLE_WINDOW
+
+        sampled = None
+        extended = _ExtendedRows(self.max_extended_rows)
+        matched = 0
+        while True:
+            row, size = read_row()
+            if row is None:
+                sampled_end = position
+                break
+            in_region = position < region_end
+            position += size
+            entry = parser.parse(row)
+            if entry["time"] is None:
+                if sampled is not None:
+                    extended.append(row)
+                continue
+            allowed = in_region and \
+                self._is_entry_allowed(entry, level, component)
+            if allowed:
+                matched += 1
+            if sampled is not None or not in_region:
+                # sampled entry is complete, or region holds no entries
+                sampled_end = position - size
+                break
+            if allowed:
+                sampled = entry
+                sampled_start = position - size
+                extended.cut = type(row) is _TruncatedRow
+        # keep counting matching entries within the region for estimation
+        while position < region_end:
+            row, size = read_row()
+            if row is None:
+                break
+            position += size
+            entry = parser.parse(row)
+            if entry["time"] is not None and \
+                    self._is_entry_allowed(entry, level, component):
+                matched += 1
+
+        if sampled is not None:
+            if extended.truncated:
+                self._mark_truncated(sampled, f.name, sampled_start,
+                                     sampled_end)
+            sampled = self._complete_entry(sampled, extended.rows(), fields,
+                                           msg_max_len)
+        return sampled, matched, \
+            max(0, min(position, region_end) - region_start), read_time
+
+    def read_parallel(self, filename, level, component, workers,
+                      fields=None, msg_max_len=None, cancel=None):
+        """ Reads all entries from a nio log file parsing chunks in parallel
+
+        File is split into byte ranges starting at row boundaries, each range
+        is parsed by a separate process, and resulting chunks are stitched
+        back together, extended rows at the start of a chunk belong to the
+        last entry of the previous one.
+
+        Args:
+            filename (str): path to file with log entries
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            workers (int): number of processes parsing chunks
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+            cancel (threading.Event): when set, chunks not parsed yet are
+                dropped and reading is abandoned
+
+        Returns:
+             LogEntryList of entries where items are in dict format
+
+        Raises:
+            ReadCancelled: if cancel event is set while reading
+        """
+        boundaries = self._get_chunk_boundaries(
+            filename, self._get_file_size(filename), workers * 4)
+        ranges = list(zip(boundaries[:-1], boundaries[1:]))
+        self.logger.debug("Reading {} log file in {} chunks".format(
+            filename, len(ranges)))
+
+        metrics = request_metrics.current()
+        if metrics is not None:
+            # chunks are parsed in other processes, only totals are known
+            started = time.perf_counter()
+            metrics.add(files_opened=1, bytes_read=boundaries[-1])
+
+        entries = LogEntryList()
+        # entry extended rows are appended to, None when last entry read was
+        # filtered out
+        last_entry = None
+        # worker processes do not share parsers registered or bounds set in
+        # this one, they are passed along
+        parser = self._get_parser(filename)
+        executor = self._get_process_pool(workers)
+        futures = [executor.submit(_parse_chunk, filename, start, end, level,
+                                   component, fields, msg_max_len, parser,
+                                   self.max_row_size, self.max_extended_rows)
+                   for start, end in ranges]
+        try:
+            for future in futures:
+                leading, chunk_entries, has_first_row, open_ended = \
+                    self._get_chunk(future, cancel, filename)
+                if leading and last_entry is not None and \
+                        "msg" in last_entry:
+                    last_entry["msg"] = self._extend_msg(
+                        last_entry["msg"], [leading], msg_max_len)
+                if has_first_row:
+                    entries.extend(chunk_entries)
+                    last_entry = chunk_entries[-1] if open_ended else None
+        except BrokenProcessPool:
+            # a worker process died, pool is replaced on next read
+            with self._process_pool_lock:
+                if self._process_pool is executor:
+                    self._process_pool = None
+            raise
+        finally:
+            # chunks not started yet are dropped when reading stopped early
+            for future in futures:
+                future.cancel()
+        if metrics is not None:
+            metrics.add_time("parse", time.perf_counter() - started)
+        return entries
+
+    def close(self):
+        """ Shuts down processes parsing chunks of large files
+        """
+        with self._process_pool_lock:
+            executor = self._process_pool
+            self._process_pool = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_process_pool(self, workers):
+        """ Provides processes parsing chunks, replaced when their number
+        changes
+
+        Processes are started from a clean server process, or spawned where
+        it is not available, rather than forked from this multithreaded one.
+        """
+        with self._process_pool_lock:
+            if self._process_pool is not None and \
+                    self._process_pool_workers == workers:
+                return self._process_pool
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+            method = "forkserver" if "forkserver" in \
+                multiprocessing.get_all_start_methods() else "spawn"
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(method))
+            self._process_pool_workers = workers
+            return self._process_pool
+
+    @staticmethod
+    def _get_chunk(future, cancel, filename):
+        """ Waits for a chunk to be parsed, checking for cancellation
+        """
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise ReadCancelled(
+                    "Reading {} log file was cancelled".format(filename))
+            try:
+                return future.result(
+                    _CANCEL_CHECK_INTERVAL if cancel is not None else None)
+            except TimeoutError:
+                continue
+
+    def parse_range(self, filename, start, end, level, component,
+                    fields=None, msg_max_len=None, parser=None):
+        """ Parses entries from a byte range of a nio log file, first to last
+
+        Args:
+            filename (str): path to file with log entries
+            start (int): byte offset of a row start
+            end (int): byte offset where range ends
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+            parser (LogRowParser): parser of file rows, sniffed if None
+
+        Returns:
+            tuple with extended rows found before the first row of an entry,
+            list of entries, whether any first row was found, and whether
+            the last entry is still open to extended rows in a next range
+        """
+        if level:
+            level = logging._nameToLevel[level]
+        else:
+            level = logging.DEBUG
+
+        leading = _ExtendedRows(self.max_extended_rows)
+        entries = []
+        # entry being read, None when last entry read was filtered out, and
+        # offsets of its first row and of the row being read
+        current = None
+        current_start = position = start
+        extended = _ExtendedRows(self.max_extended_rows)
+        has_first_row = False
+        if parser is None:
+            parser = self._get_parser(filename)
+        for row in self._get_file_range(filename, start, end,
+                                         self.max_row_size):
+            size = self._get_row_size(row)
+            entry = parser.parse(row)
+            if entry["time"] is None:
+                if not has_first_row:
+                    leading.append(row)
+                elif current is not None:
+                    extended.append(row)
+                position += size
+                continue
+            if current is not None:
+                entries.append(self._complete_range_entry(
+                    current, extended, filename, current_start, position,
+                    fields, msg_max_len))
+            has_first_row = True
+            current = entry \
+                if self._is_entry_allowed(entry, level, component) else None
+            extended.clear()
+            extended.cut = type(row) is _TruncatedRow
+            current_start = position
+            position += size
+        if current is not None:
+            entries.append(self._complete_range_entry(
+                current, extended, filename, current_start, position,
+                fields, msg_max_len))
+        return "".join(leading.rows()), entries, has_first_row, \
+            current is not None
+
+    def _complete_range_entry(self, entry, extended, filename, start, end,
+                              fields, msg_max_len):
+        if extended.truncated:
+            self._mark_truncated(entry, filename, start, end)
+        return self._complete_entry(entry, extended.rows(), fields,
+                                    msg_max_len)
+
+    def iter_forward(self, filename, level, component, fields=None,
+                     msg_max_len=None):
+        """ Yields entries from a nio log file, first to last
+
+        Args:
+            filename (str): path to file with log entries
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+        """
+        return self.iter_entries([filename], level, component,
+                                 newest_first=False, fields=fields,
+                                 msg_max_len=msg_max_len)
+
+    def iter_entries(self, files, level=None, component=None,
+                     newest_first=True, filters=None, positions=None,
+                     cancel=None, budget=None, fields=None, msg_max_len=None,
+                     collapse=False, collapse_window=None, follow=False,
+                     follow_delay=None):
+        """ Streams entries from log files lazily, merged by time
+
+        Entries are read as they are consumed, so that memory does not
+        depend on the size of the files, and consumers may stop at any
+        point. Positions of a stream can be passed to a later one to resume
+        right after the entries consumed.
+
+        Args:
+            files (list): list of absolute path to files
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            newest_first (bool): yield entries last to first, reading files
+                backwards, otherwise first to last
+            filters (list): callables taking a complete entry, including its
+                whole message, and returning whether to keep it
+            positions (dict): file path to byte offset to resume reading
+                from, as provided by a previous stream, files not included
+                are read from their end, or start when reading first to last
+            cancel (threading.Event): when set, reading is abandoned
+            budget (ReadBudget): limits reading among all files when not None
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+            collapse (bool): fold identical entries into counted groups, only
+                when reading newest first, groups are yielded once no older
+                entry can be folded into them
+            collapse_window (float): when collapsing, fold identical entries
+                within these many seconds instead of consecutive ones only
+            follow (bool): when reading first to last, files are expected
+                to keep growing, the last entry of a file is only yielded
+                once a later entry shows it is complete, so that resuming
+                does not yield it again
+            follow_delay (float): when following, the last entry of a file
+                not written to for these many seconds is taken as complete,
+                yielded, and reading resumes after it
+
+        Returns:
+            EntryStream yielding entries
+
+        Raises:
+            ValueError: if collapsing entries read first to last
+        """
+        if collapse and not newest_first:
+            raise ValueError(
+                "Entries can only be collapsed when read newest first")
+        return EntryStream(self, files, level, component, newest_first,
+                           filters, positions, cancel, budget, fields,
+                           msg_max_len, collapse, collapse_window, follow,
+                           follow_delay)
+
+    def collapse(self, entries, window=None):
+        """ Folds identical entries already read into counted groups
+
+        Args:
+            entries (list): entries sorted oldest first
+            window (float): see EntryCollapser
+
+        Returns:
+            list of entries and groups sorted oldest first
+        """
+        collapser = EntryCollapser(window)
+        groups = []
+        for entry in reversed(entries):
+            collapser.fold(LogEntry(entry))
+            groups.extend(group for group, _ in collapser.closed())
+        groups.extend(group for group, _ in collapser.closed(flush=True))
+        groups.reverse()
+        return groups
+
+    def project(self, entries, fields=None, msg_max_len=None):
+        """ Limits fields and message length of entries already read
+
+        Group fields of collapsed entries are kept.
+
+        Args:
+            entries (list): entries to project
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+
+        Returns:
+            list of projected entries
+        """
+        if fields is None and msg_max_len is None:
+            return entries
+        if fields is not None:
+            fields = list(fields) + _GROUP_FIELDS
+        return [self._complete_entry(LogEntry(entry), (), fields, msg_max_len)
+                for entry in entries]
+
+    def read_range(self, filename, offset, size):
+        """ Reads raw text of a byte range of a log file
+
+        Meant to fetch whole entries that were truncated when read.
+
+        Args:
+            filename (str): path to log file
+            offset (int): byte offset range starts at
+            size (int): range size in bytes
+
+        Returns:
+            range text, shorter than size when file ends before range does
+        """
+        metrics = request_metrics.current()
+        if metrics is not None:
+            started = time.perf_counter()
+        with open(filename, "rb") as f:
+            f.seek(offset)
+            data = f.read(size)
+        if metrics is not None:
+            metrics.add(files_opened=1, bytes_read=len(data))
+            metrics.add_time("read", time.perf_counter() - started)
+        return _decode(data)
+
+    @staticmethod
+    def _mark_truncated(entry, filename, start, end):
+        """ Records where a truncated entry lies in its file
+        """
+        entry["truncated"] = {
+            "file": os.path.basename(filename),
+            "offset": start,
+            "size": end - start
+        }
+
+    def _complete_entry(self, entry, extended, fields, msg_max_len):
+        """ Appends extended rows to entry message and keeps fields requested
+
+        Args:
+            entry (LogEntry): entry parsed from its first row
+            extended (iterable): extended rows in file order
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+        """
+        if fields is None or "msg" in fields:
+            entry["msg"] = self._extend_msg(entry["msg"], extended,
+                                            msg_max_len)
+        if fields is not None:
+            entry = self._project(entry, fields)
+        return entry
+
+    @staticmethod
+    def _extend_msg(msg, extended, msg_max_len):
+        if msg_max_len is None:
+            return msg + "".join(extended)
+        for row in extended:
+            if len(msg) >= msg_max_len:
+                break
+            msg += row
+        return msg[:msg_max_len]
+
+    @staticmethod
+    def _project(entry, fields):
+        return LogEntry((field, entry[field])
+                        for field in fields if field in entry)
+
+    def _is_entry_allowed(self, entry, level, component):
+        if entry["level"] is None:
+            return False
+        if not self._is_level_allowed(
+                level, logging._nameToLevel[entry["level"]]):
+            return False
+        # filter by component?
+        return not component or entry["component"] == component
+
+    def _get_parser(self, filename):
+        """ Finds out parser for a file by sniffing its first bytes
+        """
+        return detect_parser(self._get_file_head(filename))
+
+    @staticmethod
+    def _get_file_head(filename):
+        metrics = request_metrics.current()
+        if metrics is not None:
+            started = time.perf_counter()
+        try:
+            with open(filename, "rb") as f:
+                head = f.read(_SNIFF_SIZE)
+        except OSError:
+            return b""
+        if metrics is not None:
+            metrics.add(files_opened=1, bytes_read=len(head))
+            metrics.add_time("read", time.perf_counter() - started)
+        return head
+
+    @staticmethod
+    def _get_file_contents(filename, end=None, max_row_size=None):
+        """ Yields file rows from last to first
+
+        File is read backwards in blocks so that only the rows consumed are
+        read from disk.
+
+        Args:
+            filename (str): path to file
+            end (int): byte offset to read backwards from, file end if None
+            max_row_size (int): bytes kept of each row if not None, rows cut
+                carry their size in file
+        """
+        metrics = request_metrics.current()
+        with open(filename, "rb") as f:
+            if metrics is not None:
+                metrics.add(files_opened=1)
+            if end is None:
+                end = f.seek(0, os.SEEK_END)
+            position = end
+            # end of a row whose beginning lies in a previous block, only
+            # its first max_row_size bytes are kept, along with its size
+            pending = b""
+            pending_size = 0
+            while position > 0:
+                size = min(_BLOCK_SIZE, position)
+                position -= size
+                if metrics is not None:
+                    started = time.perf_counter()
+                f.seek(position)
+                rows = f.read(size).split(b"\n")
+                if metrics is not None:
+                    metrics.add(bytes_read=size)
+                    metrics.add_time("read", time.perf_counter() - started)
+                # last row lacks a newline only at the end of the file
+                last = rows.pop()
+                pending = last + pending
+                pending_size += len(last)
+                if max_row_size is not None and len(pending) > max_row_size:
+                    pending = pending[:max_row_size]
+                if not rows:
+                    continue
+                if pending_size:
+                    yield _cut_row(pending, pending_size, max_row_size)
+                for row in reversed(rows[1:]):
+                    yield _cut_row(row + b"\n", len(row) + 1, max_row_size)
+                pending = rows[0] + b"\n"
+                pending_size = len(pending)
+            if pending_size:
+                yield _cut_row(pending, pending_size, max_row_size)
+
+    @staticmethod
+    def _get_file_range(filename, start, end, max_row_size=None):
+        """ Yields file rows from first to last within a byte range
+
+        File is read forward in blocks so that only the rows consumed are
+        read from disk.
+
+        Args:
+            filename (str): path to file
+            start (int): byte offset of a row start
+            end (int): byte offset where range ends, a row starting before
+                it is yielded in full
+            max_row_size (int): bytes kept of each row if not None, rows cut
+                carry their size in file
+        """
+        metrics = request_metrics.current()
+        with open(filename, "rb") as f:
+            if metrics is not None:
+                metrics.add(files_opened=1)
+            f.seek(start)
+            # offset of the row being read
+            position = start
+            # start of a row whose end lies in a next block, only its first
+            # max_row_size bytes are kept, along with its size
+            pending = b""
+            pending_size = 0
+            while position < end:
+                if metrics is not None:
+                    started = time.perf_counter()
+                block = f.read(_BLOCK_SIZE)
+                if metrics is not None:
+                    metrics.add(bytes_read=len(block))
+                    metrics.add_time("read", time.perf_counter() - started)
+                if not block:
+                    break
+                rows = block.split(b"\n")
+                # last row lacks a newline, it goes on in a next block
+                last = rows.pop()
+                for row in rows:
+                    size = pending_size + len(row) + 1
+                    if pending_size:
+                        row = pending + row
+                        pending = b""
+                        pending_size = 0
+                    yield _cut_row(row + b"\n", size, max_row_size)
+                    position += size
+                    if position >= end:
+                        return
+                pending += last
+                pending_size += len(last)
+                if max_row_size is not None and len(pending) > max_row_size:
+                    pending = pending[:max_row_size]
+            if pending_size and position < end:
+                # last row of file lacks a newline
+                yield _cut_row(pending, pending_size, max_row_size)
+
+    @staticmethod
+    def _get_rows_end(filename, start, end):
+        """ Finds out offset following the last newline within a byte range
+
+        Returns:
+            offset after last newline, start if there is none
+        """
+        metrics = request_metrics.current()
+        with open(filename, "rb") as f:
+            if metrics is not None:
+                metrics.add(files_opened=1)
+            position = end
+            while position > start:
+                size = min(_BLOCK_SIZE, position - start)
+                position -= size
+                if metrics is not None:
+                    started = time.perf_counter()
+                f.seek(position)
+                newline = f.read(size).rfind(b"\n")
+                if metrics is not None:
+                    metrics.add(bytes_read=size)
+                    metrics.add_time("read", time.perf_counter() - started)
+                if newline != -1:
+                    return position + newline + 1
+        return start
+
+    @staticmethod
+    def _get_chunk_boundaries(filename, size, chunks):
+        """ Splits a file into byte ranges starting at row boundaries
+
+        Returns:
+            list of offsets, each range goes from an offset to the next one
+        """
+        boundaries = [0]
+        with open(filename, "rb") as f:
+            for i in range(1, chunks):
+                f.seek(size * i // chunks)
+                # move to start of next row
+                _read_row(f, 0)
+                boundary = f.tell()
+                if boundary > boundaries[-1] and boundary < size:
+                    boundaries.append(boundary)
+        boundaries.append(size)
+        return boundaries
+
+    @staticmethod
+    def _get_file_size(filename):
+        return os.path.getsize(filename)
+
+    @staticmethod
+    def _get_row_size(row):
+        if type(row) is _TruncatedRow:
+            return row.size
+        if row.isascii():
+            return len(row)
+        return len(row.encode("utf-8", "surrogateescape"))
 
     @staticmethod
     def _is_level_allowed(level, entry_level):
@@ -170,3 +1819,12 @@ class _LogEntries(object):
         return [item for item in heapq.merge(*lists)]
 
 LogEntries = _LogEntries()
+
+
+def _parse_chunk(filename, start, end, level, component, fields,
+                 msg_max_len, parser, max_row_size, max_extended_rows):
+    # module level function so that it can be run in a separate process
+    LogEntries.max_row_size = max_row_size
+    LogEntries.max_extended_rows = max_extended_rows
+    return LogEntries.parse_range(filename, start, end, level, component,
+                                  fields, msg_max_len, parser)
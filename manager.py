@@ -1,15 +1,37 @@
-from os import path, listdir
+import heapq
+import json
+import threading
+import time
+from collections import deque
+from itertools import chain
+from operator import itemgetter
+from os import path, listdir, makedirs, remove, stat
 
+from nio.modules.settings import Settings
 from nio.util.versioning.dependency import DependsOn
 from niocore.common.executable_request import ExecutableRequest
 from niocore.core.component import CoreComponent
 from nio import discoverable
+from nio.util.logging import get_nio_logger
 from niocore.util.environment import NIOEnvironment
 
-from .log_entries import LogEntries
+from .capture import ServiceCapture
+from .changes import LogChanges
+from .log_entries import LogEntries, LogEntry, LogEntryList, ReadBudget
+from .federation import Federation
+from .metrics import registry as metrics_registry
+from .prewarm import Prewarmer
+from .query_cache import QueryCache
+from .read_pool import ReadPool
+from .memory_buffer import install_memory_handler, \
+    remove_memory_handler, select_entries
+from .shared_ring import read_ring
+from .watches import LogWatches
 from .executor import LogExecutor
 from .core_handler import CoreLogHandler
 from .service_handler import ServiceLogHandler
+from .export_handler import ExportLogHandler
+from .watch_handler import WatchLogHandler
 from . import __version__ as component_version
 
 
@@ -28,10 +50,58 @@ class LogManager(CoreComponent):
 
         """
         super().__init__()
+        self.logger = get_nio_logger("LogManager")
         self._handlers = []
         # dependency components
         self._rest_manager = None
         self._service_manager = None
+        # in-process capture of recent log records
+        self._memory_capacity = 0
+        self._memory_handler = None
+        self._capture_interval = 5.0
+        self._capture = None
+        # shared memory rings written by service processes
+        self._shared_ring_slots = 0
+        self._shared_ring_slot_size = 512
+        # cache of file query results
+        self._query_cache = None
+        # pool where file reads are run
+        self._read_pool = None
+        self._read_workers = 4
+        self._read_queue_size = 8
+        self._read_timeout = 30.0
+        self._retry_after = 5
+        # read budget limits, 0 means no limit
+        self._max_bytes = 0
+        self._max_time = 0
+        self._max_entries = 0
+        # processes parsing chunks of large files, 0 disables it
+        self._parallel_workers = 0
+        # largest byte range of a log file fetched at once
+        self._max_range_size = 16 * 1024 * 1024
+        # peer instances queried along this one
+        self._peers = []
+        self._peer_timeout = 5.0
+        self._peer_authorization = None
+        self._instance_name = "local"
+        self._federation = None
+        # background warming of queries right after start
+        self._prewarm = False
+        self._prewarm_entries = 100
+        self._prewarm_rate = 10 * 1024 * 1024
+        self._prewarmer = None
+        # service logger inventories, 0 disables caching
+        self._logger_names_ttl = 0
+        self._logger_names = {}
+        self._logger_names_lock = threading.Lock()
+        # log files changes, tracked from first time they are requested
+        self._changes = None
+        self._changes_poll_interval = 1.0
+        self._changes_lock = threading.Lock()
+        # saved watch queries, evaluated from first time they are used
+        self._watches = None
+        self._watch_interval = 5.0
+        self._watches_lock = threading.Lock()
 
     def get_version(self):
         return component_version
@@ -52,6 +122,94 @@ class LogManager(CoreComponent):
         self._rest_manager = self.get_dependency('RESTManager')
         self._service_manager = self.get_dependency('ServiceManager')
 
+        # number of recent records kept in memory per level, 0 disables it
+        self._memory_capacity = Settings.getint(
+            "log_api", "memory_capacity", fallback=0)
+        # number of records held in each service shared ring, 0 disables it
+        self._shared_ring_slots = Settings.getint(
+            "log_api", "shared_ring_slots", fallback=0)
+        self._shared_ring_slot_size = Settings.getint(
+            "log_api", "shared_ring_slot_size", fallback=512)
+        # seconds between requests installing memory capture into services
+        self._capture_interval = Settings.getfloat(
+            "log_api", "capture_interval", fallback=5.0)
+
+        # number of query results cached, 0 disables caching
+        cache_entries = Settings.getint(
+            "log_api", "cache_entries", fallback=64)
+        if cache_entries > 0:
+            self._query_cache = QueryCache(
+                cache_entries,
+                Settings.getint("log_api", "cache_size",
+                                fallback=16 * 1024 * 1024))
+
+        # admission control for file reads
+        self._read_workers = Settings.getint(
+            "log_api", "read_workers", fallback=4)
+        self._read_queue_size = Settings.getint(
+            "log_api", "read_queue_size", fallback=8)
+        self._read_timeout = Settings.getfloat(
+            "log_api", "read_timeout", fallback=30.0)
+        self._retry_after = Settings.getint(
+            "log_api", "retry_after", fallback=5)
+
+        # read budget limits for every query, 0 means no limit
+        self._max_bytes = Settings.getint(
+            "log_api", "max_bytes", fallback=0)
+        self._max_time = Settings.getfloat(
+            "log_api", "max_time", fallback=0)
+        self._max_entries = Settings.getint(
+            "log_api", "max_entries", fallback=0)
+
+        # bounds on memory held per entry, 0 means no bound, entries
+        # exceeding them are truncated and can be fetched through ranges
+        LogEntries.max_row_size = Settings.getint(
+            "log_api", "max_row_size", fallback=64 * 1024) or None
+        LogEntries.max_extended_rows = Settings.getint(
+            "log_api", "max_extended_rows", fallback=1000) or None
+        self._max_range_size = Settings.getint(
+            "log_api", "max_range_size", fallback=16 * 1024 * 1024)
+
+        # processes parsing chunks of large files when all entries are
+        # requested, 0 disables it
+        self._parallel_workers = Settings.getint(
+            "log_api", "parallel_workers", fallback=0)
+
+        # peer instances federated queries are sent to
+        peers = Settings.get("log_api", "peers", fallback="")
+        self._peers = [peer.strip() for peer in peers.split(",")
+                       if peer.strip()]
+        self._peer_timeout = Settings.getfloat(
+            "log_api", "peer_timeout", fallback=5.0)
+        self._peer_authorization = Settings.get(
+            "log_api", "peer_authorization", fallback=None)
+        self._instance_name = Settings.get(
+            "log_api", "instance_name", fallback="local")
+
+        # seconds requests keep being measured after metrics are retrieved
+        metrics_registry.idle_timeout = Settings.getfloat(
+            "log_api", "metrics_idle_timeout", fallback=300.0)
+
+        # warm log tails and service logger inventories on start
+        self._prewarm = Settings.getboolean(
+            "log_api", "prewarm", fallback=False)
+        self._prewarm_entries = Settings.getint(
+            "log_api", "prewarm_entries", fallback=100)
+        self._prewarm_rate = Settings.getint(
+            "log_api", "prewarm_rate", fallback=10 * 1024 * 1024)
+        # seconds service logger inventories are reused, 0 disables it,
+        # inventories are only reused by default when they are prewarmed
+        self._logger_names_ttl = Settings.getfloat(
+            "log_api", "logger_names_ttl",
+            fallback=30.0 if self._prewarm else 0.0)
+        # seconds log files are not checked again for changes when they
+        # cannot be watched
+        self._changes_poll_interval = Settings.getfloat(
+            "log_api", "changes_poll_interval", fallback=1.0)
+        # seconds between evaluations of watch queries
+        self._watch_interval = Settings.getfloat(
+            "log_api", "watch_interval", fallback=5.0)
+
     def start(self):
         """ Starts component
 
@@ -60,23 +218,83 @@ class LogManager(CoreComponent):
         """
         super().start()
 
+        if self._memory_capacity > 0:
+            self._memory_handler = \
+                install_memory_handler(self._memory_capacity)
+            # services capture records from their start rather than from
+            # their first memory query
+            self._capture = ServiceCapture(self, self._capture_interval)
+            self._capture.start()
+
+        if self._read_workers > 0:
+            self._read_pool = ReadPool(self._read_workers,
+                                       self._read_queue_size,
+                                       self._read_timeout,
+                                       self._retry_after)
+
+        if self._peers:
+            headers = {}
+            if self._peer_authorization:
+                headers["Authorization"] = self._peer_authorization
+            # as many federated queries as local reads admitted run their
+            # peer calls at once
+            self._federation = Federation(
+                self._peers, self._peer_timeout, headers,
+                self._read_workers + self._read_queue_size)
+
         # create REST specific handlers
         self._handlers.append(CoreLogHandler("/log", self))
         self._handlers.append(ServiceLogHandler("/log/service", self))
+        self._handlers.append(ExportLogHandler("/log/export", self))
+        self._handlers.append(WatchLogHandler("/log/watch", self))
 
         for handler in self._handlers:
             # Add handler to WebServer
             self._rest_manager.add_web_handler(handler)
 
+        if self._prewarm:
+            # warming runs in the background, start is not delayed
+            self._prewarmer = Prewarmer(self, self._prewarm_entries,
+                                        self._prewarm_rate)
+            self._prewarmer.start()
+
+        if path.exists(self._get_watches_path()):
+            # saved watch queries are evaluated again
+            self._get_watches()
+
     def stop(self):
         """ Stops component
 
         Removes web handlers
 
         """
+        if self._prewarmer is not None:
+            self._prewarmer.stop()
+            self._prewarmer = None
+        if self._capture is not None:
+            self._capture.stop()
+            self._capture = None
         for handler in self._handlers:
             # Remove handler from WebServer
             self._rest_manager.remove_web_handler(handler)
+        if self._memory_handler is not None:
+            remove_memory_handler()
+            self._memory_handler = None
+        if self._read_pool is not None:
+            self._read_pool.shutdown()
+            self._read_pool = None
+        LogEntries.close()
+        if self._federation is not None:
+            self._federation.close()
+            self._federation = None
+        with self._watches_lock:
+            if self._watches is not None:
+                self._watches.stop()
+                self._watches = None
+        with self._changes_lock:
+            if self._changes is not None:
+                self._changes.close()
+                self._changes = None
         super().stop()
 
     @staticmethod
@@ -122,7 +340,12 @@ class LogManager(CoreComponent):
                                     "set_log_level",
                                     logger_name,
                                     level)
-        return self._service_manager.execute_request(service_id, request)
+        try:
+            return self._service_manager.execute_request(service_id, request)
+        finally:
+            # levels held in inventory are no longer current
+            with self._logger_names_lock:
+                self._logger_names.pop(service_id, None)
 
     def get_service_logger_names(self, service, add_level):
         """ Provides logger names for a service
@@ -140,13 +363,41 @@ class LogManager(CoreComponent):
         """
 
         service_id = self._service_manager.identify_service(service)
+        if self._logger_names_ttl > 0:
+            with self._logger_names_lock:
+                cached = self._logger_names.get(service_id)
+            if cached is not None and \
+                    time.monotonic() - cached[0] < self._logger_names_ttl and \
+                    (cached[1] or not add_level):
+                if add_level:
+                    return cached[2]
+                return [{"name": logger["name"]} for logger in cached[2]]
+
         request = ExecutableRequest(LogExecutor,
                                     "get_logger_names",
                                     add_level=add_level)
-        return self._service_manager.execute_request(service_id, request)
+        logger_names = self._service_manager.execute_request(service_id,
+                                                             request)
+        if self._logger_names_ttl > 0:
+            with self._logger_names_lock:
+                self._logger_names[service_id] = \
+                    (time.monotonic(), add_level, logger_names)
+        return logger_names
+
+    def get_services(self):
+        """ Provides services known to the service manager
+
+        Returns:
+            dict of service names by service identifier, names might be
+            empty
+        """
+        return dict(self._service_manager.services)
 
     def get_log_entries(
-            self, name, id=None, entries_count=-1, level=None, component=None):
+            self, name, id=None, entries_count=-1, level=None, component=None,
+            source=None, max_bytes=None, max_time=None, max_entries=None,
+            resume=None, fields=None, msg_max_len=None, collapse=False,
+            collapse_window=None, sample=None, pooled=True):
         """ Retrieves log entries
 
         Allows to specify number of entries to read and
@@ -160,9 +411,464 @@ class LogManager(CoreComponent):
             entries_count (int): number of entries to read (-1 reads them all)
             level (str): level to filter by
             component (str): component to filter by
+            source (str): when 'memory', entries are served from records
+                captured in memory by the core process, service shared
+                rings or the running service if possible, falling back to
+                the files when not enough history is held there
+            max_bytes (int): bytes allowed to be scanned, capped by the
+                configured limit
+            max_time (float): seconds allowed for reading, capped by the
+                configured limit
+            max_entries (int): entries allowed to be read, capped by the
+                configured limit
+            resume (dict): log file name to byte offset where a previous
+                truncated read stopped, only files included are read
+            fields (list): entry fields to include, all if None
+            msg_max_len (int): maximum message length if not None
+            collapse (bool): fold identical entries into counted groups
+            collapse_window (float): when collapsing, fold identical entries
+                within these many seconds instead of consecutive ones only
+            sample (int or float): when not None, entries are a sample
+                evenly spread over the files of this many entries, or when
+                lower than 1, of this rate of entries. Result carries the
+                estimated count of entries matching the query
+            pooled (bool): when False, files are read in calling thread
+                rather than in the read pool, taking no admission slot,
+                meant for background tasks running at a low priority
+
+        Returns:
+             list of entries where items are in dict format, when reading is
+             limited by a budget, the list carries truncation and resume
+             details
+
+        Raises:
+            ReadUnavailable: when log files cannot be read at this time
+        """
+        name = self._resolve_log_name(name, id)
+
+        if source == "memory" and sample is None:
+            entries = self._get_memory_entries(
+                name, entries_count, level, component)
+            if entries is not None:
+                # entries are collapsed by their whole message
+                if collapse:
+                    entries = LogEntries.collapse(entries, collapse_window)
+                return LogEntries.project(entries, fields, msg_max_len)
+
+        if name:
+            filename = path.join(
+                NIOEnvironment.get_path("logs"), "{}.log".format(name)
+            )
+            if not path.isfile(filename):
+                return []
+            files = [filename]
+        else:
+            files = self._get_log_files()
+
+        ends = None
+        if resume is not None:
+            files = [filename for filename in files
+                     if path.basename(filename) in resume]
+            ends = {filename: int(resume[path.basename(filename)])
+                    for filename in files}
+        budget_limits = self._get_budget_limits(
+            max_bytes, max_time, max_entries)
+
+        def read(cancel=None):
+            if sample is not None:
+                if name:
+                    return LogEntries.sample(filename, sample, level,
+                                             component, fields=fields,
+                                             msg_max_len=msg_max_len)
+                return LogEntries.sample_all(files, sample, level, component,
+                                             fields=fields,
+                                             msg_max_len=msg_max_len)
+            budget = None
+            if any(limit is not None for limit in budget_limits):
+                budget = ReadBudget(*budget_limits)
+            if name and ends is None:
+                result = LogEntries.read(filename, entries_count, level,
+                                         component, cancel=cancel,
+                                         budget=budget,
+                                         workers=self._parallel_workers,
+                                         fields=fields,
+                                         msg_max_len=msg_max_len,
+                                         collapse=collapse,
+                                         collapse_window=collapse_window)
+            else:
+                result = LogEntries.read_all(files, entries_count, level,
+                                             component, cancel=cancel,
+                                             budget=budget, ends=ends,
+                                             workers=self._parallel_workers,
+                                             fields=fields,
+                                             msg_max_len=msg_max_len,
+                                             collapse=collapse,
+                                             collapse_window=collapse_window)
+            if getattr(result, "resume", None):
+                # files are known to clients by their name only
+                result.resume = {path.basename(filename): offset
+                                 for filename, offset in result.resume.items()}
+            return result
+
+        def load():
+            # scans run in the read pool, away from web server threads
+            if self._read_pool is None or not pooled:
+                return read()
+            return self._read_pool.run(read)
+
+        if self._query_cache is None:
+            return load()
+        signature = self._get_files_signature(files)
+        if signature is None:
+            return load()
+        return self._query_cache.get(
+            (signature, entries_count, level, component, budget_limits,
+             tuple(sorted(ends.items())) if ends else None,
+             tuple(fields) if fields is not None else None, msg_max_len,
+             collapse, collapse_window, sample),
+            load)
+
+    def get_federated_log_entries(self, params, name=None, id=None,
+                                  entries_count=-1, level=None,
+                                  component=None, **options):
+        """ Retrieves log entries from this instance and its peers
+
+        Query is sent to every peer instance while it runs locally, results
+        are merged by time keeping the last entries_count entries, and each
+        entry is tagged with the instance it comes from.
+
+        Args:
+            params (dict): query parameters as received, sent along to peers
+            name, id, entries_count, level, component: as in get_log_entries
+            options: other get_log_entries arguments, 'resume' is not
+                supported since read offsets are specific to each instance
+
+        Returns:
+             LogEntryList of entries, carrying names of instances that
+             failed to respond
+        """
+        if self._federation is None:
+            return self.get_log_entries(name, id, entries_count, level,
+                                        component, **options)
+
+        # profiles and metrics are about this request, peers would wrap or
+        # annotate their responses with their own
+        peer_params = {key: value for key, value in params.items()
+                       if key not in ("identifier", "federate", "resume",
+                                      "profile", "metrics")}
+        options.pop("resume", None)
+        # time is needed to merge entries even when it is not requested
+        fields = options.get("fields")
+        if fields is not None and "time" not in fields:
+            options["fields"] = list(fields) + ["time"]
+            peer_params["fields"] = ",".join(options["fields"])
+
+        local, responses, failed = self._federation.query(
+            "/log/entries", peer_params,
+            lambda: self.get_log_entries(name, id, entries_count, level,
+                                         component, **options))
+
+        sources = [(self._instance_name, local)] + \
+            [(peer, entries) for peer, entries, _ in responses]
+        merged = heapq.merge(
+            *[self._tag_entries(entries, instance)
+              for instance, entries in sources],
+            key=itemgetter("time"))
+        if entries_count != -1:
+            # only the newest entries are kept while merging
+            merged = deque(merged, maxlen=entries_count)
+        if options.get("fields") is not fields:
+            merged = (LogEntry((key, value) for key, value in entry.items()
+                               if key in fields or key == "instance")
+                      for entry in merged)
+
+        result = LogEntryList(merged)
+        result.truncated = getattr(local, "truncated", False) or \
+            any(truncated for _, _, truncated in responses)
+        result.failed_instances = failed
+        return result
+
+    @staticmethod
+    def _tag_entries(entries, instance):
+        for entry in entries:
+            yield LogEntry(entry, instance=instance)
+
+    def _get_budget_limits(self, max_bytes, max_time, max_entries):
+        """ Figures out read budget limits for a query
+
+        Requested limits can only lower the configured ones
+
+        Returns:
+            (max_bytes, max_time, max_entries) tuple, None meaning no limit
+        """
+        def limit(requested, configured):
+            if not configured:
+                return requested
+            if requested is None:
+                return configured
+            return min(requested, configured)
+
+        return (limit(max_bytes, self._max_bytes),
+                limit(max_time, self._max_time),
+                limit(max_entries, self._max_entries))
+
+    @staticmethod
+    def _get_files_signature(files):
+        """ Provides a signature that changes when any file changes
+
+        Returns:
+            tuple with files details, or None if a file could not be stat
+        """
+        signature = []
+        for filename in sorted(files):
+            try:
+                file_stat = stat(filename)
+            except OSError:
+                return None
+            signature.append((filename, file_stat.st_ino,
+                              file_stat.st_size, file_stat.st_mtime_ns))
+        return tuple(signature)
+
+    def get_cache_stats(self):
+        """ Provides query cache counters
+
+        Returns:
+            dict with cache counters, empty if caching is disabled
+        """
+        if self._query_cache is None:
+            return {}
+        return self._query_cache.stats()
+
+    def get_log_range(self, filename, offset, size):
+        """ Provides raw text of a byte range of a log file
+
+        Truncated entries tell the file, offset and size their whole text
+        is found at.
+
+        Args:
+            filename (str): log file name, rotated ones included
+            offset (int): byte offset range starts at
+            size (int): range size in bytes
+
+        Returns:
+            range text
+
+        Raises:
+            ValueError: if file is not a log file or range is not valid
+        """
+        if offset < 0 or size < 0:
+            raise ValueError("Range offset and size cannot be negative")
+        if size > self._max_range_size:
+            raise ValueError("Range size cannot exceed {} bytes".format(
+                self._max_range_size))
+        for name, file_path in self.get_export_files():
+            if name == filename:
+                return LogEntries.read_range(file_path, offset, size)
+        raise ValueError("Log file '{}' does not exist".format(filename))
+
+    def get_log_changes(self, since=None):
+        """ Provides log files that grew, were rotated or appeared
+
+        Args:
+            since (str): token returned by a previous call, all log files
+                are provided when None
+
+        Returns:
+            dict with a new token and files changed, see LogChanges.changes
+        """
+        return self._get_changes().changes(since)
+
+    def register_watch(self, name, log=None, level=None, component=None,
+                       window=100):
+        """ Registers a saved watch query
+
+        Entries appended to matching logs from now on are matched in the
+        background, the last ones matched are kept along with counters.
+
+        Args:
+            name (str): watch name
+            log (str): service name or 'main', all logs if None
+            level (str): match entries with this level and above if not None
+            component (str): match entries with this component if not None
+            window (int): number of matching entries kept
 
         Returns:
-             list of entries where items are in dict format
+            watch definition
+
+        Raises:
+            ValueError: if watch definition is not valid or service does not
+                exist
+        """
+        log = self._resolve_log_name(log, None) or None
+        return self._get_watches().register(
+            name, log, level, component, window).definition()
+
+    def remove_watch(self, name):
+        """ Removes a saved watch query
+
+        Raises:
+            ValueError: if watch does not exist
+        """
+        self._get_watches().remove(name)
+
+    def get_watches(self):
+        """ Provides saved watch queries along with their counters
+
+        Returns:
+            list of watch results without entries
+        """
+        return [watch.summary() for watch in self._get_watches().list()]
+
+    def get_watch_results(self, name, since=None):
+        """ Provides entries matched by a watch query
+
+        Args:
+            name (str): watch name
+            since (int): only entries matched after this sequence number,
+                as returned in 'matched', are provided when not None
+
+        Returns:
+            dict with watch definition, counters and entries, see
+            WatchQuery.results
+
+        Raises:
+            ValueError: if watch does not exist
+        """
+        return self._get_watches().get(name).results(since)
+
+    def _get_changes(self):
+        with self._changes_lock:
+            if self._changes is None:
+                self._changes = LogChanges(NIOEnvironment.get_path("logs"),
+                                           self._changes_poll_interval)
+            return self._changes
+
+    def _get_watches(self):
+        changes = self._get_changes()
+        with self._watches_lock:
+            if self._watches is None:
+                self._watches = LogWatches(
+                    NIOEnvironment.get_path("logs"), changes,
+                    self._watch_interval, self._get_watches_path())
+                self._watches.start()
+            return self._watches
+
+    @staticmethod
+    def _get_watches_path():
+        return path.join(NIOEnvironment.get_path("logs"), "watches.json")
+
+    def store_profile(self, report, keep=20):
+        """ Stores a request profile report in logs directory
+
+        Reports are stored under a 'profiles' directory, only the most
+        recent ones are kept.
+
+        Args:
+            report (dict): profile report
+            keep (int): number of reports kept
+
+        Returns:
+            stored report file name
+        """
+        profiles_dir = path.join(NIOEnvironment.get_path("logs"), "profiles")
+        makedirs(profiles_dir, exist_ok=True)
+        filename = "profile-{}.json".format(
+            time.strftime("%Y%m%dT%H%M%S", time.gmtime()) +
+            "{:.6f}".format(time.time() % 1)[1:])
+        with open(path.join(profiles_dir, filename), "w") as f:
+            json.dump(report, f, indent=2)
+        profiles = sorted(profile for profile in listdir(profiles_dir)
+                          if profile.startswith("profile-"))
+        for profile in profiles[:-keep]:
+            remove(path.join(profiles_dir, profile))
+        return filename
+
+    def get_export_files(self, name=None, id=None):
+        """ Provides log files to export, including rotated ones
+
+        Args:
+            name (str): service name or 'main', all files if None
+            id (str): service identifier
+
+        Returns:
+            list of (file name, absolute path) tuples, rotated files of a
+            log come first, oldest first
+
+        Raises:
+            ValueError: if service does not exist
+        """
+        name = self._resolve_log_name(name, id)
+        logs_dir = NIOEnvironment.get_path("logs")
+        files = []
+        for filename in listdir(logs_dir):
+            base, extension = path.splitext(filename)
+            if extension != ".log":
+                # rotated files are named <name>.log.<n>
+                base, extension = path.splitext(base)
+                if extension != ".log" or \
+                        not path.splitext(filename)[1][1:].isdigit():
+                    continue
+            if name and base != name:
+                continue
+            files.append(filename)
+        files.sort(key=self._export_order)
+        return [(filename, path.join(logs_dir, filename))
+                for filename in files]
+
+    @staticmethod
+    def _export_order(filename):
+        base, extension = path.splitext(filename)
+        if extension == ".log":
+            return base, 0
+        return path.splitext(base)[0], -int(extension[1:])
+
+    def iter_export_entries(self, files, level=None, component=None,
+                            fields=None):
+        """ Yields entries from log files, oldest first
+
+        Entries are read lazily so that memory does not depend on the size
+        of the files exported.
+
+        Args:
+            files (list): list of (file name, absolute path) tuples as
+                provided by get_export_files
+            level (str): filter entries with this level if not None
+            component (str): filter entries with this component if not None
+            fields (list): entry fields to include, all if None
+        """
+        # time is needed to merge entries even when it is not requested
+        read_fields = fields
+        if fields is not None and "time" not in fields:
+            read_fields = list(fields) + ["time"]
+
+        # rotated files of a log are read in sequence, logs are merged
+        logs = {}
+        for filename, file_path in files:
+            log_name = self._export_order(filename)[0]
+            logs.setdefault(log_name, []).append(
+                LogEntries.iter_forward(file_path, level, component,
+                                        read_fields))
+        for entry in heapq.merge(*[chain(*iterators)
+                                   for iterators in logs.values()],
+                                 key=itemgetter("time")):
+            if read_fields is not fields:
+                entry = LogEntry((key, value) for key, value in entry.items()
+                                 if key in fields)
+            yield entry
+
+    def _resolve_log_name(self, name, id):
+        """ Figures out log file name out of service name or identifier
+
+        Args:
+            name (str): service name or 'main'
+            id (str): service identifier, used when name is None
+
+        Returns:
+            log file name without extension, None when neither name nor id
+            are provided
+
+        Raises:
+            ValueError: if service does not exist
         """
         if name:
             if name != 'main':
@@ -186,21 +892,139 @@ class LogManager(CoreComponent):
             # get_service_label method in core)
             if not name:
                 name = id
+        return name
+
+    @staticmethod
+    def _get_log_files():
+        """ Finds all log project files
+        """
+        files = []
+        logs_dir = NIOEnvironment.get_path("logs")
+        for filename in listdir(logs_dir):
+            extension = path.splitext(filename)[1]
+            if extension == ".log":
+                files.append(path.join(logs_dir, filename))
+        return files
+
+    def _get_memory_entries(self, name, entries_count, level, component):
+        """ Retrieves entries out of records captured in memory
+
+        Core records are held by the core process memory handler, service
+        records are read from their shared ring, or requested to the
+        service when no ring is available.
+
+        Returns:
+            list of entries, or None when not enough history is held in
+            memory
+        """
+        if name == "main":
+            if self._memory_handler is None:
+                return None
+            return self._memory_handler.buffer.get(
+                entries_count, level, component)
 
         if name:
-            filename = path.join(
-                NIOEnvironment.get_path("logs"), "{}.log".format(name)
-            )
-            if not path.isfile(filename):
-                return []
-            return LogEntries.read(filename, entries_count, level, component)
-        else:
-            # find all log project files
-            files = []
-            logs_dir = NIOEnvironment.get_path("logs")
-            for filename in listdir(logs_dir):
-                extension = path.splitext(filename)[1]
-                if extension == ".log":
-                    files.append(path.join(logs_dir, filename))
-
-            return LogEntries.read_all(files, entries_count, level, component)
+            snapshot = self._read_shared_ring(name, level)
+            if snapshot is not None:
+                entries = select_entries([snapshot], entries_count,
+                                         component)
+                if entries is not None:
+                    return entries
+            if self._memory_capacity > 0:
+                return self._get_service_memory_entries(
+                    name, entries_count, level, component)
+            return None
+
+        # every log file needs to be shadowed in memory to merge them
+        if self._memory_handler is None or self._shared_ring_slots <= 0:
+            return None
+        snapshots = []
+        complete = True
+        for filename in self._get_log_files():
+            log_name = path.splitext(path.basename(filename))[0]
+            if log_name == "main":
+                snapshot = self._memory_handler.buffer.snapshot(level)
+            else:
+                snapshot = self._read_shared_ring(log_name, level)
+            if snapshot is None:
+                # keep going so that every missing ring gets attached
+                complete = False
+            else:
+                snapshots.append(snapshot)
+        if not complete:
+            return None
+        return select_entries(snapshots, entries_count, component)
+
+    def _read_shared_ring(self, name, level):
+        """ Reads records from a service shared ring
+
+        When ring is missing or no longer current, running service is asked
+        to attach a new one so that it is available for next queries
+
+        Returns:
+            (horizon, records) tuple, or None if ring is not available
+        """
+        if self._shared_ring_slots <= 0:
+            return None
+        logs_dir = NIOEnvironment.get_path("logs")
+        ring_filename = path.join(logs_dir, "{}.ring".format(name))
+        snapshot = read_ring(ring_filename,
+                             path.join(logs_dir, "{}.log".format(name)),
+                             level)
+        if snapshot is None and \
+                name in self._service_manager.services.values():
+            try:
+                service_id = self._service_manager.identify_service(name)
+                request = ExecutableRequest(LogExecutor,
+                                            "attach_shared_ring",
+                                            ring_filename,
+                                            self._shared_ring_slots,
+                                            self._shared_ring_slot_size)
+                self._service_manager.execute_request(service_id, request)
+            except RuntimeError:
+                self.logger.debug(
+                    "Could not attach shared ring to service: {}".format(
+                        name))
+        return snapshot
+
+    def install_service_memory_handler(self, service_id):
+        """ Asks a service to capture its log records in memory
+
+        Args:
+            service_id (str): service identifier
+
+        Returns:
+            True if service installed its memory handler, False if it is
+            not running
+        """
+        try:
+            request = ExecutableRequest(LogExecutor,
+                                        "install_memory_handler",
+                                        self._memory_capacity)
+            self._service_manager.execute_request(service_id, request)
+            return True
+        except RuntimeError:
+            return False
+
+    def _get_service_memory_entries(self, service, entries_count, level,
+                                    component):
+        """ Retrieves entries captured in memory by a running service
+
+        Returns:
+            list of entries, or None if the service is not running or not
+            enough history is held in its memory
+        """
+        try:
+            service_id = self._service_manager.identify_service(service)
+            request = ExecutableRequest(LogExecutor,
+                                        "get_log_entries",
+                                        entries_count,
+                                        level,
+                                        component,
+                                        self._memory_capacity)
+            return self._service_manager.execute_request(service_id, request)
+        except RuntimeError:
+            self.logger.debug(
+                "Could not retrieve entries from service: {} memory".format(
+                    service))
+            return None
@@ -0,0 +1,216 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from itertools import count
+
+from .log_entries import LogEntry
+
+
+def record_message(record):
+    """ Provides the message of a log record including exception details
+
+    Args:
+        record (LogRecord): log record
+
+    Returns:
+        message (str)
+    """
+    msg = record.getMessage()
+    if record.exc_info:
+        if not record.exc_text:
+            record.exc_text = \
+                logging.Formatter().formatException(record.exc_info)
+    if record.exc_text:
+        msg = "{}\n{}".format(msg, record.exc_text)
+    return msg
+
+
+class TruncatedMessage(str):
+    """ Record message cut to fit its storage, ending with a marker telling
+    how many bytes were left out
+    """
+    __slots__ = ("size",)
+
+    def __new__(cls, msg, size, dropped):
+        truncated = super().__new__(
+            cls, "{}[... {} bytes truncated]".format(msg, dropped))
+        truncated.size = size
+        return truncated
+
+
+def select_entries(snapshots, num_entries, component=None):
+    """ Selects most recent entries out of captured records
+
+    Captured records are tuples in the form
+    (created, sequence, level number, component, msg)
+
+    Args:
+        snapshots (list): list of (horizon, records) tuples, where horizon
+            is the oldest record from which the history held is complete
+        num_entries (int): number of entries to select
+        component (str): filter entries with this component if not None
+
+    Returns:
+        list of entries in the same format and order as LogEntries.read,
+        or None when records do not hold enough history to answer the query
+        or some of the selected messages were truncated
+    """
+    if num_entries == -1 or not snapshots:
+        # all entries were requested, only the files have them
+        return None
+
+    # records older than any horizon might be missing history from the
+    # source the horizon belongs to
+    horizon = max(snapshot[0] for snapshot in snapshots)
+    records = [record
+               for snapshot in snapshots
+               for record in snapshot[1]
+               if record >= horizon and
+               (not component or record[3] == component)]
+    if len(records) < num_entries:
+        return None
+    records.sort()
+    records = records[-num_entries:]
+    if any(type(record[4]) is TruncatedMessage for record in records):
+        # only the files can tell where whole messages lie
+        return None
+    return [_to_entry(record) for record in records]
+
+
+def _to_entry(record):
+    time = datetime.utcfromtimestamp(record[0]).strftime(
+        "%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    return LogEntry({
+        "time": time,
+        "level": logging.getLevelName(record[2]),
+        "component": record[3],
+        # messages end with a line ending, just like file ones
+        "msg": record[4] + "\n"
+    })
+
+
+class LogRecordBuffer(object):
+    """ Fixed size in-memory buffer holding the most recent log records
+
+    Records are kept as compact tuples in one sub-buffer per level, so that
+    a burst of low level records does not evict the latest errors.
+    """
+
+    def __init__(self, capacity):
+        """ Create a buffer
+
+        Args:
+            capacity (int): number of records kept for each level
+        """
+        self._capacity = capacity
+        self._buffers = {}
+        self._sequence = count()
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def append(self, record):
+        """ Captures a log record
+
+        Args:
+            record (LogRecord): record to capture
+        """
+        msg = record_message(record)
+        with self._lock:
+            buffer = self._buffers.get(record.levelno)
+            if buffer is None:
+                buffer = self._buffers[record.levelno] = \
+                    deque(maxlen=self._capacity)
+            buffer.append((record.created, next(self._sequence),
+                           record.levelno, record.name, msg))
+
+    def snapshot(self, level=None):
+        """ Provides a copy of the records held
+
+        Args:
+            level (str): include records with this level and above if not None
+
+        Returns:
+            (horizon, records) tuple as expected by select_entries
+        """
+        if level:
+            level = logging._nameToLevel[level]
+        else:
+            level = logging.DEBUG
+
+        with self._lock:
+            # a sub-buffer that is full might have evicted records, which
+            # would leave a gap in the history older than its oldest record
+            horizon = (0, 0)
+            records = []
+            for buffer_level, buffer in self._buffers.items():
+                if buffer_level < level:
+                    continue
+                if len(buffer) == self._capacity:
+                    horizon = max(horizon, buffer[0])
+                records.extend(buffer)
+        return horizon, records
+
+    def get(self, num_entries, level=None, component=None):
+        """ Retrieves the most recent captured entries
+
+        Args:
+            num_entries (int): number of entries to retrieve
+            level (str): filter entries with this level and above if not None
+            component (str): filter entries with this component if not None
+
+        Returns:
+            list of entries in the same format and order as
+            LogEntries.read, or None when the buffer does not hold enough
+            history to answer the query
+        """
+        return select_entries([self.snapshot(level)], num_entries, component)
+
+
+class MemoryLogHandler(logging.Handler):
+    """ Logging handler capturing records into a LogRecordBuffer
+    """
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.buffer = LogRecordBuffer(capacity)
+
+    def emit(self, record):
+        try:
+            self.buffer.append(record)
+        except Exception:
+            self.handleError(record)
+
+
+_memory_handler = None
+
+
+def install_memory_handler(capacity):
+    """ Installs a memory handler on the root logger of current process
+
+    Installation happens only once per process, subsequent calls return
+    the handler already installed.
+
+    Args:
+        capacity (int): number of records kept for each level
+
+    Returns:
+        installed handler (MemoryLogHandler)
+    """
+    global _memory_handler
+    if _memory_handler is None:
+        _memory_handler = MemoryLogHandler(capacity)
+        logging.getLogger().addHandler(_memory_handler)
+    return _memory_handler
+
+
+def remove_memory_handler():
+    """ Removes memory handler from the root logger of current process
+    """
+    global _memory_handler
+    if _memory_handler is not None:
+        logging.getLogger().removeHandler(_memory_handler)
+        _memory_handler = None
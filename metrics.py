@@ -0,0 +1,181 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# upper bounds of histogram buckets, counters and seconds alike are
+# spread over several orders of magnitude
+_BUCKETS = tuple(
+    base * 10 ** exponent
+    for exponent in range(-4, 10) for base in (1, 2.5, 5))
+_BUCKET_LABELS = tuple(format(bound, "g") for bound in _BUCKETS) + ("+Inf",)
+
+_current = contextvars.ContextVar("log_api_request_metrics", default=None)
+
+
+def current():
+    """ Metrics of the request being served
+
+    Returns:
+        RequestMetrics, None when metrics are not being collected
+    """
+    return _current.get()
+
+
+@contextmanager
+def collecting(metrics):
+    """ Makes metrics current while serving a request
+
+    Args:
+        metrics (RequestMetrics): metrics collected, None disables it
+    """
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+class RequestMetrics(object):
+    """ Counters and phase timings of a single request
+    """
+
+    COUNTERS = ("bytes_read", "rows_parsed", "rows_filtered",
+                "entries_returned", "files_opened", "cache_hits")
+    PHASES = ("read", "parse", "merge", "serialize")
+
+    def __init__(self):
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, **counters):
+        with self._lock:
+            for counter, value in counters.items():
+                self.counters[counter] += value
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def headers(self):
+        """ Provides response headers describing request
+
+        Returns:
+            list of (header, value) tuples
+        """
+        return [
+            ("X-Log-Metrics", ";".join(
+                "{}={}".format(counter, value)
+                for counter, value in self.counters.items())),
+            ("Server-Timing", ", ".join(
+                "{};dur={:.3f}".format(phase, seconds * 1000)
+                for phase, seconds in self.phases.items()))
+        ]
+
+
+class Histogram(object):
+    """ Distribution of observed values over fixed buckets
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self._buckets = [0] * (len(_BUCKETS) + 1)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self._buckets[bisect.bisect_left(_BUCKETS, value)] += 1
+
+    def snapshot(self):
+        """ Provides histogram state with cumulative bucket counts
+        """
+        buckets = {}
+        cumulative = 0
+        for label, count in zip(_BUCKET_LABELS, self._buckets):
+            cumulative += count
+            if count:
+                buckets[label] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class MetricsRegistry(object):
+    """ Aggregates request metrics into histograms per route
+
+    Requests are measured only while metrics are being scraped, that is
+    within an idle timeout of last scrape, or when a request asks for its
+    metrics, otherwise serving a request costs a single time check.
+    """
+
+    def __init__(self, idle_timeout=300):
+        """ Create a registry
+
+        Args:
+            idle_timeout (float): seconds after a scrape during which
+                requests keep being measured
+        """
+        self.idle_timeout = idle_timeout
+        self._last_scrape = None
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def start_request(self, force=False):
+        """ Starts measuring a request if metrics are being scraped
+
+        Args:
+            force (bool): measure request regardless of scraping
+
+        Returns:
+            RequestMetrics, None when request is not measured
+        """
+        if force or (self._last_scrape is not None and
+                     time.monotonic() - self._last_scrape <
+                     self.idle_timeout):
+            return RequestMetrics()
+        return None
+
+    def record(self, route, metrics):
+        """ Adds a measured request to route histograms
+
+        Args:
+            route (str): route request was served by
+            metrics (RequestMetrics): request metrics
+        """
+        elapsed = time.perf_counter() - metrics.started
+        with self._lock:
+            histograms = self._routes.get(route)
+            if histograms is None:
+                histograms = self._routes[route] = {
+                    name: Histogram()
+                    for name in ("duration",) + RequestMetrics.COUNTERS +
+                    RequestMetrics.PHASES
+                }
+            histograms["duration"].observe(elapsed)
+            for counter, value in metrics.counters.items():
+                histograms[counter].observe(value)
+            for phase, seconds in metrics.phases.items():
+                histograms[phase].observe(seconds)
+
+    def scrape(self):
+        """ Provides aggregated metrics, keeping requests measured
+
+        Returns:
+            dict of route to dict of histogram name to histogram state
+        """
+        self._last_scrape = time.monotonic()
+        with self._lock:
+            return {route: {name: histogram.snapshot()
+                            for name, histogram in histograms.items()}
+                    for route, histograms in self._routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+        self._last_scrape = None
+
+
+# registry shared by handlers and readers within the process
+registry = MetricsRegistry()
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+
+from nio.util.logging import get_nio_logger
+
+from .metrics import RequestMetrics, collecting
+
+# niceness of prewarming thread, lowest scheduling priority
+_NICENESS = 19
+
+
+class Prewarmer(object):
+    """ Warms log queries and service logger inventories in the background
+
+    Tails of main and each service log are read, which loads them into the
+    query cache and the OS page cache, and the logger inventory of each
+    service is fetched, so that first requests after a restart do not pay
+    the cold cost. Tails are read in the prewarming thread itself, at its
+    lowered priority, and reading is paced to stay within a rate of bytes
+    per second.
+    """
+
+    def __init__(self, log_manager, entries_count, rate):
+        """ Create a prewarmer
+
+        Args:
+            log_manager (LogManager): manager queries are run through
+            entries_count (int): number of entries read from each log
+            rate (int): maximum bytes per second read from log files
+        """
+        self.logger = get_nio_logger("LogPrewarm")
+        self._log_manager = log_manager
+        self._entries_count = entries_count
+        self._rate = rate
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="LogPrewarm",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        self._lower_priority()
+        services = self._log_manager.get_services()
+        # services are looked up by identifier when they have no name
+        logs = [("main", None)] + \
+            [(name, None) if name else (None, id)
+             for id, name in services.items()] + [(None, None)]
+        # tails are read in this thread, at its priority, leaving read
+        # pool admission slots to requests
+        tasks = [(self._log_manager.get_log_entries, log,
+                  {"entries_count": self._entries_count, "pooled": False})
+                 for log in logs]
+        tasks.extend((self._log_manager.get_service_logger_names,
+                      (id, True), {})
+                     for id in services)
+        for task, args, kwargs in tasks:
+            if self._stopped.is_set():
+                return
+            metrics = RequestMetrics()
+            try:
+                with collecting(metrics):
+                    task(*args, **kwargs)
+            except Exception as e:
+                # services might not be running, or reads not admitted
+                self.logger.debug("Prewarming {}{} failed: {}".format(
+                    task.__name__, args, e))
+            if self._rate:
+                # pace reads so that they stay within rate
+                self._stopped.wait(
+                    metrics.counters["bytes_read"] / self._rate)
+        self.logger.debug("Prewarming completed")
+
+    def _lower_priority(self):
+        if not sys.platform.startswith("linux"):
+            # elsewhere priority would apply to the whole process
+            return
+        try:
+            # on Linux, priority applies to thread rather than process
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(),
+                           _NICENESS)
+        except OSError as e:
+            self.logger.debug("Could not lower prewarming priority: {}".
+                              format(e))
@@ -0,0 +1,137 @@
+import contextvars
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+_current = contextvars.ContextVar("log_api_profile", default=None)
+# tracemalloc is process wide, profiled requests run one at a time
+_lock = threading.Lock()
+# from Python 3.12 a profiler sees every thread and only one can be enabled
+# at a time, the one of the thread serving a request covers other threads
+_PROCESS_WIDE = sys.version_info >= (3, 12)
+
+
+class RequestProfile(object):
+    """ CPU profiles gathered while serving a request
+
+    A request may run in several threads, before Python 3.12 each thread
+    profiles itself and all profiles are aggregated when reporting.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def run(self, func, *args, **kwargs):
+        """ Runs a function under a CPU profiler in current thread
+        """
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def profiled(func):
+    """ Makes a function running in another thread part of current profile
+
+    Args:
+        func (callable): function to be run in another thread
+
+    Returns:
+        callable running func under the profile current when this function
+        was invoked, func itself when there is none or when the profile
+        already covers every thread
+    """
+    profile = _current.get()
+    if profile is None or _PROCESS_WIDE:
+        return func
+
+    def run(*args, **kwargs):
+        return profile.run(func, *args, **kwargs)
+    return run
+
+
+def profile_call(func, *args, top=25, **kwargs):
+    """ Runs a function profiling CPU time and memory allocations
+
+    Args:
+        func (callable): function profiled
+        top (int): number of functions and allocation sites reported
+
+    Returns:
+        tuple with function result and report dict holding duration, peak
+        traced memory, top functions by cumulative time and top allocation
+        sites by size
+    """
+    with _lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            result = profile.run(func, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - started
+            _current.reset(token)
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+
+    return result, {
+        "duration": duration,
+        "peak_memory": peak,
+        "functions": _top_functions(profile.stats(), top),
+        "allocations": _top_allocations(before, after, top)
+    }
+
+
+def _top_functions(stats, top):
+    functions = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in \
+            stats.stats.items():
+        functions.append({
+            "function": "{}:{}({})".format(filename, line, name),
+            "calls": calls,
+            "total_time": total,
+            "cumulative_time": cumulative
+        })
+    functions.sort(key=lambda function: function["cumulative_time"],
+                   reverse=True)
+    return functions[:top]
+
+
+def _top_allocations(before, after, top):
+    # allocations made by profiling itself are left out
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno")
+    allocations = []
+    for difference in differences[:top]:
+        frame = difference.traceback[0]
+        allocations.append({
+            "site": "{}:{}".format(frame.filename, frame.lineno),
+            "size": difference.size_diff,
+            "count": difference.count_diff
+        })
+    return allocations
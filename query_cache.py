@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict
+
+from . import metrics as request_metrics
+
+# approximate memory taken by an entry besides its values
+_ENTRY_OVERHEAD = 200
+
+
+class _Flight(object):
+    """ A query being loaded, shared by identical concurrent queries
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class QueryCache(object):
+    """ LRU cache of log query results
+
+    Concurrent requests for a query not cached yet share a single load,
+    the first request loads it while the rest wait for its result.
+    """
+
+    def __init__(self, max_entries, max_size):
+        """ Create a cache
+
+        Args:
+            max_entries (int): maximum number of results held
+            max_size (int): approximate maximum memory in bytes taken by
+                results held
+        """
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, load):
+        """ Retrieves a result, loading it when not cached
+
+        Args:
+            key (hashable): normalized query
+            load (callable): invoked to load result on a cache miss
+
+        Returns:
+            query result
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                self._count_hit()
+                return self._results[key][0]
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            self._count_hit()
+            return flight.result
+
+        try:
+            flight.result = load()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.result)
+                del self._in_flight[key]
+            flight.event.set()
+        return flight.result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+
+    def stats(self):
+        """ Provides cache counters
+
+        Returns:
+            dict with hits, misses, coalesced requests, entries and size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._results),
+                "size": self._size
+            }
+
+    def _store(self, key, result):
+        if getattr(result, "truncated", False):
+            # partial results depend on the budget run out, not on the query
+            return
+        size = self._estimate_size(result)
+        if size > self._max_size:
+            return
+        self._results[key] = (result, size)
+        self._size += size
+        while len(self._results) > self._max_entries or \
+                self._size > self._max_size:
+            _, (_, evicted_size) = self._results.popitem(last=False)
+            self._size -= evicted_size
+
+    @staticmethod
+    def _count_hit():
+        metrics = request_metrics.current()
+        if metrics is not None:
+            metrics.add(cache_hits=1)
+
+    @staticmethod
+    def _estimate_size(result):
+        size = 0
+        for entry in result:
+            size += _ENTRY_OVERHEAD
+            for value in entry.values():
+                if isinstance(value, str):
+                    size += len(value)
+        return size
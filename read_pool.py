@@ -0,0 +1,95 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from .profiling import profiled
+
+
+class ReadUnavailable(RuntimeError):
+    """ Raised when a log read cannot be served at this time
+    """
+
+    def __init__(self, msg, retry_after):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class ReadPoolFull(ReadUnavailable):
+    """ Raised when too many log reads are already pending
+    """
+    pass
+
+
+class ReadTimeout(ReadUnavailable):
+    """ Raised when a log read does not complete within its deadline
+    """
+    pass
+
+
+class ReadPool(object):
+    """ Bounded pool of threads running log reads
+
+    Reads are admitted while there are free workers or room in the queue,
+    otherwise they are rejected right away so that callers are not blocked
+    behind other reads.
+    """
+
+    def __init__(self, workers, queue_size, timeout, retry_after):
+        """ Create a pool
+
+        Args:
+            workers (int): number of reads running concurrently
+            queue_size (int): number of reads waiting for a worker
+            timeout (float): seconds a read is allowed to take
+            retry_after (int): seconds callers are suggested to wait before
+                retrying a rejected read
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="LogRead")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._timeout = timeout
+        self._retry_after = retry_after
+
+    def run(self, read):
+        """ Runs a read in the pool and waits for its result
+
+        Args:
+            read (callable): receives a cancel event as 'cancel' keyword
+                argument, which is set when the read is abandoned
+
+        Returns:
+            read result
+
+        Raises:
+            ReadPoolFull: when there is no room for the read
+            ReadTimeout: when the read does not complete in time
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ReadPoolFull("Too many log reads pending",
+                               self._retry_after)
+
+        cancel = threading.Event()
+        try:
+            # read runs within caller context, i.e. its request metrics,
+            # and is profiled along with caller when it is being profiled
+            future = self._executor.submit(
+                contextvars.copy_context().run, profiled(read),
+                cancel=cancel)
+        except Exception:
+            self._slots.release()
+            raise
+        # slot is released when read completes or is cancelled while queued
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(self._timeout)
+        except TimeoutError:
+            cancel.set()
+            future.cancel()
+            raise ReadTimeout(
+                "Log read did not complete within {} seconds".format(
+                    self._timeout),
+                self._retry_after)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
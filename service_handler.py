@@ -3,6 +3,8 @@ from nio.modules.security.access import ensure_access
 from nio.util.logging import get_nio_logger
 from nio.modules.web import RESTHandler
 
+from .profiling import profile_call
+
 
 class ServiceLogHandler(RESTHandler):
 
@@ -23,6 +25,26 @@ class ServiceLogHandler(RESTHandler):
         self.logger.info("ServiceLogHandler.on_get, params: {0}".
                          format(params))
 
+        if "profile" in params and params["profile"].upper() != 'FALSE':
+            # Ensure instance "write" access since profiles expose internals
+            ensure_access("instance", "write")
+            body, report = profile_call(self._get, params, response)
+            if params["profile"].upper() == 'STORE':
+                response.set_header('X-Log-Profile',
+                                    self._log_manager.store_profile(report))
+            else:
+                body = json.dumps({"result": json.loads(body),
+                                   "profile": report})
+        else:
+            body = self._get(params, response)
+        response.set_body(body)
+
+    def _get(self, params, response):
+        """ Serves a GET request
+
+        Returns:
+            response body
+        """
         if "identifier" not in params:
             raise RuntimeError("Service name not provided")
 
@@ -38,7 +60,7 @@ class ServiceLogHandler(RESTHandler):
 
         # prepare response
         response.set_header('Content-Type', 'application/json')
-        response.set_body(json.dumps(logger_names))
+        return json.dumps(logger_names)
 
     def on_post(self, request, response, *args, **kwargs):
 
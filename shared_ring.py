@@ -0,0 +1,224 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .memory_buffer import TruncatedMessage, record_message
+
+# header: magic, slots, slot size, session start time, last written sequence
+_MAGIC = b"NLR2"
+_HEADER = struct.Struct("<4sIIdQ")
+_HEADER_SIZE = 64
+_WRITE_SEQ_OFFSET = _HEADER.size - 8
+# slot: sequence, created time, level number, component length, msg length,
+# msg size before it was truncated
+_SLOT = struct.Struct("<QdBHHI")
+_SEQ = struct.Struct("<Q")
+
+# a log file written this long after the newest record in its ring means
+# the ring is no longer being fed
+_STALE_TOLERANCE = 1.0
+
+
+class SharedRingWriter(object):
+    """ Writes compact binary log records into a memory mapped ring file
+
+    A ring file is made of a header followed by fixed size slots, each slot
+    holding one record. Messages not fitting a slot are truncated and read
+    back ending with a truncation marker.
+    """
+
+    def __init__(self, filename, slots, slot_size):
+        """ Opens or creates a ring file
+
+        Args:
+            filename (str): path to ring file
+            slots (int): number of records held
+            slot_size (int): size in bytes of each record
+        """
+        self._slots = slots
+        self._slot_size = slot_size
+        self._lock = threading.Lock()
+
+        size = _HEADER_SIZE + slots * slot_size
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            resized = os.fstat(fd).st_size != size
+            if resized:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, file_slots, file_slot_size, _, self._seq = \
+            _HEADER.unpack_from(self._map, 0)
+        if resized or magic != _MAGIC or file_slots != slots or \
+                file_slot_size != slot_size:
+            # layout changed, previous records cannot be trusted
+            self._map[:] = bytes(size)
+            self._seq = 0
+        # records from a previous session are kept, starting a new session
+        # lets readers know about the gap in between
+        _HEADER.pack_into(self._map, 0, _MAGIC, slots, slot_size,
+                          time.time(), self._seq)
+
+    def write(self, created, levelno, component, msg):
+        """ Writes a record, overwriting the oldest one when ring is full
+
+        Args:
+            created (float): record creation time
+            levelno (int): record level number
+            component (str): logger name
+            msg (str): record message
+        """
+        room = self._slot_size - _SLOT.size
+        component = _cut(component.encode("utf-8", "replace"), room)
+        msg = msg.encode("utf-8", "replace")
+        msg_size = min(len(msg), 0xFFFFFFFF)
+        msg = _cut(msg, room - len(component))
+        with self._lock:
+            self._seq += 1
+            offset = _HEADER_SIZE + \
+                ((self._seq - 1) % self._slots) * self._slot_size
+            # invalidate slot while its payload is being replaced
+            _SEQ.pack_into(self._map, offset, 0)
+            start = offset + _SLOT.size
+            self._map[start:start + len(component) + len(msg)] = \
+                component + msg
+            _SLOT.pack_into(self._map, offset, self._seq, created, levelno,
+                            len(component), len(msg), msg_size)
+            _SEQ.pack_into(self._map, _WRITE_SEQ_OFFSET, self._seq)
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+
+
+def _cut(data, size):
+    """ Cuts UTF-8 encoded data to at most size bytes, leaving no partial
+    character at its end
+    """
+    if len(data) <= size:
+        return data
+    # back up over continuation bytes to the start of the character cut
+    while size > 0 and data[size] & 0xC0 == 0x80:
+        size -= 1
+    return data[:size]
+
+
+class SharedRingHandler(logging.Handler):
+    """ Logging handler writing records into a shared ring file
+    """
+
+    def __init__(self, filename, slots, slot_size):
+        super().__init__()
+        self.writer = SharedRingWriter(filename, slots, slot_size)
+
+    def emit(self, record):
+        try:
+            self.writer.write(record.created, record.levelno, record.name,
+                              record_message(record))
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+
+_ring_handler = None
+
+
+def install_shared_ring_handler(filename, slots, slot_size):
+    """ Installs a shared ring handler on the root logger of current process
+
+    Installation happens only once per process, subsequent calls return
+    the handler already installed unless its ring file was removed.
+
+    Args:
+        filename (str): path to ring file
+        slots (int): number of records held
+        slot_size (int): size in bytes of each record
+
+    Returns:
+        installed handler (SharedRingHandler)
+    """
+    global _ring_handler
+    if _ring_handler is not None and not os.path.isfile(filename):
+        # ring file was removed, records would no longer be visible
+        logging.getLogger().removeHandler(_ring_handler)
+        _ring_handler.close()
+        _ring_handler = None
+    if _ring_handler is None:
+        _ring_handler = SharedRingHandler(filename, slots, slot_size)
+        logging.getLogger().addHandler(_ring_handler)
+    return _ring_handler
+
+
+def read_ring(filename, log_filename, level=None):
+    """ Reads records from a shared ring file
+
+    Args:
+        filename (str): path to ring file
+        log_filename (str): path to the log file the ring shadows, used to
+            detect a ring that is no longer being written to
+        level (str): include records with this level and above if not None
+
+    Returns:
+        (horizon, records) tuple as expected by select_entries, or None if
+            ring does not exist or is not current
+    """
+    try:
+        with open(filename, "rb") as f:
+            ring = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with ring:
+        if len(ring) < _HEADER_SIZE:
+            return None
+        magic, slots, slot_size, started, write_seq = \
+            _HEADER.unpack_from(ring, 0)
+        if magic != _MAGIC or len(ring) < _HEADER_SIZE + slots * slot_size:
+            return None
+
+        records = []
+        first_seq = max(1, write_seq - slots + 1)
+        for seq in range(first_seq, write_seq + 1):
+            offset = _HEADER_SIZE + ((seq - 1) % slots) * slot_size
+            slot_seq, created, levelno, component_len, msg_len, msg_size = \
+                _SLOT.unpack_from(ring, offset)
+            if slot_seq != seq:
+                # overwritten or being written
+                continue
+            start = offset + _SLOT.size
+            payload = ring[start:start + component_len + msg_len]
+            if _SEQ.unpack_from(ring, offset)[0] != seq:
+                # overwritten while being read
+                continue
+            msg = payload[component_len:].decode("utf-8", "replace")
+            if msg_size > msg_len:
+                msg = TruncatedMessage(msg, msg_size, msg_size - msg_len)
+            records.append((
+                created, seq, levelno,
+                payload[:component_len].decode("utf-8", "replace"), msg))
+
+    # records from a previous session are followed by a gap, and so are
+    # records preceding the oldest one when ring has wrapped around
+    horizon = (started, 0)
+    if first_seq > 1 and records:
+        horizon = max(horizon, records[0])
+
+    newest = records[-1][0] if records else started
+    try:
+        if os.path.getmtime(log_filename) > newest + _STALE_TOLERANCE:
+            return None
+    except OSError:
+        pass
+
+    if level:
+        level = logging._nameToLevel[level]
+        records = [record for record in records if record[2] >= level]
+    return horizon, records
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+from nio.testing.test_case import NIOTestCase
+
+from ..benchmarks.generator import LogGenerator, parse_size
+from ..benchmarks.scenarios import Scenario, percentile, run_scenario
+from ..log_entries import LogEntries
+
+
+class TestBenchmarks(NIOTestCase):
+
+    def test_generator(self):
+        """ Assert generated files are deterministic and parseable
+        """
+        generator = LogGenerator(seed=3, traceback_rate=1.0,
+                                 old_time_format_rate=0.5)
+        rows = list(generator.rows(20000))
+        self.assertEqual(rows, list(generator.rows(20000)))
+        self.assertNotEqual(rows, list(generator.rows(20000, seed=4)))
+
+        with tempfile.TemporaryDirectory() as logs_dir:
+            files = generator.write_files(logs_dir, ["main", "service"],
+                                          20000)
+            self.assertGreaterEqual(os.path.getsize(files[0]), 20000)
+            with open(files[0]) as f:
+                self.assertEqual(f.readlines(), rows)
+
+            entries = LogEntries.read(files[0], -1, None, None)
+            self.assertEqual(
+                len(entries), sum(1 for row in rows if row.startswith("[")))
+            # both time formats are generated
+            self.assertTrue(any("T" in entry["time"] for entry in entries))
+            self.assertTrue(any(" " in entry["time"] for entry in entries))
+            self.assertTrue(any("Traceback" in entry["msg"]
+                                for entry in entries))
+
+    def test_run_scenario(self):
+        self.assertEqual(parse_size("2MB"), 2 * 1024 * 1024)
+        self.assertEqual(percentile([1, 2, 3, 4], 0.5), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 0.99), 4)
+
+        result = run_scenario(Scenario("noop", lambda: 10, 1024), 5)
+        self.assertEqual(result["scenario"], "noop")
+        self.assertEqual(result["iterations"], 5)
+        self.assertIsNotNone(result["p99"])
+        self.assertIsNotNone(result["mb_per_sec"])
+        self.assertGreater(result["peak_rss"], 0)
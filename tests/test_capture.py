@@ -0,0 +1,48 @@
+import threading
+from unittest.mock import Mock
+
+from nio.testing.test_case import NIOTestCase
+from niocore.common.executable_request import ExecutableRequest
+
+from ..capture import ServiceCapture
+from ..executor import LogExecutor
+from ..manager import LogManager
+
+
+class TestServiceCapture(NIOTestCase):
+
+    def test_install(self):
+        """ Assert services are asked to capture in memory once started
+        """
+        manager = LogManager()
+        manager._memory_capacity = 100
+        manager._service_manager = Mock()
+        manager._service_manager.services = {"service1_id": "service1",
+                                             "service2_id": "service2"}
+        asked = threading.Event()
+
+        def execute_request(service_id, request):
+            if service_id == "service2_id":
+                asked.set()
+                raise RuntimeError("Service is not running")
+
+        manager._service_manager.execute_request.side_effect = \
+            execute_request
+
+        # a round runs as soon as capture starts
+        capture = ServiceCapture(manager, 60)
+        capture.start()
+        self.assertTrue(asked.wait(10))
+        capture.stop()
+        capture.join(10)
+
+        calls = manager._service_manager.execute_request.call_args_list
+        self.assertEqual([call[0][0] for call in calls],
+                         ["service1_id", "service2_id"])
+        request = calls[0][0][1]
+        self.assertIsInstance(request, ExecutableRequest)
+        self.assertEqual(request._type, LogExecutor)
+        self.assertEqual(request._method, "install_memory_handler")
+        self.assertEqual(request._args, (100,))
+        # services not running are reported as such
+        self.assertFalse(manager.install_service_memory_handler("service2_id"))
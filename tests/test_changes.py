@@ -0,0 +1,77 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from nio.testing.test_case import NIOTestCase
+
+from ..changes import LogChanges
+
+
+class TestLogChanges(NIOTestCase):
+
+    def _write(self, filename, level="INFO", mode="a"):
+        with open(os.path.join(self.logs_dir, filename), mode) as f:
+            f.write("[2020-01-01T00:00:00.000Z] NIO [{}] [component] msg\n".
+                    format(level))
+
+    def _assert_changes(self, changes):
+        self._write("main.log")
+        self._write("service.log", "ERROR")
+        open(os.path.join(self.logs_dir, "main.ring"), "w").close()
+
+        result = changes.changes()
+        self.assertTrue(result["reset"])
+        self.assertEqual(result["files"], {
+            "main": {"change": "appeared", "size": 54, "level": "INFO"},
+            "service": {"change": "appeared", "size": 55, "level": "ERROR"}
+        })
+        token = result["token"]
+        result = changes.changes(token)
+        self.assertFalse(result["reset"])
+        self.assertEqual(result["files"], {})
+        self.assertEqual(result["token"], token)
+
+        self._write("service.log", "WARNING")
+        os.rename(os.path.join(self.logs_dir, "main.log"),
+                  os.path.join(self.logs_dir, "main.log.1"))
+        self._write("main.log", "DEBUG")
+        self._write("other.log")
+        result = changes.changes(token)
+        self.assertEqual(result["files"], {
+            "main": {"change": "rotated", "size": 55, "level": "DEBUG"},
+            "service": {"change": "grew", "size": 112, "level": "WARNING"},
+            "other": {"change": "appeared", "size": 54, "level": "INFO"}
+        })
+
+        token = result["token"]
+        os.remove(os.path.join(self.logs_dir, "other.log"))
+        result = changes.changes(token)
+        self.assertEqual(result["files"], {
+            "other": {"change": "removed", "size": 0, "level": None}
+        })
+        # rotation seen in separate refreshes is still a rotation
+        token = result["token"]
+        os.rename(os.path.join(self.logs_dir, "main.log"),
+                  os.path.join(self.logs_dir, "main.log.2"))
+        self.assertEqual(changes.changes(token)["files"]["main"]["change"],
+                         "removed")
+        self._write("main.log", "ERROR")
+        self.assertEqual(changes.changes(token)["files"], {
+            "main": {"change": "rotated", "size": 55, "level": "ERROR"}
+        })
+        # tokens not issued by tracker start over
+        self.assertTrue(changes.changes("unknown.1")["reset"])
+        self.assertEqual(len(changes.changes()["files"]), 2)
+        changes.close()
+
+    def test_changes(self):
+        with tempfile.TemporaryDirectory() as self.logs_dir:
+            self._assert_changes(LogChanges(self.logs_dir))
+
+    def test_changes_polling(self):
+        with tempfile.TemporaryDirectory() as self.logs_dir, \
+                patch(LogChanges.__module__ + "._Inotify",
+                      side_effect=OSError("not available")):
+            changes = LogChanges(self.logs_dir, poll_interval=0)
+            self.assertIsNone(changes._inotify)
+            self._assert_changes(changes)
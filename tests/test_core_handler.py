@@ -4,6 +4,9 @@ from nio.modules.web.http import Request
 from nio.testing.modules.security.module import TestingSecurityModule
 
 from ..core_handler import CoreLogHandler
+from ..log_entries import LogEntryList
+from ..metrics import registry
+from ..read_pool import ReadPoolFull
 from niocore.testing.web_test_case import NIOCoreWebTestCase
 
 
@@ -62,6 +65,177 @@ class TestCoreLogHandler(NIOCoreWebTestCase):
         manager.get_log_entries.assert_called_with("service1", None, 20,
                                                    "ERROR", "component_name")
 
+        # assert source is passed along when provided
+        mock_req.get_params.return_value = {"identifier": "entries",
+                                            "name": "main",
+                                            "source": "memory"}
+        handler.on_get(request, response)
+        manager.get_log_entries.assert_called_with("main", None, 100,
+                                                   None, None,
+                                                   source="memory")
+
+        # assert projection arguments are passed along when provided
+        mock_req.get_params.return_value = {"identifier": "entries",
+                                            "fields": "time,level",
+                                            "msg_max_len": "80"}
+        handler.on_get(request, response)
+        manager.get_log_entries.assert_called_with(
+            None, None, 100, None, None, fields=["time", "level"],
+            msg_max_len=80)
+
+    def test_on_get_truncated(self):
+        manager = MagicMock()
+        result = LogEntryList()
+        result.truncated = True
+        result.resume = {"main.log": 100}
+        manager.get_log_entries.return_value = result
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {
+            "identifier": "entries", "name": "main", "count": "-1",
+            "max_bytes": "1000", "resume": '{"main.log": 200}'}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        manager.get_log_entries.assert_called_with(
+            "main", None, -1, None, None, max_bytes=1000,
+            resume={"main.log": 200})
+        response.set_header.assert_any_call('X-Log-Truncated', 'true')
+        response.set_header.assert_any_call('X-Log-Resume',
+                                            '{"main.log": 100}')
+
+    def test_on_get_federated(self):
+        manager = MagicMock()
+        result = LogEntryList([{"time": "t", "instance": "local"}])
+        result.failed_instances = ["host2:8181"]
+        manager.get_federated_log_entries.return_value = result
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        params = {"identifier": "entries", "level": "ERROR",
+                  "federate": "true"}
+        mock_req.get_params.return_value = params
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        manager.get_federated_log_entries.assert_called_with(
+            params, None, None, 100, "ERROR", None)
+        manager.get_log_entries.assert_not_called()
+        response.set_header.assert_any_call('X-Log-Failed-Instances',
+                                            'host2:8181')
+
+    def test_on_get_unavailable(self):
+        manager = MagicMock()
+        manager.get_log_entries.side_effect = \
+            ReadPoolFull("Too many log reads pending", 5)
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "entries"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        response.set_status.assert_called_with(503)
+        response.set_header.assert_any_call('Retry-After', '5')
+
+        # rejected requests are measured
+        mock_req.get_params.return_value = {"identifier": "entries",
+                                            "metrics": "true"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        headers = dict(call[0] for call in response.set_header.call_args_list)
+        self.assertIn("entries_returned=0", headers["X-Log-Metrics"])
+        self.assertEqual(
+            registry.scrape()["entries"]["duration"]["count"], 1)
+        registry.reset()
+
+    def test_on_get_cache(self):
+        manager = MagicMock()
+        stats = {"hits": 1, "misses": 2}
+        manager.get_cache_stats.return_value = stats
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "cache"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        response_body = response.set_body.call_args[0][0]
+        self.assertEqual(response_body, json.dumps(stats))
+
+    def test_on_get_changes(self):
+        manager = MagicMock()
+        changes = {"token": "t.2", "reset": False, "files": {}}
+        manager.get_log_changes.return_value = changes
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "changes",
+                                            "since": "t.1"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        manager.get_log_changes.assert_called_with("t.1")
+        response_body = response.set_body.call_args[0][0]
+        self.assertEqual(response_body, json.dumps(changes))
+
+    def test_on_get_range(self):
+        manager = MagicMock()
+        manager.get_log_range.return_value = "whole entry\n"
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "range",
+                                            "file": "main.log",
+                                            "offset": "10", "size": "12"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        manager.get_log_range.assert_called_with("main.log", 10, 12)
+        response.set_body.assert_called_with("whole entry\n")
+        response.set_header.assert_called_with(
+            'Content-Type', 'text/plain; charset=utf-8')
+
+    def test_on_get_profile(self):
+        manager = MagicMock()
+        manager.get_log_range.return_value = "whole entry\n"
+        manager.get_logger_names.return_value = [{"name": "a logger"}]
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+
+        # raw text bodies are wrapped as a JSON string
+        mock_req.get_params.return_value = {"identifier": "range",
+                                            "file": "main.log",
+                                            "offset": "10", "size": "12",
+                                            "profile": "true"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        response_body = json.loads(response.set_body.call_args[0][0])
+        self.assertEqual(response_body["result"], "whole entry\n")
+        self.assertIn("functions", response_body["profile"])
+        response.set_header.assert_called_with(
+            'Content-Type', 'application/json')
+
+        # JSON bodies are embedded as they are
+        mock_req.get_params.return_value = {"profile": "true"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        response_body = json.loads(response.set_body.call_args[0][0])
+        self.assertEqual(response_body["result"], [{"name": "a logger"}])
+        response.set_header.assert_called_with(
+            'Content-Type', 'application/json')
+
+    def test_on_get_metrics(self):
+        manager = MagicMock()
+        manager.get_log_entries.return_value = LogEntryList([{"time": "t"}])
+        handler = CoreLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "entries",
+                                            "metrics": "true"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        manager.get_log_entries.assert_called_with(None, None, 100, None,
+                                                   None)
+        headers = dict(call[0] for call in response.set_header.call_args_list)
+        self.assertIn("entries_returned=1", headers["X-Log-Metrics"])
+        self.assertIn("serialize;dur=", headers["Server-Timing"])
+
+        mock_req.get_params.return_value = {"identifier": "metrics"}
+        handler.on_get(mock_req, response)
+        response_body = json.loads(response.set_body.call_args[0][0])
+        self.assertGreaterEqual(
+            response_body["entries"]["entries_returned"]["count"], 1)
+        registry.reset()
+
     def test_on_post(self):
         manager = MagicMock()
         mock_req = MagicMock(spec=Request)
@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+from unittest.mock import MagicMock
+from nio.modules.web.http import Request
+from nio.testing.modules.security.module import TestingSecurityModule
+
+from ..export_handler import ExportLogHandler
+from ..log_entries import LogEntry
+from niocore.testing.web_test_case import NIOCoreWebTestCase
+
+
+class TestExportLogHandler(NIOCoreWebTestCase):
+
+    def get_module(self, module_name):
+        # Don't want to test permissions, use the test module
+        if module_name == 'security':
+            return TestingSecurityModule()
+        else:
+            return super().get_module(module_name)
+
+    def _export(self, manager, params):
+        handler = ExportLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = params
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        body = b"".join(response.set_body.call_args[0][0])
+        return response, body
+
+    def test_export_files(self):
+        with tempfile.TemporaryDirectory() as logs_dir:
+            files = []
+            for filename, contents in (("main.log.1", "a" * 1000),
+                                       ("main.log", "b" * 10)):
+                file_path = os.path.join(logs_dir, filename)
+                with open(file_path, "w") as f:
+                    f.write(contents)
+                os.utime(file_path, (1577836800, 1577836800))
+                files.append((filename, file_path))
+            manager = MagicMock()
+            manager.get_export_files.return_value = files
+
+            # a single log is streamed as it is
+            response, body = self._export(manager, {"name": "main"})
+            manager.get_export_files.assert_called_with("main", None)
+            self.assertEqual(body, b"a" * 1000 + b"b" * 10)
+            response.set_header.assert_any_call(
+                'Content-Disposition', 'attachment; filename="main.log"')
+            manager.iter_export_entries.assert_not_called()
+
+            # all logs are streamed as a tar archive
+            response, body = self._export(manager, {})
+            response.set_header.assert_any_call(
+                'Content-Type', 'application/x-tar')
+            with tarfile.open(fileobj=io.BytesIO(body)) as archive:
+                self.assertEqual(archive.getnames(),
+                                 ["main.log.1", "main.log"])
+                self.assertEqual(
+                    archive.extractfile("main.log.1").read(), b"a" * 1000)
+                # members keep modification time of their files
+                self.assertEqual(archive.getmember("main.log.1").mtime,
+                                 1577836800)
+
+    def test_export_entries(self):
+        entries = [LogEntry(time="t1", level="INFO", msg="msg1\n"),
+                   LogEntry(time="t2", level="INFO", msg="msg,2\n")]
+        manager = MagicMock()
+        manager.get_export_files.return_value = [("main.log", "main.log")]
+        manager.iter_export_entries.return_value = iter(entries)
+
+        _, body = self._export(manager, {"level": "INFO"})
+        manager.iter_export_entries.assert_called_with(
+            [("main.log", "main.log")], "INFO", None, None)
+        self.assertEqual(
+            [json.loads(row) for row in body.decode().splitlines()],
+            entries)
+
+        manager.iter_export_entries.return_value = iter(entries)
+        _, body = self._export(manager, {"fields": "level,msg",
+                                         "format": "csv"})
+        self.assertEqual(body.decode(),
+                         'level,msg\r\nINFO,"msg1\n"\r\nINFO,"msg,2\n"\r\n')
@@ -0,0 +1,161 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from nio.testing.test_case import NIOTestCase
+
+from ..federation import Federation, PeerConnectionPool
+from ..log_entries import LogEntry, LogEntryList
+from ..manager import LogManager
+
+
+class _PeerServer(object):
+    """ Stand-in nio instance serving canned log entries
+    """
+
+    def __init__(self, entries, delay=0, status=200):
+        self.entries = entries
+        self.delay = delay
+        self.status = status
+        self.queries = []
+        self.clients = set()
+        peer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                peer.queries.append(
+                    (parts.path, parse_qs(parts.query),
+                     self.headers.get("Authorization")))
+                peer.clients.add(self.client_address)
+                time.sleep(peer.delay)
+                body = json.dumps(peer.entries).encode()
+                self.send_response(peer.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                # clients giving up on slow responses close connections,
+                # any other error is reported
+                if not isinstance(sys.exc_info()[1],
+                                  (BrokenPipeError, ConnectionResetError)):
+                    super().handle_error(request, client_address)
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self._server.server_port)
+        threading.Thread(target=self._server.serve_forever,
+                         daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TestFederation(NIOTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+        super().tearDown()
+
+    def _serve(self, entries, **kwargs):
+        server = _PeerServer(entries, **kwargs)
+        self.servers.append(server)
+        return server
+
+    def test_connections_reused(self):
+        server = self._serve([])
+        pool = PeerConnectionPool(server.url, 5)
+        for _ in range(3):
+            status, _, body = pool.get("/log/entries")
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(body.decode()), [])
+        # a single keep-alive connection served all requests
+        self.assertEqual(len(server.clients), 1)
+        pool.close()
+
+    def test_query(self):
+        entries = [{"time": "2020-01-01T00:00:01.000Z", "msg": "peer"}]
+        server = self._serve(entries)
+        slow = self._serve(entries, delay=1)
+        failing = self._serve({"error": "failed"}, status=503)
+        federation = Federation([server.url, slow.url, failing.url], 0.2,
+                                {"Authorization": "token"})
+
+        local, responses, failed = federation.query(
+            "/log/entries", {"level": "ERROR"}, lambda: "local")
+        self.assertEqual(local, "local")
+        self.assertEqual(responses,
+                         [(server.url[len("http://"):], entries, False)])
+        self.assertEqual(set(failed), {slow.url[len("http://"):],
+                                       failing.url[len("http://"):]})
+        self.assertEqual(server.queries,
+                         [("/log/entries", {"level": ["ERROR"]}, "token")])
+        federation.close()
+
+    def test_concurrent_queries(self):
+        """ Assert concurrent queries do not wait for each other's peer calls
+        """
+        entries = [{"time": "2020-01-01T00:00:01.000Z", "msg": "peer"}]
+        slow = self._serve(entries, delay=0.3)
+        federation = Federation([slow.url], 0.5, queries=2)
+        results = []
+
+        def query():
+            results.append(federation.query("/log/entries", {},
+                                            lambda: "local"))
+
+        threads = [threading.Thread(target=query) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([failed for _, _, failed in results], [[], []])
+        federation.close()
+
+    def test_federated_log_entries(self):
+        server = self._serve([
+            {"time": "2020-01-01T00:00:01.000Z", "msg": "peer1"},
+            {"time": "2020-01-01T00:00:04.000Z", "msg": "peer2"}
+        ])
+        manager = LogManager()
+        manager._federation = Federation([server.url], 5)
+        local = LogEntryList([
+            LogEntry({"time": "2020-01-01T00:00:02.000Z", "msg": "local1"}),
+            LogEntry({"time": "2020-01-01T00:00:03.000Z", "msg": "local2"})
+        ])
+        with patch.object(manager, "get_log_entries",
+                          return_value=local) as mock_get:
+            result = manager.get_federated_log_entries(
+                {"identifier": "entries", "federate": "true", "count": "3",
+                 "fields": "msg", "profile": "true", "metrics": "true"},
+                None, None, 3, None, None, fields=["msg"])
+        mock_get.assert_called_with(None, None, 3, None, None,
+                                    fields=["msg", "time"])
+        self.assertEqual(server.queries[0][1],
+                         {"count": ["3"], "fields": ["msg,time"]})
+        peer = server.url[len("http://"):]
+        self.assertEqual(result, [
+            {"msg": "local1", "instance": "local"},
+            {"msg": "local2", "instance": "local"},
+            {"msg": "peer2", "instance": peer}
+        ])
+        self.assertEqual(result.failed_instances, [])
+        manager._federation.close()
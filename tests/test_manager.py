@@ -1,4 +1,4 @@
-from unittest.mock import ANY, Mock
+from unittest.mock import ANY, Mock, patch
 
 from niocore.common.executable_request import ExecutableRequest
 from niocore.core.context import CoreContext
@@ -7,6 +7,8 @@ from niocore.testing.test_case import NIOCoreTestCase
 from ..manager import LogManager
 from ..core_handler import CoreLogHandler
 from ..service_handler import ServiceLogHandler
+from ..export_handler import ExportLogHandler
+from ..watch_handler import WatchLogHandler
 from ..executor import LogExecutor
 
 
@@ -21,16 +23,24 @@ class TestLogManager(NIOCoreTestCase):
         manager = LogManager()
         manager.get_dependency = Mock(return_value=rest_manager)
         manager.configure(context)
+        # inventories are not reused unless they are prewarmed
+        self.assertEqual(manager._logger_names_ttl, 0)
 
         manager.start()
         rest_manager.add_web_handler.assert_called_with(ANY)
-        self.assertEqual(2, len(rest_manager.add_web_handler.call_args_list))
+        self.assertEqual(4, len(rest_manager.add_web_handler.call_args_list))
         self.assertTrue(
             isinstance(rest_manager.add_web_handler.call_args_list[0][0][0],
                        CoreLogHandler))
         self.assertTrue(
             isinstance(rest_manager.add_web_handler.call_args_list[1][0][0],
                        ServiceLogHandler))
+        self.assertTrue(
+            isinstance(rest_manager.add_web_handler.call_args_list[2][0][0],
+                       ExportLogHandler))
+        self.assertTrue(
+            isinstance(rest_manager.add_web_handler.call_args_list[3][0][0],
+                       WatchLogHandler))
 
     def test_get_logger_names(self):
         manager = LogManager()
@@ -126,3 +136,60 @@ class TestLogManager(NIOCoreTestCase):
         self.assertEqual(request._type, LogExecutor)
         self.assertEqual(request._method, "get_logger_names")
         self.assertDictEqual(request._kwargs, {"add_level": True})
+
+    def test_get_service_logger_names_cached(self):
+        # asserts service logger inventories are reused until a level is set
+        manager = LogManager()
+        manager._logger_names_ttl = 60
+        manager._service_manager = Mock()
+        manager._service_manager.identify_service = \
+            Mock(return_value="service1_id")
+        loggers = [{"name": "logger1", "level": "INFO"}]
+        manager._service_manager.execute_request = Mock(return_value=loggers)
+
+        self.assertEqual(manager.get_service_logger_names("service1", True),
+                         loggers)
+        self.assertEqual(manager.get_service_logger_names("service1", True),
+                         loggers)
+        # names alone are derived from inventory with levels
+        self.assertEqual(manager.get_service_logger_names("service1", False),
+                         [{"name": "logger1"}])
+        self.assertEqual(manager._service_manager.execute_request.call_count,
+                         1)
+
+        manager.set_service_log_level("service1", "logger1", "DEBUG")
+        manager.get_service_logger_names("service1", True)
+        self.assertEqual(manager._service_manager.execute_request.call_count,
+                         3)
+
+    def test_get_service_memory_entries(self):
+        # asserts running services are asked for entries held in memory
+        # and that files are read when not enough history is available
+        manager = LogManager()
+        manager._memory_capacity = 100
+        manager._service_manager = Mock()
+        manager._service_manager.services = {"service1_id": "service1"}
+        manager._service_manager.identify_service = \
+            Mock(return_value="service1_id")
+        entries = [{"msg": "from service memory"}]
+        manager._service_manager.execute_request = Mock(return_value=entries)
+
+        result = manager.get_log_entries("service1", entries_count=10,
+                                         level="ERROR", source="memory")
+        self.assertEqual(result, entries)
+        (args, kwargs) = manager._service_manager.execute_request.call_args
+        self.assertEqual(args[0], "service1_id")
+        request = args[1]
+        self.assertIsInstance(request, ExecutableRequest)
+        self.assertEqual(request._type, LogExecutor)
+        self.assertEqual(request._method, "get_log_entries")
+        self.assertEqual(request._args, (10, "ERROR", None, 100))
+
+        # service not running, log file is used
+        manager._service_manager.execute_request = \
+            Mock(side_effect=RuntimeError)
+        with patch(LogManager.__module__ + ".path") as mock_path:
+            mock_path.isfile.return_value = False
+            result = manager.get_log_entries("service1", entries_count=10,
+                                             source="memory")
+        self.assertEqual(result, [])
@@ -1,10 +1,15 @@
+import math
+import os
+import tempfile
+import threading
 from unittest.mock import MagicMock, patch
 
 from nio.testing.test_case import NIOTestCase
 from nio.util.nio_time import get_nio_time
 
-from ..log_entries import LogEntries, LogEntry
+from ..log_entries import LogEntries, LogEntry, ReadBudget, ReadCancelled
 from ..manager import LogManager
+from ..query_cache import QueryCache
 
 
 class TestLogManagerEntries(NIOTestCase):
@@ -28,7 +33,8 @@ class TestLogManagerEntries(NIOTestCase):
         """
         manager = LogManager()
         self._patch_service_list(manager, {"service_id": "service_name"})
-        with patch.object(LogEntries, "_get_file_contents"):
+        with patch.object(LogEntries, "_get_file_head", return_value=b""), \
+                patch.object(LogEntries, "_get_file_contents"):
             result = manager.get_log_entries("service_name", entries_count=2)
         self.assertEqual(result, [])
 
@@ -38,7 +44,9 @@ class TestLogManagerEntries(NIOTestCase):
         """
         manager = LogManager()
         self._patch_service_list(manager, {"service_id": "service_name"})
-        with patch.object(LogEntries, "_get_file_contents") as mock_contents:
+        with patch.object(LogEntries, "_get_file_head", return_value=b""), \
+                patch.object(LogEntries, "_get_file_contents") as \
+                mock_contents:
             mock_contents.return_value = []
             result = manager.get_log_entries("service_name", entries_count=2)
             self.assertEqual(len(result), 0)
@@ -182,6 +190,610 @@ class TestLogManagerEntries(NIOTestCase):
                 }
             )
 
+    @patch(LogManager.__module__ + ".path")
+    def test_log_entries_from_memory(self, _):
+        """ Assert entries are served from memory with a file fallback
+        """
+        manager = LogManager()
+        manager._memory_handler = MagicMock()
+        memory_entries = [LogEntry({"time": 1, "msg": "from memory"})]
+        manager._memory_handler.buffer.get.return_value = memory_entries
+        with patch.object(LogEntries, "read") as mock_read:
+            result = manager.get_log_entries(
+                "main", entries_count=1, level="ERROR", source="memory")
+            self.assertEqual(result, memory_entries)
+            manager._memory_handler.buffer.get.assert_called_with(
+                1, "ERROR", None)
+            self.assertEqual(mock_read.call_count, 0)
+
+            # not enough history in memory, file is read
+            manager._memory_handler.buffer.get.return_value = None
+            result = manager.get_log_entries(
+                "main", entries_count=1, source="memory")
+            self.assertEqual(result, mock_read.return_value)
+            self.assertEqual(mock_read.call_count, 1)
+
+    def test_log_entries_cache(self):
+        """ Assert results are cached until the log file changes
+        """
+        manager = LogManager()
+        manager._query_cache = QueryCache(10, 1024 * 1024)
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env:
+            env.get_path.return_value = logs_dir
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                f.write("[{}] NIO [INFO] [component] msg1\n".format(
+                    get_nio_time()))
+            result = manager.get_log_entries("main", entries_count=10)
+            self.assertEqual(len(result), 1)
+            with patch.object(LogEntries, "read") as mock_read:
+                self.assertEqual(
+                    manager.get_log_entries("main", entries_count=10), result)
+                self.assertEqual(mock_read.call_count, 0)
+
+            with open(filename, "a") as f:
+                f.write("[{}] NIO [INFO] [component] msg2\n".format(
+                    get_nio_time()))
+            result = manager.get_log_entries("main", entries_count=10)
+            self.assertEqual(len(result), 2)
+            stats = manager.get_cache_stats()
+            self.assertEqual(stats["hits"], 1)
+            self.assertEqual(stats["misses"], 2)
+
+    def test_read_budget(self):
+        """ Assert reading stops when budget runs out and can be resumed
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                for i in range(5):
+                    f.write("[{}] NIO [ERROR] [component] msg{}\n".format(
+                        get_nio_time(), i))
+                    f.write("Traceback line{}\n".format(i))
+
+            entries = LogEntries.read(filename, -1, None, None,
+                                      budget=ReadBudget(max_entries=2))
+            self.assertTrue(entries.truncated)
+            self.assertEqual([entry["msg"] for entry in entries],
+                             ["msg3\nTraceback line3\n",
+                              "msg4\nTraceback line4\n"])
+            resume = entries.resume[filename]
+
+            entries = LogEntries.read(filename, -1, None, None,
+                                      budget=ReadBudget(max_entries=2),
+                                      end=resume)
+            self.assertTrue(entries.truncated)
+            self.assertEqual([entry["msg"][:4] for entry in entries],
+                             ["msg1", "msg2"])
+
+            entries = LogEntries.read(filename, -1, None, None,
+                                      budget=ReadBudget(),
+                                      end=entries.resume[filename])
+            self.assertFalse(entries.truncated)
+            self.assertEqual([entry["msg"][:4] for entry in entries],
+                             ["msg0"])
+            self.assertEqual(entries.resume[filename], 0)
+
+            # bytes limit stops reading before scanning whole file
+            budget = ReadBudget(max_bytes=10)
+            entries = LogEntries.read(filename, -1, None, None, budget=budget)
+            self.assertTrue(entries.truncated)
+            self.assertLess(budget.bytes_read, os.path.getsize(filename))
+
+    def test_log_entries_budget(self):
+        """ Assert requested budget limits are capped by configured ones
+        """
+        manager = LogManager()
+        manager._max_entries = 3
+        self.assertEqual(manager._get_budget_limits(None, None, None),
+                         (None, None, 3))
+        self.assertEqual(manager._get_budget_limits(100, 1.5, 10),
+                         (100, 1.5, 3))
+        self.assertEqual(manager._get_budget_limits(None, None, 2),
+                         (None, None, 2))
+
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env:
+            env.get_path.return_value = logs_dir
+            for name in ("main", "service"):
+                with open(os.path.join(logs_dir, name + ".log"), "w") as f:
+                    for i in range(3):
+                        f.write("[{}] NIO [INFO] [{}] msg{}\n".format(
+                            get_nio_time(), name, i))
+            result = manager.get_log_entries(None, entries_count=-1)
+            self.assertTrue(result.truncated)
+            self.assertEqual(len(result), 3)
+            self.assertEqual(set(result.resume), {"main.log", "service.log"})
+
+            # resuming reads remaining entries
+            manager._max_entries = 0
+            result = manager.get_log_entries(None, entries_count=-1,
+                                             resume=result.resume)
+            self.assertEqual(len(result), 3)
+
+    def test_read_parallel(self):
+        """ Assert parsing chunks in parallel matches a sequential read
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                # file starting with extended rows
+                f.write("orphan row\n")
+                for i in range(200):
+                    level = ["DEBUG", "INFO", "ERROR"][i % 3]
+                    f.write("[{}] NIO [{}] [component{}] msg{}\n".format(
+                        get_nio_time(), level, i % 2, i))
+                    for j in range(i % 4):
+                        f.write("Traceback {} row {}\n".format(i, j))
+
+            for level, component in ((None, None), ("INFO", None),
+                                     ("ERROR", "component1")):
+                expected = LogEntries.read(filename, -1, level, component)
+                entries = LogEntries.read_parallel(filename, level,
+                                                   component, 3)
+                self.assertEqual(entries, expected)
+
+            # cancelled reads stop waiting for chunks
+            cancel = threading.Event()
+            cancel.set()
+            with self.assertRaises(ReadCancelled):
+                LogEntries.read_parallel(filename, None, None, 3,
+                                         cancel=cancel)
+            LogEntries.close()
+
+            with patch(LogEntries.__module__ + "._PARALLEL_MIN_SIZE", 0), \
+                    patch.object(LogEntries, "read_parallel") as mock_parallel:
+                LogEntries.read(filename, -1, None, None, cancel=cancel,
+                                workers=2)
+                mock_parallel.assert_called_with(filename, None, None, 2,
+                                                 None, None, cancel)
+                # tail queries are not worth parsing in parallel
+                LogEntries.read(filename, 10, None, None, workers=2)
+                self.assertEqual(mock_parallel.call_count, 1)
+
+    def test_parse_range(self):
+        """ Assert entries straddling a range boundary are reported
+        """
+        nio_time = get_nio_time()
+        rows = [
+            "Traceback row 1\n",
+            "[{}] NIO [INFO] [component] msg1\n".format(nio_time),
+            "[{}] NIO [DEBUG] [component] msg2\n".format(nio_time),
+            "filtered row\n",
+            "[{}] NIO [ERROR] [component] msg3\n".format(nio_time),
+            "Traceback row 2\n"
+        ]
+        with patch.object(LogEntries, "_get_file_range") as mock_range:
+            mock_range.return_value = rows
+            leading, entries, has_first_row, open_ended = \
+                LogEntries.parse_range("file", 0, 100, "INFO", None)
+        self.assertEqual(leading, "Traceback row 1\n")
+        self.assertEqual([entry["msg"] for entry in entries],
+                         ["msg1\n", "msg3\nTraceback row 2\n"])
+        self.assertTrue(has_first_row)
+        self.assertTrue(open_ended)
+
+    def test_read_json_lines(self):
+        """ Assert JSON lines files are detected and parsed
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "service.log")
+            with open(filename, "w") as f:
+                f.write('{"time": "2020-01-01T00:00:00.000Z", '
+                        '"level": "info", "name": "block", "msg": "msg1", '
+                        '"request_id": 7}\n')
+                f.write('{"timestamp": "2020-01-01T00:00:01+00:00", '
+                        '"levelname": "ERROR", "component": "block", '
+                        '"message": "msg2"}\n')
+                f.write("Traceback (most recent call last):\n")
+                f.write('{"time": 1577836802.5, "level": "DEBUG", '
+                        '"component": "other", "msg": "msg3"}\n')
+
+            entries = LogEntries.read(filename, -1, None, None)
+            self.assertEqual(entries, [
+                {"time": "2020-01-01T00:00:00.000Z", "level": "INFO",
+                 "component": "block", "msg": "msg1\n", "request_id": 7},
+                {"time": "2020-01-01T00:00:01.000Z", "level": "ERROR",
+                 "component": "block",
+                 "msg": "msg2\nTraceback (most recent call last):\n"},
+                {"time": "2020-01-01T00:00:02.500Z", "level": "DEBUG",
+                 "component": "other", "msg": "msg3\n"}
+            ])
+
+            entries = LogEntries.read(filename, -1, "INFO", "block",
+                                      fields=["msg", "request_id"])
+            self.assertEqual(entries, [
+                {"msg": "msg1\n", "request_id": 7},
+                {"msg": "msg2\nTraceback (most recent call last):\n"}
+            ])
+            _, entries, _, _ = LogEntries.parse_range(
+                filename, 0, os.path.getsize(filename), "ERROR", None)
+            self.assertEqual(len(entries), 1)
+
+    def test_iter_forward(self):
+        """ Assert reading forward matches a backward read
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                f.write("orphan row\n")
+                for i in range(200):
+                    level = ["DEBUG", "INFO", "ERROR"][i % 3]
+                    f.write("[{}] NIO [{}] [component] msg{}\n".format(
+                        get_nio_time(), level, i))
+                    for j in range(i % 4):
+                        f.write("Traceback {} row {}\n".format(i, j))
+
+            for level in (None, "ERROR"):
+                expected = LogEntries.read(filename, -1, level, None)
+                entries = list(LogEntries.iter_forward(filename, level, None))
+                self.assertEqual(entries, expected)
+
+    def test_iter_entries(self):
+        """ Assert entries are streamed merged, and streams can be resumed
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            files = [os.path.join(logs_dir, name)
+                     for name in ("main.log", "service.log")]
+            for i, filename in enumerate(files):
+                with open(filename, "w") as f:
+                    for second in range(i, 10, 2):
+                        f.write("[2020-01-01T00:00:0{}.000Z] NIO [INFO] "
+                                "[component] msg{}\n".format(second, second))
+                        f.write("Traceback row\n")
+
+            with LogEntries.iter_entries(files, fields=["msg"]) as stream:
+                entries = [next(stream) for _ in range(3)]
+            self.assertEqual(entries, [{"msg": "msg9\nTraceback row\n"},
+                                       {"msg": "msg8\nTraceback row\n"},
+                                       {"msg": "msg7\nTraceback row\n"}])
+            # resuming continues right after entries consumed
+            stream = LogEntries.iter_entries(
+                files, positions=stream.positions,
+                filters=[lambda entry: entry["msg"] != "msg5\n"])
+            self.assertEqual([entry["msg"][:4] for entry in stream],
+                             ["msg6", "msg5", "msg4", "msg3", "msg2", "msg1",
+                              "msg0"])
+            self.assertEqual(stream.positions, {files[0]: 0, files[1]: 0})
+
+            # custom filters see whole messages
+            stream = LogEntries.iter_entries(
+                files, newest_first=False, msg_max_len=4,
+                filters=[lambda entry: "Traceback" in entry["msg"]])
+            entries = [next(stream), next(stream)]
+            self.assertEqual([entry["msg"] for entry in entries],
+                             ["msg0", "msg1"])
+            stream.close()
+            stream = LogEntries.iter_entries(
+                files, "ERROR", newest_first=False,
+                positions=stream.positions)
+            self.assertEqual(list(stream), [])
+            self.assertEqual(stream.positions,
+                             {filename: os.path.getsize(filename)
+                              for filename in files})
+
+            with self.assertRaises(ValueError):
+                LogEntries.iter_entries(files, newest_first=False,
+                                        collapse=True)
+
+    def test_iter_forward_growing(self):
+        """ Assert resuming forward picks up rows still being written
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                f.write("[2020-01-01T00:00:00.000Z] NIO [INFO] [c] first\n"
+                        "[2020-01-01T00:00:01.000Z] NIO [ERROR] [c] partial")
+
+            # row without a newline is not read yet
+            stream = LogEntries.iter_entries([filename], newest_first=False)
+            self.assertEqual([entry["msg"] for entry in stream], ["first\n"])
+            # last entry is read again when resuming, rows may be added
+            self.assertEqual(stream.positions, {filename: 0})
+            with open(filename, "a") as f:
+                f.write(" rest of line\nTraceback extra\n")
+            stream = LogEntries.iter_entries([filename], newest_first=False,
+                                             positions=stream.positions)
+            self.assertEqual([entry["msg"] for entry in stream],
+                             ["first\n", "partial rest of line\n"
+                                         "Traceback extra\n"])
+
+            # when following, last entry waits for a later one
+            stream = LogEntries.iter_entries([filename], newest_first=False,
+                                             follow=True)
+            self.assertEqual([entry["msg"] for entry in stream], ["first\n"])
+            with open(filename, "a") as f:
+                f.write("Traceback later\n"
+                        "[2020-01-01T00:00:02.000Z] NIO [INFO] [c] next\n")
+            stream = LogEntries.iter_entries([filename], newest_first=False,
+                                             positions=stream.positions,
+                                             follow=True)
+            self.assertEqual([entry["msg"] for entry in stream],
+                             ["partial rest of line\nTraceback extra\n"
+                              "Traceback later\n"])
+
+    def test_export_entries(self):
+        """ Assert exported files are ordered and their entries merged
+        """
+        manager = LogManager()
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env:
+            env.get_path.return_value = logs_dir
+            for filename in ("main.log.2", "main.log.1", "main.log",
+                             "service.log"):
+                with open(os.path.join(logs_dir, filename), "w") as f:
+                    f.write("[{}] NIO [INFO] [component] {}\n".format(
+                        get_nio_time(), filename))
+            for filename in ("main.ring", "main.log.old"):
+                open(os.path.join(logs_dir, filename), "w").close()
+
+            files = manager.get_export_files("main")
+            self.assertEqual([filename for filename, _ in files],
+                             ["main.log.2", "main.log.1", "main.log"])
+
+            files = manager.get_export_files()
+            self.assertEqual(len(files), 4)
+            entries = list(manager.iter_export_entries(
+                files, fields=["msg"]))
+            self.assertEqual([entry["msg"] for entry in entries],
+                             ["main.log.2\n", "main.log.1\n", "main.log\n",
+                              "service.log\n"])
+            self.assertEqual(set(entries[0]), {"msg"})
+
+        # logs whose names contain ".log" are merged rather than chained
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env:
+            env.get_path.return_value = logs_dir
+            for filename, seconds in (("a.log", (1, 3)),
+                                      ("a.logger.log", (2,))):
+                with open(os.path.join(logs_dir, filename), "w") as f:
+                    for second in seconds:
+                        f.write("[2020-01-01T00:00:0{}.000Z] NIO [INFO] "
+                                "[c] {}\n".format(second, second))
+            entries = manager.iter_export_entries(manager.get_export_files())
+            self.assertEqual([entry["msg"] for entry in entries],
+                             ["1\n", "2\n", "3\n"])
+
+    def test_read_projection(self):
+        """ Assert fields and message length are limited when reading
+        """
+        nio_time = get_nio_time()
+        lines = [
+            "[{}] NIO [ERROR] [component] msg1\n".format(nio_time),
+            "Traceback (most recent call last):\n",
+            "socket.gaierror: [Errno -2] Name or service not known\n"
+        ]
+        with patch.object(LogEntries, "_get_file_size", return_value=0), \
+                patch.object(LogEntries, "_get_file_contents") as \
+                mock_contents:
+            mock_contents.return_value = list(reversed(lines))
+            entries = LogEntries.read("file", -1, None, None,
+                                      fields=["time", "level"])
+            self.assertEqual(entries, [{"time": nio_time, "level": "ERROR"}])
+
+            mock_contents.return_value = list(reversed(lines))
+            entries = LogEntries.read("file", -1, None, None, msg_max_len=10)
+            self.assertEqual(entries[0]["msg"], "msg1\nTrace")
+            self.assertEqual(entries[0]["component"], "component")
+
+            # time is used for merging but not returned
+            mock_contents.return_value = list(reversed(lines))
+            entries = LogEntries.read_all(["file"], -1, None, None,
+                                          fields=["level"])
+            self.assertEqual(entries, [{"level": "ERROR"}])
+
+    def test_read_oversized(self):
+        """ Assert oversized rows and continuation rows are truncated
+        """
+        manager = LogManager()
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env, \
+                patch.object(LogEntries, "max_row_size", 100), \
+                patch.object(LogEntries, "max_extended_rows", 3):
+            env.get_path.return_value = logs_dir
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                f.write("[2020-01-01T00:00:00.000Z] NIO [INFO] [block] "
+                        "{}\n".format("a" * 200000))
+                offset = f.tell()
+                f.write("[2020-01-01T00:00:01.000Z] NIO [ERROR] [block] "
+                        "failed\n")
+                for i in range(10):
+                    f.write("Traceback row {}\n".format(i))
+                f.write("[2020-01-01T00:00:02.000Z] NIO [INFO] [block] ok\n")
+
+            entries = LogEntries.read(filename, -1, None, None)
+            self.assertEqual(len(entries), 3)
+            self.assertEqual(entries[0]["msg"],
+                             "a" * 54 + "[... 199947 bytes truncated]\n")
+            self.assertEqual(entries[0]["truncated"],
+                             {"file": "main.log", "offset": 0,
+                              "size": offset})
+            self.assertEqual(entries[1]["msg"],
+                             "failed\nTraceback row 0\nTraceback row 1\n"
+                             "Traceback row 2\n[... 7 rows, 112 bytes "
+                             "truncated]\n")
+            size = entries[1]["truncated"]["size"]
+            self.assertEqual(entries[1]["truncated"]["offset"], offset)
+            self.assertNotIn("truncated", entries[2])
+            # entries are truncated the same way when read forward
+            self.assertEqual(
+                list(LogEntries.iter_forward(filename, None, None)), entries)
+
+            # whole entry is fetched through its range
+            text = manager.get_log_range("main.log", offset, size)
+            self.assertTrue(text.startswith("[2020-01-01T00:00:01.000Z]"))
+            self.assertTrue(text.endswith("Traceback row 9\n"))
+            with self.assertRaises(ValueError):
+                manager.get_log_range("../main.log", offset, size)
+
+    def test_read_oversized_json(self):
+        """ Assert oversized JSON records keep their fields when truncated
+        """
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch.object(LogEntries, "max_row_size", 100):
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                f.write('{"time": "2020-01-01T00:00:00.000Z", '
+                        '"level": "INFO", "msg": "before"}\n')
+                offset = f.tell()
+                f.write('{"time": "2020-01-01T00:00:01.000Z", '
+                        '"level": "ERROR", "name": "block", '
+                        '"msg": "payload \\" %s"}\n' % ("x" * 100000))
+                size = f.tell() - offset
+                f.write('{"time": "2020-01-01T00:00:02.000Z", '
+                        '"level": "INFO", "msg": "after"}\n')
+
+            entries = LogEntries.read(filename, -1, None, None)
+            self.assertEqual([entry["msg"] for entry in entries[::2]],
+                             ["before\n", "after\n"])
+            self.assertNotIn("truncated", entries[0])
+            self.assertEqual(entries[1]["level"], "ERROR")
+            self.assertEqual(entries[1]["component"], "block")
+            self.assertEqual(entries[1]["msg"],
+                             'payload " ' + "x" * 9 +
+                             "[... {} bytes truncated]\n".format(size - 100))
+            self.assertEqual(entries[1]["truncated"],
+                             {"file": "main.log", "offset": offset,
+                              "size": size})
+            self.assertEqual(LogEntries.read(filename, -1, "ERROR", None),
+                             [entries[1]])
+            self.assertEqual(
+                list(LogEntries.iter_forward(filename, None, None)), entries)
+
+    def test_read_collapse(self):
+        """ Assert identical entries are folded into counted groups
+        """
+        rows = [
+            "[2020-01-01T00:00:00.000Z] NIO [WARNING] [block] repeated\n",
+            "[2020-01-01T00:00:01.000Z] NIO [WARNING] [block] repeated\n",
+            "[2020-01-01T00:00:02.000Z] NIO [INFO] [block] other\n",
+            "[2020-01-01T00:00:03.000Z] NIO [WARNING] [block] repeated\n",
+            "[2020-01-01T00:00:04.000Z] NIO [WARNING] [block] repeated\n",
+        ]
+        with patch.object(LogEntries, "_get_file_size", return_value=0), \
+                patch.object(LogEntries, "_get_file_contents") as \
+                mock_contents:
+            mock_contents.return_value = list(reversed(rows))
+            entries = LogEntries.read("file", -1, None, None, collapse=True)
+            self.assertEqual([entry["count"] for entry in entries], [2, 1, 2])
+            self.assertEqual(entries[2]["time"], "2020-01-01T00:00:04.000Z")
+            self.assertEqual(entries[2]["first_time"],
+                             "2020-01-01T00:00:03.000Z")
+            self.assertEqual(entries[2]["last_time"],
+                             "2020-01-01T00:00:04.000Z")
+
+            # groups count as one entry
+            mock_contents.return_value = list(reversed(rows))
+            entries = LogEntries.read("file", 2, None, None, collapse=True)
+            self.assertEqual([entry["msg"] for entry in entries],
+                             ["other\n", "repeated\n"])
+
+            mock_contents.return_value = list(reversed(rows))
+            entries = LogEntries.read("file", -1, None, None, collapse=True,
+                                      collapse_window=10)
+            self.assertEqual([entry["count"] for entry in entries], [1, 4])
+            self.assertEqual(entries[1]["first_time"],
+                             "2020-01-01T00:00:00.000Z")
+
+            mock_contents.return_value = list(reversed(rows))
+            entries = LogEntries.read("file", -1, None, None, collapse=True,
+                                      collapse_window=1.5)
+            self.assertEqual([entry["count"] for entry in entries],
+                             [2, 1, 2])
+
+            # oldest group keeps folding entries after the last one needed
+            flood = [rows[2].replace("02.000", "00.000")] + \
+                [rows[0].replace("00.000", "{:02}.000".format(i))
+                 for i in range(1, 11)] + [rows[2]]
+            mock_contents.return_value = list(reversed(flood))
+            entries = LogEntries.read("file", 2, None, None, collapse=True)
+            self.assertEqual([entry["count"] for entry in entries], [10, 1])
+            self.assertEqual(entries[0]["first_time"],
+                             "2020-01-01T00:00:01.000Z")
+
+            # entries are told apart by their whole message
+            distinct = [rows[0].replace("repeated", "distinct{}".format(i))
+                        for i in range(6)]
+            mock_contents.return_value = list(reversed(distinct))
+            entries = LogEntries.read("file", -1, None, None, collapse=True,
+                                      fields=["time", "level"])
+            self.assertEqual([entry["count"] for entry in entries], [1] * 6)
+            self.assertEqual(set(entries[0]),
+                             {"time", "level", "count", "first_time",
+                              "last_time"})
+            mock_contents.return_value = list(reversed(distinct))
+            entries = LogEntries.read("file", -1, None, None, collapse=True,
+                                      msg_max_len=4)
+            self.assertEqual([entry["count"] for entry in entries], [1] * 6)
+            self.assertEqual(entries[0]["msg"], "dist")
+
+        entries = LogEntries.collapse(
+            [LogEntry({"time": 1, "level": "INFO", "msg": "a"}),
+             LogEntry({"time": 2, "level": "INFO", "msg": "a"})])
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["count"], 2)
+
+    def test_sample(self):
+        """ Assert a sample is spread over the file with an estimated count
+        """
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                for i in range(20000):
+                    level = "ERROR" if i % 4 == 0 else "INFO"
+                    f.write("[{}] NIO [{}] [component] msg{}\n".format(
+                        get_nio_time(), level, i))
+                    if i % 10 == 0:
+                        f.write("Traceback row\n")
+
+            entries = LogEntries.sample(filename, 50, None, None)
+            self.assertEqual(len(entries), 50)
+            numbers = [int(entry["msg"].split()[0][3:]) for entry in entries]
+            self.assertEqual(numbers, sorted(numbers))
+            # entries spread over the whole file
+            self.assertLess(numbers[0], 1000)
+            self.assertGreater(numbers[-1], 19000)
+            self.assertAlmostEqual(entries.estimated_count, 20000,
+                                   delta=2000)
+            for entry in entries:
+                if int(entry["msg"].split()[0][3:]) % 10 == 0:
+                    self.assertTrue(entry["msg"].endswith("Traceback row\n"))
+
+            entries = LogEntries.sample(filename, 0.001, "ERROR", None)
+            self.assertAlmostEqual(entries.estimated_count, 5000,
+                                   delta=500)
+            # rate applies to estimated count
+            self.assertEqual(len(entries),
+                             math.ceil(entries.estimated_count * 0.001))
+            for entry in entries:
+                self.assertEqual(entry["level"], "ERROR")
+
+            # small files are read in full
+            entries = LogEntries.sample(filename, 10000, None, None,
+                                        fields=["time"])
+            self.assertEqual(len(entries), 10000)
+            self.assertEqual(entries.estimated_count, 20000)
+
+            entries = LogEntries.sample_all([filename], 20, None, None,
+                                            fields=["level"])
+            self.assertEqual(len(entries), 20)
+            self.assertEqual(set(entries[0]), {"level"})
+
+    def test_read_cancelled(self):
+        """ Assert a cancelled read is abandoned
+        """
+        cancel = threading.Event()
+        cancel.set()
+        with patch.object(LogEntries, "_get_file_size", return_value=0), \
+                patch.object(LogEntries, "_get_file_contents") as \
+                mock_contents:
+            mock_contents.return_value = \
+                ["[{}] NIO [INFO] [component] msg".format(get_nio_time())]
+            with self.assertRaises(ReadCancelled):
+                LogEntries.read("file", -1, None, None, cancel=cancel)
+
     def _get_entries_dict(self):
         return \
             {
@@ -202,7 +814,8 @@ class TestLogManagerEntries(NIOTestCase):
                 ]
             }
 
-    def _get_entries(self, filename, num_entries, level, component):
+    def _get_entries(self, filename, num_entries, level, component,
+                     **kwargs):
         return self._get_entries_dict()[filename]
 
     def test_read_all(self):
@@ -0,0 +1,57 @@
+import logging
+
+from nio.testing.test_case import NIOTestCase
+
+from ..memory_buffer import LogRecordBuffer
+
+
+class TestLogRecordBuffer(NIOTestCase):
+
+    def _record(self, level, name, msg):
+        return logging.LogRecord(name, level, __file__, 0, msg, None, None)
+
+    def test_get(self):
+        """ Asserts entries are retrieved oldest first and filtered
+        """
+        buffer = LogRecordBuffer(10)
+        buffer.append(self._record(logging.INFO, "component1", "msg1"))
+        buffer.append(self._record(logging.ERROR, "component2", "msg2"))
+        buffer.append(self._record(logging.DEBUG, "component1", "msg3"))
+
+        entries = buffer.get(3)
+        self.assertEqual([entry["msg"] for entry in entries],
+                         ["msg1\n", "msg2\n", "msg3\n"])
+        self.assertEqual(entries[1]["level"], "ERROR")
+        self.assertEqual(entries[1]["component"], "component2")
+        self.assertTrue(entries[0]["time"].endswith("Z"))
+
+        entries = buffer.get(1, level="INFO")
+        self.assertEqual([entry["msg"] for entry in entries], ["msg2\n"])
+
+        entries = buffer.get(2, component="component1")
+        self.assertEqual([entry["msg"] for entry in entries],
+                         ["msg1\n", "msg3\n"])
+
+    def test_not_enough_history(self):
+        """ Asserts None is returned when buffer cannot answer the query
+        """
+        buffer = LogRecordBuffer(2)
+        # all entries are only available in files
+        self.assertIsNone(buffer.get(-1))
+        buffer.append(self._record(logging.INFO, "component", "msg1"))
+        self.assertIsNone(buffer.get(2))
+
+        buffer.append(self._record(logging.ERROR, "component", "msg2"))
+        buffer.append(self._record(logging.DEBUG, "component", "msg3"))
+        buffer.append(self._record(logging.DEBUG, "component", "msg4"))
+        buffer.append(self._record(logging.DEBUG, "component", "msg5"))
+        # DEBUG records were evicted, entries older than the oldest DEBUG
+        # record held might be missing
+        self.assertIsNone(buffer.get(3))
+        entries = buffer.get(2)
+        self.assertEqual([entry["msg"] for entry in entries],
+                         ["msg4\n", "msg5\n"])
+        # ERROR sub-buffer is not affected by DEBUG evictions
+        entries = buffer.get(2, level="INFO")
+        self.assertEqual([entry["msg"] for entry in entries],
+                         ["msg1\n", "msg2\n"])
@@ -0,0 +1,82 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from nio.testing.test_case import NIOTestCase
+from nio.util.nio_time import get_nio_time
+
+from ..log_entries import LogEntries
+from ..metrics import MetricsRegistry, RequestMetrics, collecting, current
+from ..query_cache import QueryCache
+from ..read_pool import ReadPool
+
+
+class TestMetrics(NIOTestCase):
+
+    def test_registry(self):
+        registry = MetricsRegistry(idle_timeout=60)
+        # nothing is measured until metrics are scraped
+        self.assertIsNone(registry.start_request())
+        self.assertIsNotNone(registry.start_request(force=True))
+        self.assertEqual(registry.scrape(), {})
+
+        metrics = registry.start_request()
+        self.assertIsNotNone(metrics)
+        metrics.add(bytes_read=100, rows_parsed=3)
+        metrics.add(bytes_read=50)
+        metrics.add_time("read", 0.002)
+        registry.record("entries", metrics)
+
+        snapshot = registry.scrape()["entries"]
+        self.assertEqual(snapshot["duration"]["count"], 1)
+        self.assertEqual(snapshot["bytes_read"]["sum"], 150)
+        self.assertEqual(snapshot["bytes_read"]["buckets"], {"250": 1})
+        self.assertEqual(snapshot["rows_parsed"]["sum"], 3)
+
+        with patch("time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(registry.start_request())
+
+    def test_read_metrics(self):
+        with tempfile.TemporaryDirectory() as logs_dir:
+            filename = os.path.join(logs_dir, "main.log")
+            with open(filename, "w") as f:
+                for i in range(10):
+                    f.write("[{}] NIO [{}] [component] msg{}\n".format(
+                        get_nio_time(), "ERROR" if i % 2 else "INFO", i))
+                f.write("Traceback row\n")
+
+            # reads run in a pool still count towards the request
+            pool = ReadPool(1, 1, 5, 1)
+            cache = QueryCache(10, 1024 * 1024)
+            metrics = RequestMetrics()
+            with collecting(metrics):
+                for _ in range(2):
+                    cache.get("key", lambda: pool.run(
+                        lambda cancel: LogEntries.read_all(
+                            [filename], -1, "ERROR", None)))
+            pool.shutdown()
+            self.assertIsNone(current())
+
+            # file is opened to sniff its format, then to read it
+            size = os.path.getsize(filename)
+            self.assertEqual(metrics.counters["files_opened"], 2)
+            self.assertEqual(metrics.counters["bytes_read"],
+                             size + min(size, 512))
+            self.assertEqual(metrics.counters["rows_parsed"], 11)
+            self.assertEqual(metrics.counters["rows_filtered"], 5)
+            self.assertEqual(metrics.counters["cache_hits"], 1)
+            self.assertGreater(metrics.phases["read"], 0)
+            self.assertGreater(metrics.phases["parse"], 0)
+            headers = dict(metrics.headers())
+            self.assertIn("rows_parsed=11", headers["X-Log-Metrics"])
+            self.assertIn("serialize;dur=0.000", headers["Server-Timing"])
+
+            # forward reads are measured too
+            metrics = RequestMetrics()
+            with collecting(metrics):
+                entries = list(LogEntries.iter_forward(filename, None, None))
+            self.assertEqual(len(entries), 10)
+            self.assertEqual(metrics.counters["files_opened"], 3)
+            self.assertEqual(metrics.counters["bytes_read"],
+                             2 * size + min(size, 512))
+            self.assertGreater(metrics.phases["read"], 0)
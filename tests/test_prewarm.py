@@ -0,0 +1,67 @@
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from nio.testing.test_case import NIOTestCase
+from nio.util.nio_time import get_nio_time
+
+from ..manager import LogManager
+from ..prewarm import Prewarmer
+from ..query_cache import QueryCache
+
+
+class TestPrewarm(NIOTestCase):
+
+    def test_prewarm(self):
+        """ Assert log tails and service inventories are warmed
+        """
+        manager = LogManager()
+        manager._query_cache = QueryCache(10, 1024 * 1024)
+        manager._logger_names_ttl = 60
+        manager._read_pool = MagicMock()
+        manager._service_manager = MagicMock()
+        manager._service_manager.services = {"service1_id": "service1",
+                                             "service2_id": ""}
+        manager._service_manager.identify_service.side_effect = \
+            lambda service: service + "_id" \
+            if not service.endswith("_id") else service
+        manager._service_manager.execute_request.return_value = \
+            [{"name": "logger1", "level": "INFO"}]
+
+        with tempfile.TemporaryDirectory() as logs_dir, \
+                patch(LogManager.__module__ + ".NIOEnvironment") as env:
+            env.get_path.return_value = logs_dir
+            for name in ("main", "service1", "service2_id"):
+                with open(os.path.join(logs_dir, name + ".log"), "w") as f:
+                    f.write("[{}] NIO [INFO] [component] msg\n".format(
+                        get_nio_time()))
+
+            prewarmer = Prewarmer(manager, 100, 1024 * 1024 * 1024)
+            prewarmer.start()
+            prewarmer.join(10)
+
+            # main, both services and all logs are cached, nameless
+            # service2 through its identifier
+            self.assertEqual(manager._query_cache.stats()["entries"], 4)
+            manager.get_log_entries("main", entries_count=100)
+            self.assertEqual(manager._query_cache.stats()["hits"], 1)
+            manager.get_log_entries(None, "service2_id", entries_count=100)
+            self.assertEqual(manager._query_cache.stats()["hits"], 2)
+            # tails were read in prewarming thread, taking no pool slots
+            self.assertEqual(manager._read_pool.run.call_count, 0)
+
+        # inventories of both services were fetched
+        self.assertEqual(
+            manager._service_manager.execute_request.call_count, 2)
+        manager.get_service_logger_names("service1", True)
+        self.assertEqual(
+            manager._service_manager.execute_request.call_count, 2)
+
+    def test_stopped(self):
+        manager = MagicMock()
+        manager.get_services.return_value = {}
+        prewarmer = Prewarmer(manager, 100, 0)
+        prewarmer.stop()
+        prewarmer.start()
+        prewarmer.join(10)
+        self.assertEqual(manager.get_log_entries.call_count, 0)
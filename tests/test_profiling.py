@@ -0,0 +1,41 @@
+import threading
+
+from nio.testing.test_case import NIOTestCase
+
+from ..profiling import profile_call, profiled
+
+
+def _parse(rows):
+    return [row.split() for row in rows]
+
+
+class TestProfiling(NIOTestCase):
+
+    def test_profile_call(self):
+        rows = ["a b c"] * 10000
+
+        def serve():
+            # part of the work runs in another thread, as pooled reads do
+            results = []
+            worker = threading.Thread(
+                target=profiled(lambda: results.append(_parse(rows))))
+            worker.start()
+            worker.join()
+            return len(results[0])
+
+        result, report = profile_call(serve)
+        self.assertEqual(result, 10000)
+        self.assertGreater(report["duration"], 0)
+        self.assertGreater(report["peak_memory"], 0)
+        functions = [function["function"]
+                     for function in report["functions"]]
+        self.assertTrue(any(function.endswith("(_parse)")
+                            for function in functions))
+        self.assertTrue(any(function.endswith("(serve)")
+                            for function in functions))
+        self.assertTrue(report["allocations"])
+
+    def test_profiled_without_profile(self):
+        def func():
+            pass
+        self.assertIs(profiled(func), func)
@@ -0,0 +1,93 @@
+import threading
+from unittest.mock import Mock
+
+from nio.testing.test_case import NIOTestCase
+
+from ..log_entries import LogEntry
+from ..query_cache import QueryCache
+
+
+class TestQueryCache(NIOTestCase):
+
+    def test_hits_and_misses(self):
+        """ Asserts results are loaded once and then served from cache
+        """
+        cache = QueryCache(10, 1024 * 1024)
+        load = Mock(return_value=[LogEntry({"msg": "msg"})])
+        self.assertEqual(cache.get("key", load), load.return_value)
+        self.assertEqual(cache.get("key", load), load.return_value)
+        self.assertEqual(load.call_count, 1)
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["entries"], 1)
+        self.assertGreater(stats["size"], 0)
+
+    def test_eviction(self):
+        """ Asserts least recently used results are evicted
+        """
+        cache = QueryCache(2, 1024 * 1024)
+        cache.get("key1", Mock(return_value=[]))
+        cache.get("key2", Mock(return_value=[]))
+        # use key1 so that key2 becomes the least recently used
+        cache.get("key1", Mock())
+        cache.get("key3", Mock(return_value=[]))
+        load = Mock(return_value=[])
+        cache.get("key1", load)
+        self.assertEqual(load.call_count, 0)
+        cache.get("key2", load)
+        self.assertEqual(load.call_count, 1)
+
+    def test_size_cap(self):
+        """ Asserts results exceeding memory cap are not cached
+        """
+        cache = QueryCache(10, 1000)
+        big_result = [LogEntry({"msg": "x" * 1000})]
+        load = Mock(return_value=big_result)
+        cache.get("key", load)
+        cache.get("key", load)
+        self.assertEqual(load.call_count, 2)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_single_flight(self):
+        """ Asserts concurrent identical queries share one load
+        """
+        cache = QueryCache(10, 1024 * 1024)
+        loading = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            loading.set()
+            release.wait(5)
+            return [LogEntry({"msg": "msg"})]
+
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(cache.get("key", load)))
+            for _ in range(5)]
+        threads[0].start()
+        loading.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        # let waiting requests reach the in flight load
+        while cache.stats()["coalesced"] < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_load_error(self):
+        """ Asserts failed loads are not cached
+        """
+        cache = QueryCache(10, 1024 * 1024)
+        with self.assertRaises(IOError):
+            cache.get("key", Mock(side_effect=IOError))
+        load = Mock(return_value=[])
+        cache.get("key", load)
+        self.assertEqual(load.call_count, 1)
@@ -0,0 +1,53 @@
+import threading
+
+from nio.testing.test_case import NIOTestCase
+
+from ..read_pool import ReadPool, ReadPoolFull, ReadTimeout
+
+
+class TestReadPool(NIOTestCase):
+
+    def test_run(self):
+        """ Asserts reads are run and their result returned
+        """
+        pool = ReadPool(1, 0, 5, 1)
+        self.assertEqual(pool.run(lambda cancel: "result"), "result")
+        # slot is released once read completes
+        self.assertEqual(pool.run(lambda cancel: "result"), "result")
+        pool.shutdown()
+
+    def test_admission(self):
+        """ Asserts reads are rejected when pool and queue are busy
+        """
+        pool = ReadPool(1, 0, 5, 3)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_read(cancel):
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=pool.run, args=(slow_read,))
+        thread.start()
+        started.wait(5)
+        with self.assertRaises(ReadPoolFull) as context:
+            pool.run(lambda cancel: None)
+        self.assertEqual(context.exception.retry_after, 3)
+        release.set()
+        thread.join(5)
+        pool.shutdown()
+
+    def test_timeout(self):
+        """ Asserts slow reads time out and are cancelled
+        """
+        pool = ReadPool(1, 0, 0.05, 1)
+        cancelled = threading.Event()
+
+        def slow_read(cancel):
+            cancel.wait(5)
+            cancelled.set()
+
+        with self.assertRaises(ReadTimeout):
+            pool.run(slow_read)
+        self.assertTrue(cancelled.wait(5))
+        pool.shutdown()
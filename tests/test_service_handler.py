@@ -41,6 +41,31 @@ class TestServiceLogHandler(NIOCoreWebTestCase):
         self.assertEqual(response_body, json.dumps(loggers))
         manager.get_service_logger_names.assert_called_with('logger', True)
 
+    def test_on_get_profile(self):
+        manager = MagicMock()
+        loggers = [{"name": "a logger"}]
+        manager.get_service_logger_names.return_value = loggers
+        manager.store_profile.return_value = "profile-1.json"
+        handler = ServiceLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "logger",
+                                            "profile": "true"}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        response_body = json.loads(response.set_body.call_args[0][0])
+        self.assertEqual(response_body["result"], loggers)
+        self.assertIn("functions", response_body["profile"])
+        self.assertIn("allocations", response_body["profile"])
+
+        # profile is stored rather than returned
+        mock_req.get_params.return_value = {"identifier": "logger",
+                                            "profile": "store"}
+        handler.on_get(mock_req, response)
+        self.assertEqual(response.set_body.call_args[0][0],
+                         json.dumps(loggers))
+        response.set_header.assert_any_call('X-Log-Profile',
+                                            'profile-1.json')
+
     def test_on_post(self):
         manager = MagicMock()
         mock_req = MagicMock(spec=Request)
@@ -0,0 +1,112 @@
+import logging
+import os
+import tempfile
+import time
+
+from nio.testing.test_case import NIOTestCase
+
+from ..memory_buffer import select_entries
+from ..shared_ring import SharedRingWriter, read_ring
+
+
+class TestSharedRing(NIOTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._dir = tempfile.TemporaryDirectory()
+        self._ring = os.path.join(self._dir.name, "service.ring")
+        self._log = os.path.join(self._dir.name, "service.log")
+
+    def tearDown(self):
+        self._dir.cleanup()
+        super().tearDown()
+
+    def test_write_and_read(self):
+        """ Asserts records written are read back in order
+        """
+        writer = SharedRingWriter(self._ring, 4, 128)
+        now = time.time()
+        writer.write(now, logging.INFO, "component1", "msg1")
+        writer.write(now + 1, logging.ERROR, "component2", "msg2")
+
+        horizon, records = read_ring(self._ring, self._log)
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0][2:], (logging.INFO, "component1", "msg1"))
+        self.assertEqual(records[1][2:],
+                         (logging.ERROR, "component2", "msg2"))
+
+        entries = select_entries([(horizon, records)], 1)
+        self.assertEqual(entries[0]["level"], "ERROR")
+        self.assertEqual(entries[0]["msg"], "msg2\n")
+
+        _, records = read_ring(self._ring, self._log, level="ERROR")
+        self.assertEqual(len(records), 1)
+        writer.close()
+
+    def test_wrap_around(self):
+        """ Asserts oldest records are overwritten and long ones truncated
+        """
+        writer = SharedRingWriter(self._ring, 2, 32)
+        now = time.time()
+        for i in range(3):
+            writer.write(now + i, logging.INFO, "c", "msg{}".format(i))
+        writer.write(now + 3, logging.INFO, "c", "x" * 100)
+
+        horizon, records = read_ring(self._ring, self._log)
+        self.assertEqual([record[4][:4] for record in records],
+                         ["msg2", "xxxx"])
+        self.assertTrue(records[1][4].endswith("bytes truncated]"))
+        # history older than oldest record held is not complete
+        self.assertEqual(horizon, records[0])
+        self.assertIsNone(select_entries([(horizon, records)], 3))
+        writer.close()
+
+    def test_truncated(self):
+        """ Asserts messages are cut on a character boundary and marked
+        """
+        writer = SharedRingWriter(self._ring, 4, 64)
+        now = time.time()
+        writer.write(now, logging.ERROR, "cc", "\u00e9" * 100)
+        writer.write(now + 1, logging.INFO, "c", "msg")
+
+        horizon, records = read_ring(self._ring, self._log)
+        # slot holds 37 msg bytes, the last one would split a character
+        self.assertEqual(records[0][4],
+                         "\u00e9" * 18 + "[... 164 bytes truncated]")
+        self.assertEqual(records[0][4].size, 200)
+        # a truncated message is left to the log files
+        self.assertEqual(select_entries([(horizon, records)], 1)[0]["msg"],
+                         "msg\n")
+        self.assertIsNone(select_entries([(horizon, records)], 2))
+        writer.close()
+
+    def test_stale_ring(self):
+        """ Asserts a ring no longer written to is not used
+        """
+        writer = SharedRingWriter(self._ring, 2, 64)
+        writer.write(time.time(), logging.INFO, "c", "msg")
+        writer.close()
+        self.assertIsNotNone(read_ring(self._ring, self._log))
+        with open(self._log, "w") as f:
+            f.write("entry")
+        future = time.time() + 60
+        os.utime(self._log, (future, future))
+        self.assertIsNone(read_ring(self._ring, self._log))
+
+    def test_missing_ring(self):
+        self.assertIsNone(read_ring(self._ring, self._log))
+
+    def test_new_session(self):
+        """ Asserts records from a previous session are behind the horizon
+        """
+        writer = SharedRingWriter(self._ring, 4, 64)
+        writer.write(time.time() - 10, logging.INFO, "c", "old msg")
+        writer.close()
+        writer = SharedRingWriter(self._ring, 4, 64)
+        writer.write(time.time(), logging.INFO, "c", "new msg")
+        horizon, records = read_ring(self._ring, self._log)
+        self.assertEqual(len(records), 2)
+        entries = select_entries([(horizon, records)], 1)
+        self.assertEqual(entries[0]["msg"], "new msg\n")
+        self.assertIsNone(select_entries([(horizon, records)], 2))
+        writer.close()
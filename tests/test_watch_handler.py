@@ -0,0 +1,51 @@
+import json
+from unittest.mock import MagicMock
+from nio.modules.web.http import Request
+from nio.testing.modules.security.module import TestingSecurityModule
+
+from ..watch_handler import WatchLogHandler
+from niocore.testing.web_test_case import NIOCoreWebTestCase
+
+
+class TestWatchLogHandler(NIOCoreWebTestCase):
+
+    def get_module(self, module_name):
+        # Don't want to test permissions, use the test module
+        if module_name == 'security':
+            return TestingSecurityModule()
+        else:
+            return super().get_module(module_name)
+
+    def test_on_get(self):
+        manager = MagicMock()
+        manager.get_watches.return_value = [{"name": "errors"}]
+        manager.get_watch_results.return_value = {"name": "errors",
+                                                  "entries": []}
+        handler = WatchLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {}
+        response = MagicMock()
+        handler.on_get(mock_req, response)
+        self.assertEqual(json.loads(response.set_body.call_args[0][0]),
+                         [{"name": "errors"}])
+
+        mock_req.get_params.return_value = {"identifier": "errors",
+                                            "since": "10"}
+        handler.on_get(mock_req, response)
+        manager.get_watch_results.assert_called_with("errors", 10)
+
+    def test_on_post(self):
+        manager = MagicMock()
+        manager.register_watch.return_value = {"name": "errors"}
+        handler = WatchLogHandler("", manager)
+        mock_req = MagicMock(spec=Request)
+        mock_req.get_params.return_value = {"identifier": "errors"}
+        mock_req.get_body.return_value = {"log": "main", "level": "ERROR",
+                                          "window": "50"}
+        response = MagicMock()
+        handler.on_post(mock_req, response)
+        manager.register_watch.assert_called_with(
+            "errors", "main", "ERROR", None, 50)
+
+        handler.on_delete(mock_req, response)
+        manager.remove_watch.assert_called_with("errors")
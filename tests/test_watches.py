@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+from nio.testing.test_case import NIOTestCase
+
+from ..changes import LogChanges
+from ..watches import LogWatches
+
+
+class TestLogWatches(NIOTestCase):
+
+    def _write(self, log, *rows):
+        with open(os.path.join(self.logs_dir, log + ".log"), "a") as f:
+            for level, msg in rows:
+                f.write("[2020-01-01T00:00:00.000Z] NIO [{}] [component] {}\n".
+                        format(level, msg))
+
+    def test_watches(self):
+        with tempfile.TemporaryDirectory() as self.logs_dir:
+            self._write("main", ("ERROR", "before"))
+            changes = LogChanges(self.logs_dir, poll_interval=0)
+            path = os.path.join(self.logs_dir, "watches.json")
+            watches = LogWatches(self.logs_dir, changes, path=path)
+            errors = watches.register("errors", "main", "ERROR", window=2)
+            everything = watches.register("all")
+            with self.assertRaises(ValueError):
+                watches.register("invalid", level="LOUD")
+
+            # only data appended after registering is matched, last entries
+            # are matched once the next ones are written
+            self._write("main", ("INFO", "info1"), ("ERROR", "error1"),
+                        ("INFO", "info2"))
+            self._write("service", ("ERROR", "error2"), ("INFO", "info3"))
+            watches.evaluate()
+            results = errors.results()
+            self.assertEqual(results["matched"], 1)
+            self.assertEqual([entry["msg"] for entry in results["entries"]],
+                             ["error1\n"])
+            self.assertEqual(everything.results()["matched"], 3)
+
+            self._write("main", ("ERROR", "error3"), ("CRITICAL", "error4"),
+                        ("ERROR", "error5"), ("INFO", "info4"))
+            watches.evaluate()
+            results = errors.results()
+            # window keeps the last entries matched
+            self.assertEqual(results["matched"], 4)
+            self.assertEqual([entry["msg"] for entry in results["entries"]],
+                             ["error4\n", "error5\n"])
+            self.assertEqual(
+                [entry["msg"] for entry in errors.results(3)["entries"]],
+                ["error5\n"])
+            self.assertEqual(errors.results(4)["entries"], [])
+
+            # rotated files are matched from their start
+            os.rename(os.path.join(self.logs_dir, "main.log"),
+                      os.path.join(self.logs_dir, "main.log.1"))
+            self._write("main", ("ERROR", "rotated"), ("INFO", "info5"))
+            watches.evaluate()
+            self.assertEqual(errors.results(4)["entries"][0]["msg"],
+                             "rotated\n")
+
+            # definitions are saved
+            watches.remove("all")
+            with self.assertRaises(ValueError):
+                watches.get("all")
+            loaded = LogWatches(self.logs_dir, changes, path=path)
+            self.assertEqual([watch.definition() for watch in loaded.list()],
+                             [errors.definition()])
+            changes.close()
+
+    def test_partial_rows(self):
+        """ Assert records partly written when evaluating are matched whole
+        """
+        with tempfile.TemporaryDirectory() as self.logs_dir:
+            self._write("main", ("INFO", "before"))
+            changes = LogChanges(self.logs_dir, poll_interval=0)
+            watches = LogWatches(self.logs_dir, changes)
+            errors = watches.register("errors", "main", "ERROR")
+
+            filename = os.path.join(self.logs_dir, "main.log")
+            with open(filename, "a") as f:
+                f.write("[2020-01-01T00:00:00.000Z] NIO [ERROR] [component] "
+                        "partial")
+            watches.evaluate()
+            self.assertEqual(errors.results()["matched"], 0)
+
+            with open(filename, "a") as f:
+                f.write(" rest of line\nTraceback row\n")
+            watches.evaluate()
+            # rows may still be added to last entry
+            self.assertEqual(errors.results()["matched"], 0)
+
+            self._write("main", ("INFO", "next"))
+            watches.evaluate()
+            self.assertEqual(
+                [entry["msg"] for entry in errors.results()["entries"]],
+                ["partial rest of line\nTraceback row\n"])
+            changes.close()
+
+    def test_last_entry(self):
+        """ Assert last entry of a file is matched once it is not written to
+        """
+        with tempfile.TemporaryDirectory() as self.logs_dir:
+            self._write("main", ("INFO", "before"))
+            changes = LogChanges(self.logs_dir, poll_interval=0)
+            watches = LogWatches(self.logs_dir, changes)
+            errors = watches.register("errors", "main", "CRITICAL")
+
+            self._write("main", ("CRITICAL", "crashing"))
+            watches.evaluate()
+            # rows may still be added while file is being written to
+            self.assertEqual(errors.results()["matched"], 0)
+
+            # nothing was appended for an interval
+            filename = os.path.join(self.logs_dir, "main.log")
+            modified = os.path.getmtime(filename) - 10
+            os.utime(filename, (modified, modified))
+            watches.evaluate()
+            self.assertEqual(
+                [entry["msg"] for entry in errors.results()["entries"]],
+                ["crashing\n"])
+            watches.evaluate()
+            self.assertEqual(errors.results()["matched"], 1)
+            changes.close()
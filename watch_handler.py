@@ -0,0 +1,90 @@
+import json
+
+from nio.modules.security.access import ensure_access
+from nio.util.logging import get_nio_logger
+from nio.modules.web import RESTHandler
+
+
+class WatchLogHandler(RESTHandler):
+
+    """ Handles saved watch query requests
+    """
+
+    def __init__(self, route, log_manager):
+        super().__init__(route)
+        self._log_manager = log_manager
+        self.logger = get_nio_logger("WatchLogHandler")
+
+    def on_get(self, request, response, *args, **kwargs):
+        """ API endpoint to retrieve watch query results
+
+        To list watches along with their match counters use:
+            http://[host]:[port]/log/watch
+        To retrieve entries kept by watch 'errors' use:
+            http://[host]:[port]/log/watch/errors
+        To retrieve only entries matched after a previous retrieval, passing
+        the 'matched' count it returned, use:
+            http://[host]:[port]/log/watch/errors?since=120
+
+        """
+
+        # Ensure instance "read" access in order to retrieve watch results
+        ensure_access("instance", "read")
+
+        params = request.get_params()
+        self.logger.info("WatchLogHandler.on_get, params: {0}".format(params))
+
+        if "identifier" in params:
+            since = int(params["since"]) if "since" in params else None
+            result = self._log_manager.get_watch_results(
+                params["identifier"], since)
+        else:
+            result = self._log_manager.get_watches()
+
+        response.set_header('Content-Type', 'application/json')
+        response.set_body(json.dumps(result))
+
+    def on_post(self, request, response, *args, **kwargs):
+        """ API endpoint to register a watch query
+
+        To match ERROR entries and above in main, keeping last 50, use:
+            http://[host]:[port]/log/watch/errors
+        with body:
+            {"log": "main", "level": "ERROR", "window": 50}
+        'log', 'level', 'component' and 'window' are optional, entries of
+        all logs are matched when 'log' is not given
+
+        """
+
+        # Ensure instance "write" access in order to register watches
+        ensure_access("instance", "write")
+
+        params = request.get_params()
+        body = request.get_body()
+        self.logger.info("WatchLogHandler.on_post, params: {0}, body: {1}".
+                         format(params, body))
+        if "identifier" not in params:
+            raise RuntimeError("Watch name not provided")
+
+        watch = self._log_manager.register_watch(
+            params["identifier"], body.get("log"), body.get("level"),
+            body.get("component"), int(body.get("window", 100)))
+
+        response.set_header('Content-Type', 'application/json')
+        response.set_body(json.dumps(watch))
+
+    def on_put(self, request, response, *args, **kwargs):
+        return self.on_post(request, response, args, kwargs)
+
+    def on_delete(self, request, response, *args, **kwargs):
+
+        # Ensure instance "write" access in order to remove watches
+        ensure_access("instance", "write")
+
+        params = request.get_params()
+        self.logger.info("WatchLogHandler.on_delete, params: {0}".
+                         format(params))
+        if "identifier" not in params:
+            raise RuntimeError("Watch name not provided")
+
+        self._log_manager.remove_watch(params["identifier"])
@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+from nio.util.logging import get_nio_logger
+
+from .log_entries import LogEntries
+
+
+class WatchQuery(object):
+    """ A saved query matched against log data as it is appended
+
+    Matching entries are kept in a bounded window, newest last, each one
+    numbered in sequence so that clients can ask for entries past the last
+    one they saw.
+    """
+
+    def __init__(self, name, log=None, level=None, component=None,
+                 window=100):
+        """ Create a watch query
+
+        Args:
+            name (str): watch name
+            log (str): log name, such as 'main' or a service name, all logs
+                if None
+            level (str): match entries with this level and above if not None
+            component (str): match entries with this component if not None
+            window (int): number of matching entries kept
+        """
+        self.name = name
+        self.log = log
+        self.level = level
+        self.component = component
+        self.window = window
+        # entries matched since watch was registered
+        self.matched = 0
+        self.last_match = None
+        # file path to byte offset data is matched from
+        self.positions = {}
+        # logs whose last entry was held back, read again on next evaluation
+        # even when nothing was appended to them
+        self.pending = set()
+        self._entries = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def definition(self):
+        return {
+            "name": self.name,
+            "log": self.log,
+            "level": self.level,
+            "component": self.component,
+            "window": self.window
+        }
+
+    def add(self, entries):
+        """ Adds matching entries, oldest first
+
+        Entries are consumed before results are updated, so that reading
+        results does not wait for entries to be read.
+        """
+        matched = 0
+        kept = deque(maxlen=self.window)
+        for entry in entries:
+            matched += 1
+            kept.append(entry)
+        if not matched:
+            return
+        with self._lock:
+            # only the last entries matched are kept
+            sequence = self.matched + matched - len(kept)
+            for entry in kept:
+                sequence += 1
+                self._entries.append((sequence, entry))
+            self.matched += matched
+            self.last_match = kept[-1].get("time")
+
+    def results(self, since=None):
+        """ Provides matching entries kept along with match counters
+
+        Args:
+            since (int): only entries with a greater sequence number are
+                provided when not None
+
+        Returns:
+            dict with watch definition, 'matched' count, which is the
+            sequence number of the last entry matched, time of 'last_match'
+            and 'entries' kept, oldest first
+        """
+        with self._lock:
+            entries = []
+            for sequence, entry in reversed(self._entries):
+                if since is not None and sequence <= since:
+                    break
+                entries.append(entry)
+            entries.reverse()
+            result = self.summary()
+        result["entries"] = entries
+        return result
+
+    def summary(self):
+        """ Provides watch definition along with match counters
+        """
+        result = self.definition()
+        result.update(matched=self.matched, last_match=self.last_match)
+        return result
+
+
+class LogWatches(object):
+    """ Saved watch queries kept up to date in the background
+
+    Log files changed since last evaluation are found out through log
+    changes, and every watch reads only data appended to them since its last
+    position, so that reading watch results involves no file reading. The
+    last entry of a file is matched once a later one is written, or once
+    nothing was written to the file for an evaluation interval, since rows
+    may still be added to it until then.
+    Watch definitions are saved to a file and loaded back on creation,
+    matching starts over from the end of log files.
+    """
+
+    def __init__(self, logs_dir, changes, interval=5.0, path=None):
+        """ Create watches
+
+        Args:
+            logs_dir (str): directory holding log files
+            changes (LogChanges): tracker of log files changes
+            interval (float): seconds between evaluations
+            path (str): file definitions are saved to, not saved if None
+        """
+        self.logger = get_nio_logger("LogWatches")
+        self._logs_dir = logs_dir
+        self._changes = changes
+        self._interval = interval
+        self._path = path
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._token = changes.changes(levels=False)["token"]
+        self._stopped = threading.Event()
+        self._thread = None
+        self._load()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="LogWatches",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def register(self, name, log=None, level=None, component=None,
+                 window=100):
+        """ Registers a watch, replacing any other with the same name
+
+        Only entries appended from now on are matched.
+
+        Returns:
+            WatchQuery registered
+
+        Raises:
+            ValueError: if watch definition is not valid
+        """
+        if not name:
+            raise ValueError("Watch name is required")
+        if level is not None and level not in logging._nameToLevel:
+            raise ValueError("Invalid level: {}".format(level))
+        if window <= 0:
+            raise ValueError("Watch window must be positive")
+        watch = WatchQuery(name, log, level, component, window)
+        for filename in self._get_files(log):
+            try:
+                watch.positions[filename] = os.path.getsize(filename)
+            except OSError:
+                continue
+        with self._lock:
+            self._watches[name] = watch
+        self._save()
+        return watch
+
+    def remove(self, name):
+        """ Removes a watch
+
+        Raises:
+            ValueError: if watch does not exist
+        """
+        with self._lock:
+            if self._watches.pop(name, None) is None:
+                raise ValueError("Watch '{}' does not exist".format(name))
+        self._save()
+
+    def get(self, name):
+        """ Provides a watch
+
+        Raises:
+            ValueError: if watch does not exist
+        """
+        with self._lock:
+            watch = self._watches.get(name)
+        if watch is None:
+            raise ValueError("Watch '{}' does not exist".format(name))
+        return watch
+
+    def list(self):
+        with self._lock:
+            return list(self._watches.values())
+
+    def evaluate(self):
+        """ Matches watches against data appended to changed log files
+        """
+        changes = self._changes.changes(self._token, levels=False)
+        self._token = changes["token"]
+        if changes["reset"]:
+            # changes since last evaluation are unknown, check every file
+            changed = {log: "grew" for log in self._get_logs()}
+        else:
+            changed = {log: details["change"]
+                       for log, details in changes["files"].items()
+                       if details["change"] != "removed"}
+        for watch in self.list():
+            logs = {log: change for log, change in changed.items()
+                    if watch.log is None or watch.log == log}
+            for log in watch.pending - set(logs):
+                logs[log] = "grew"
+            for log, change in logs.items():
+                self._evaluate(watch, log, change)
+
+    def _evaluate(self, watch, log, change):
+        filename = os.path.join(self._logs_dir, log + ".log")
+        if change != "grew":
+            # file was replaced, it is matched from its start
+            watch.positions.pop(filename, None)
+        # last entry is held back while the file is being written to
+        stream = LogEntries.iter_entries(
+            [filename], watch.level, watch.component, newest_first=False,
+            positions={filename: watch.positions.get(filename, 0)},
+            follow=True, follow_delay=self._interval)
+        try:
+            with stream:
+                watch.add(stream)
+            size = os.path.getsize(filename)
+        except OSError:
+            self.logger.warning("Failed to read {} log file".format(
+                filename))
+            watch.pending.discard(log)
+            return
+        position = watch.positions[filename] = stream.positions[filename]
+        if position < size:
+            watch.pending.add(log)
+        else:
+            watch.pending.discard(log)
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.evaluate()
+            except Exception:
+                self.logger.exception("Evaluating watches failed")
+
+    def _get_logs(self):
+        try:
+            return [filename[:-len(".log")]
+                    for filename in os.listdir(self._logs_dir)
+                    if filename.endswith(".log")]
+        except OSError:
+            return []
+
+    def _get_files(self, log):
+        logs = [log] if log is not None else self._get_logs()
+        return [os.path.join(self._logs_dir, log + ".log") for log in logs]
+
+    def _load(self):
+        if self._path is None or not os.path.exists(self._path):
+            return
+        try:
+            with open(self._path) as f:
+                definitions = json.load(f)
+            for definition in definitions:
+                self.register(**definition)
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning("Failed to load watches from {}: {}".format(
+                self._path, e))
+
+    def _save(self):
+        if self._path is None:
+            return
+        definitions = [watch.definition() for watch in self.list()]
+        # written aside and renamed so that a partial file is never loaded
+        temp_path = self._path + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(definitions, f)
+            os.replace(temp_path, self._path)
+        except OSError as e:
+            self.logger.warning("Failed to save watches to {}: {}".format(
+                self._path, e))